@@ -0,0 +1,223 @@
+"""Local stand-in for the CoinGecko v3 API with latency and error injection.
+
+Serves deterministic data for the endpoints the backend uses and counts every
+call, so benchmarks can report how many upstream requests each run cost.
+
+    python bench/fake_coingecko.py --port 8900 --latency-ms 150 --error-rate 0.02
+"""
+import argparse
+import json
+import math
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+NAMED_COINS = [
+    ('bitcoin', 'Bitcoin', 'btc', 65000.0),
+    ('ethereum', 'Ethereum', 'eth', 3200.0),
+    ('solana', 'Solana', 'sol', 150.0),
+    ('polkadot', 'Polkadot', 'dot', 4.0),
+    ('cardano', 'Cardano', 'ada', 0.45)
+]
+
+
+class FakeMarket:
+    """Deterministic coin universe and price histories"""
+
+    def __init__(self, coins=1000):
+        self.coins = []
+        for rank in range(1, coins + 1):
+            if rank <= len(NAMED_COINS):
+                coin_id, name, symbol, price = NAMED_COINS[rank - 1]
+            else:
+                coin_id, name, symbol, price = f'coin-{rank}', f'Coin {rank}', f'c{rank}', 100.0 / rank
+            self.coins.append({'id': coin_id, 'name': name, 'symbol': symbol, 'base_price': price, 'rank': rank})
+        self.by_id = {coin['id']: coin for coin in self.coins}
+
+    def _price(self, coin, timestamp):
+        seed = zlib.crc32(coin['id'].encode())
+        phase = (timestamp / 3_600_000.0) / (20 + seed % 30)
+        return coin['base_price'] * (1 + 0.1 * math.sin(phase + seed) + 0.03 * math.sin(phase * 7))
+
+    def markets(self, per_page, page, price_changes=''):
+        now = int(time.time() * 1000)
+        start = (page - 1) * per_page
+        rows = []
+        for coin in self.coins[start:start + per_page]:
+            price = self._price(coin, now)
+            previous = self._price(coin, now - 86_400_000)
+            market_cap = price * 1e9 / coin['rank']
+            rows.append({
+                'id': coin['id'],
+                'symbol': coin['symbol'],
+                'name': coin['name'],
+                'current_price': price,
+                'market_cap': market_cap,
+                'market_cap_rank': coin['rank'],
+                'total_volume': market_cap * (0.02 + 0.1 * abs(math.sin(now / 3.6e6 + coin['rank']))),
+                'high_24h': price * 1.04,
+                'low_24h': price * 0.96,
+                'price_change_percentage_24h': (price - previous) / previous * 100,
+                'ath': coin['base_price'] * 2,
+                'ath_change_percentage': (price - coin['base_price'] * 2) / (coin['base_price'] * 2) * 100,
+                'last_updated': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime())
+            })
+            for window, days in (('24h', 1), ('7d', 7)):
+                if window in price_changes.split(','):
+                    past = self._price(coin, now - days * 86_400_000)
+                    rows[-1][f'price_change_percentage_{window}_in_currency'] = (price - past) / past * 100
+        return rows
+
+    def market_chart(self, coin_id, days):
+        coin = self.by_id.get(coin_id)
+        if coin is None:
+            return None
+        now = int(time.time() * 1000)
+        if days == 'max':
+            step, points = 86_400_000, 2000
+        else:
+            days = float(days)
+            step = 300_000 if days <= 1 else 3_600_000 if days <= 90 else 86_400_000
+            points = int(days * 86_400_000 / step)
+        timestamps = [now - (points - i) * step for i in range(points)] + [now]
+        prices = [[t, self._price(coin, t)] for t in timestamps]
+        return {
+            'prices': prices,
+            'market_caps': [[t, p * 1e9 / coin['rank']] for t, p in prices],
+            'total_volumes': [[t, p * 1e7 / coin['rank'] * (1 + 0.5 * math.sin(t / 7.2e6))] for t, p in prices]
+        }
+
+    def global_data(self):
+        return {'data': {
+            'active_cryptocurrencies': len(self.coins),
+            'total_market_cap': {'usd': 2.4e12},
+            'total_volume': {'usd': 9.5e10},
+            'market_cap_percentage': {'btc': 52.3, 'eth': 16.1},
+            'market_cap_change_percentage_24h_usd': 1.2
+        }}
+
+    def trending(self):
+        return {'coins': [
+            {'item': {'id': coin['id'], 'name': coin['name'], 'symbol': coin['symbol'], 'market_cap_rank': coin['rank'], 'score': i}}
+            for i, coin in enumerate(self.coins[10:17])
+        ]}
+
+    def categories(self):
+        return [
+            {'id': 'layer-1', 'name': 'Layer 1', 'market_cap': 1.9e12, 'market_cap_change_24h': 1.1, 'volume_24h': 6e10},
+            {'id': 'decentralized-finance-defi', 'name': 'DeFi', 'market_cap': 9e10, 'market_cap_change_24h': -0.8, 'volume_24h': 5e9}
+        ]
+
+
+class FakeCoinGeckoServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, market, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=500):
+        super().__init__(address, FakeCoinGeckoHandler)
+        self.market = market
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.calls = {}
+        self.calls_lock = threading.Lock()
+
+    def count(self, endpoint):
+        with self.calls_lock:
+            self.calls[endpoint] = self.calls.get(endpoint, 0) + 1
+
+    def call_counts(self):
+        with self.calls_lock:
+            return dict(self.calls)
+
+    def reset(self):
+        with self.calls_lock:
+            self.calls = {}
+
+
+class FakeCoinGeckoHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        path = url.path.removeprefix('/api/v3')
+        server = self.server
+
+        # Control endpoints are never delayed or counted
+        if path == '/__stats':
+            return self._send(200, server.call_counts())
+        if path == '/__reset':
+            server.reset()
+            return self._send(200, {'reset': True})
+
+        endpoint = '/coins/{id}/market_chart' if path.endswith('/market_chart') else path
+        server.count(endpoint)
+
+        delay = server.latency_ms + random.uniform(-server.jitter_ms, server.jitter_ms)
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if server.error_rate and random.random() < server.error_rate:
+            return self._send(server.error_status, {'error': 'injected failure'})
+
+        market = server.market
+        if path == '/ping':
+            return self._send(200, {'gecko_says': '(V3) To the Moon!'})
+        if path == '/coins/markets':
+            return self._send(200, market.markets(int(params.get('per_page', 100)), int(params.get('page', 1)), params.get('price_change_percentage', '')))
+        if path.startswith('/coins/') and path.endswith('/market_chart'):
+            chart = market.market_chart(path.split('/')[2], params.get('days', '30'))
+            return self._send(200, chart) if chart else self._send(404, {'error': 'coin not found'})
+        if path == '/global':
+            return self._send(200, market.global_data())
+        if path == '/search/trending':
+            return self._send(200, market.trending())
+        if path == '/coins/categories':
+            return self._send(200, market.categories())
+        return self._send(404, {'error': f'unknown endpoint {path}'})
+
+
+def start_server(port=0, coins=1000, latency_ms=0, jitter_ms=0, error_rate=0.0, error_status=500):
+    """Start the fake API on a background thread and return the server"""
+    server = FakeCoinGeckoServer(
+        ('127.0.0.1', port), FakeMarket(coins),
+        latency_ms=latency_ms, jitter_ms=jitter_ms, error_rate=error_rate, error_status=error_status
+    )
+    threading.Thread(target=server.serve_forever, name='fake-coingecko', daemon=True).start()
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--coins', type=int, default=1000)
+    parser.add_argument('--latency-ms', type=float, default=150)
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=500)
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.coins, args.latency_ms, args.jitter_ms, args.error_rate, args.error_status)
+    print(f"Fake CoinGecko listening on http://127.0.0.1:{server.server_address[1]}/api/v3")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,187 @@
+"""Latency and throughput benchmark for the API against a local fake CoinGecko.
+
+Starts the fake upstream, boots the app under gunicorn pointed at it, drives
+concurrent closed-loop traffic at each endpoint and reports throughput,
+latency percentiles and upstream calls per endpoint.
+
+    python bench/run_bench.py --duration 20 --concurrency 50 --latency-ms 200
+    python bench/run_bench.py --max-p99-ms 250   # exit 1 on regression
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import requests
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from fake_coingecko import start_server
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+DEFAULT_ENDPOINTS = [
+    '/api/reports/daily',
+    '/api/crypto/top-coins',
+    '/api/opportunities/sale-of-the-day'
+]
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def start_app(port, upstream_url, args, workdir):
+    env = dict(
+        os.environ,
+        PORT=str(port),
+        COINGECKO_BASE_URL=upstream_url,
+        DATABASE_URL=f"sqlite:///{os.path.join(workdir, 'bench.db')}",
+        RATE_LIMIT_PER_MINUTE=str(args.rate_limit),
+        SERVER_MODE=args.server_mode,
+        WEB_CONCURRENCY=str(args.workers)
+    )
+    log = open(os.path.join(workdir, 'app.log'), 'w')
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'src.main:app'],
+        cwd=REPO_ROOT, env=env, stdout=log, stderr=subprocess.STDOUT
+    )
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"App exited during startup, see {log.name}")
+        try:
+            if requests.get(f'http://127.0.0.1:{port}/health', timeout=1).ok:
+                return process
+        except requests.RequestException:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("App did not become healthy within 30s")
+
+
+def drive(url, duration, concurrency):
+    """Hit url from `concurrency` closed-loop clients for `duration` seconds"""
+    latencies = []
+    errors = [0]
+    lock = threading.Lock()
+    stop_at = time.monotonic() + duration
+
+    def client():
+        session = requests.Session()
+        local = []
+        local_errors = 0
+        while time.monotonic() < stop_at:
+            started = time.perf_counter()
+            try:
+                response = session.get(url, timeout=30)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            local.append(time.perf_counter() - started)
+            local_errors += failed
+        with lock:
+            latencies.extend(local)
+            errors[0] += local_errors
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    started = time.monotonic()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return sorted(latencies), errors[0], time.monotonic() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--endpoints', nargs='+', default=DEFAULT_ENDPOINTS)
+    parser.add_argument('--duration', type=float, default=15, help='seconds of load per endpoint')
+    parser.add_argument('--warmup', type=float, default=2, help='seconds of unmeasured load per endpoint')
+    parser.add_argument('--concurrency', type=int, default=20)
+    parser.add_argument('--latency-ms', type=float, default=150, help='injected upstream latency')
+    parser.add_argument('--jitter-ms', type=float, default=50)
+    parser.add_argument('--error-rate', type=float, default=0.0, help='fraction of upstream calls that fail')
+    parser.add_argument('--error-status', type=int, default=500)
+    parser.add_argument('--coins', type=int, default=1000)
+    parser.add_argument('--rate-limit', type=int, default=100000, help='RATE_LIMIT_PER_MINUTE for the app')
+    parser.add_argument('--server-mode', choices=['async', 'sync'], default='async')
+    parser.add_argument('--workers', type=int, default=1)
+    parser.add_argument('--app-port', type=int, default=5099)
+    parser.add_argument('--app-url', help='benchmark an already running app instead of starting one')
+    parser.add_argument('--json', help='write results to this file')
+    parser.add_argument('--max-p99-ms', type=float, help='fail if any endpoint p99 exceeds this')
+    parser.add_argument('--max-error-rate', type=float, help='fail if any endpoint error rate exceeds this')
+    args = parser.parse_args()
+
+    upstream = start_server(
+        coins=args.coins, latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate, error_status=args.error_status
+    )
+    upstream_url = f'http://127.0.0.1:{upstream.server_address[1]}/api/v3'
+
+    workdir = tempfile.mkdtemp(prefix='traderdan-bench-')
+    process = None
+    base_url = args.app_url
+    if base_url is None:
+        process = start_app(args.app_port, upstream_url, args, workdir)
+        base_url = f'http://127.0.0.1:{args.app_port}'
+
+    results = []
+    try:
+        for endpoint in args.endpoints:
+            url = base_url + endpoint
+            if args.warmup:
+                drive(url, args.warmup, args.concurrency)
+            upstream.reset()
+            latencies, errors, elapsed = drive(url, args.duration, args.concurrency)
+            total = len(latencies)
+            results.append({
+                'endpoint': endpoint,
+                'requests': total,
+                'errors': errors,
+                'error_rate': round(errors / total, 4) if total else 0,
+                'throughput_rps': round(total / elapsed, 1),
+                'p50_ms': round(percentile(latencies, 50) * 1000, 1),
+                'p90_ms': round(percentile(latencies, 90) * 1000, 1),
+                'p99_ms': round(percentile(latencies, 99) * 1000, 1),
+                'max_ms': round(latencies[-1] * 1000, 1) if latencies else 0,
+                'upstream_calls': sum(upstream.call_counts().values()),
+                'upstream_by_endpoint': upstream.call_counts()
+            })
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait(timeout=10)
+        upstream.shutdown()
+
+    print(f"{'endpoint':<40}{'req':>8}{'err':>6}{'rps':>9}{'p50':>9}{'p90':>9}{'p99':>9}{'max':>9}{'upstream':>10}")
+    for row in results:
+        print(
+            f"{row['endpoint']:<40}{row['requests']:>8}{row['errors']:>6}{row['throughput_rps']:>9}"
+            f"{row['p50_ms']:>9}{row['p90_ms']:>9}{row['p99_ms']:>9}{row['max_ms']:>9}{row['upstream_calls']:>10}"
+        )
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({'config': vars(args), 'results': results}, f, indent=2)
+
+    failed = [
+        row['endpoint'] for row in results
+        if (args.max_p99_ms is not None and row['p99_ms'] > args.max_p99_ms)
+        or (args.max_error_rate is not None and row['error_rate'] > args.max_error_rate)
+    ]
+    if failed:
+        print(f"Performance budget exceeded: {', '.join(failed)}")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
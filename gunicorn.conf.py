@@ -0,0 +1,25 @@
+import os
+import tempfile
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+timeout = int(os.environ.get('WORKER_TIMEOUT', 60))
+
+# Several workers share market data and snapshots through one store so only
+# the leader worker refreshes from CoinGecko. Defaults to files on tmpfs;
+# set SHARED_CACHE_URL=redis://... to share across hosts.
+if workers > 1:
+    os.environ.setdefault('SHARED_CACHE_URL', 'file://' + os.path.join(
+        '/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'traderdan-cache'
+    ))
+
+# SERVER_MODE=async runs each worker on gevent: blocking CoinGecko calls yield
+# to other requests, so one process holds hundreds of in-flight requests.
+# SERVER_MODE=sync falls back to a fixed pool of threads per worker.
+server_mode = os.environ.get('SERVER_MODE', 'async')
+if server_mode == 'async':
+    worker_class = 'gevent'
+    worker_connections = int(os.environ.get('WORKER_CONNECTIONS', 1000))
+else:
+    worker_class = 'gthread'
+    threads = int(os.environ.get('WORKER_THREADS', 8))
@@ -1,24 +1,105 @@
+import logging
 import os
 import sys
+import time
 # DON'T CHANGE THIS !!!
 sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
 
-from flask import Flask, send_from_directory
+from flask import Flask, Response, g, request, send_from_directory
 from flask_cors import CORS
+from src.models.user import db
+from src.routes.analytics import analytics_bp
 from src.routes.crypto import crypto_bp
 from src.routes.reports import reports_bp
 from src.routes.opportunities import opportunities_bp
+from src.routes.stream import stream_bp
+from src.routes.user import USER_API_TOKEN, user_bp
+from src.services.metrics import registry, request_latency
+from src.services.snapshots import BACKGROUND_JOBS_ENABLED, WARMUP_ON_START, snapshot_scheduler
+
+logging.basicConfig(level=os.environ.get('LOG_LEVEL', 'INFO'), format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+
+# Set SERVER_TIMING=true to report per-stage timings to browsers
+SERVER_TIMING_ENABLED = os.environ.get('SERVER_TIMING', 'false').lower() == 'true'
 
 app = Flask(__name__, static_folder=os.path.join(os.path.dirname(__file__), 'static'))
 app.config['SECRET_KEY'] = 'crypto_trading_dashboard_secret_key_2025'
 
-# Enable CORS for all routes
-CORS(app)
+# Database (local price history, signal history and any future models)
+database_dir = os.path.join(os.path.dirname(__file__), 'database')
+os.makedirs(database_dir, exist_ok=True)
+app.config['SQLALCHEMY_DATABASE_URI'] = os.environ.get(
+    'DATABASE_URL', f"sqlite:///{os.path.join(database_dir, 'app.db')}"
+)
+app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+# Pooled connections for server databases (e.g. mysql+pymysql://...); SQLite
+# keeps SQLAlchemy's default pool. Recycle below MySQL's idle timeout.
+app.config['SQLALCHEMY_ENGINE_OPTIONS'] = {'pool_pre_ping': True}
+if not app.config['SQLALCHEMY_DATABASE_URI'].startswith('sqlite'):
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'].update(
+        pool_size=int(os.environ.get('DB_POOL_SIZE', 10)),
+        max_overflow=int(os.environ.get('DB_MAX_OVERFLOW', 20)),
+        pool_timeout=int(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        pool_recycle=int(os.environ.get('DB_POOL_RECYCLE', 280))
+    )
+db.init_app(app)
+
+# Enable CORS for all routes; the user API only answers the configured
+# front ends (CORS_ORIGINS, comma separated) and no other origin
+CORS_ORIGINS = [origin.strip() for origin in os.environ.get('CORS_ORIGINS', '').split(',') if origin.strip()]
+CORS(app, resources={r'/api/users.*': {'origins': CORS_ORIGINS}, r'^(?!/api/users).*': {'origins': '*'}})
 
 # Register blueprints
 app.register_blueprint(crypto_bp, url_prefix='/api/crypto')
 app.register_blueprint(reports_bp, url_prefix='/api/reports')
 app.register_blueprint(opportunities_bp, url_prefix='/api/opportunities')
+app.register_blueprint(stream_bp, url_prefix='/api/stream')
+app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+# The user API is for operators only: mounted when USER_API_TOKEN is set,
+# and every call must send it as a bearer token
+if USER_API_TOKEN:
+    app.register_blueprint(user_bp, url_prefix='/api')
+
+with app.app_context():
+    db.create_all()
+
+# Background snapshot jobs start with the first request, so importing the app
+# (or the debug reloader's parent process) does not spawn upstream pollers,
+# unless warm-up is requested
+snapshot_scheduler.init_app(app)
+if WARMUP_ON_START:
+    if BACKGROUND_JOBS_ENABLED:
+        snapshot_scheduler.start(app)
+    else:
+        snapshot_scheduler.warm_up()
+
+@app.before_request
+def start_background_jobs():
+    if BACKGROUND_JOBS_ENABLED and not snapshot_scheduler.running:
+        snapshot_scheduler.start(app)
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.server_timing = []
+
+@app.after_request
+def record_request_timing(response):
+    if 'request_started' not in g:
+        return response
+    duration = time.perf_counter() - g.request_started
+    route = request.url_rule.rule if request.url_rule else 'unmatched'
+    request_latency.observe(duration, route=route, method=request.method, status=response.status_code)
+
+    if SERVER_TIMING_ENABLED:
+        stages = [f"{name};dur={elapsed * 1000:.1f}" for name, elapsed in g.server_timing]
+        stages.append(f"total;dur={duration * 1000:.1f}")
+        response.headers['Server-Timing'] = ', '.join(stages)
+    return response
+
+@app.route('/metrics')
+def metrics():
+    return Response(registry.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/', defaults={'path': ''})
 @app.route('/<path:path>')
@@ -40,6 +121,13 @@ def serve(path):
 def health_check():
     return {"status": "healthy", "service": "crypto-trading-api"}, 200
 
+@app.route('/ready')
+def readiness_check():
+    pending = snapshot_scheduler.pending() if WARMUP_ON_START else []
+    if pending:
+        return {"status": "warming_up", "pending": pending}, 503
+    return {"status": "ready", "pending": []}, 200
+
 if __name__ == '__main__':
     app.run(host='0.0.0.0', port=5000, debug=True)
 
@@ -0,0 +1,17 @@
+from src.models.user import db
+
+
+class BacktestRun(db.Model):
+    """One completed nightly backtest, kept so restarts serve it instead of re-running"""
+    __tablename__ = 'backtest_runs'
+    __table_args__ = (
+        db.Index('ix_backtest_runs_completed', 'completed_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    completed_at = db.Column(db.BigInteger, nullable=False)  # milliseconds since epoch
+    coins = db.Column(db.Integer, nullable=False)
+    result = db.Column(db.JSON, nullable=False)
+
+    def __repr__(self):
+        return f'<BacktestRun {self.completed_at}>'
@@ -0,0 +1,24 @@
+from src.models.user import db
+
+class PricePoint(db.Model):
+    __tablename__ = 'price_history'
+
+    coin_id = db.Column(db.String(100), primary_key=True)
+    resolution = db.Column(db.String(10), primary_key=True)
+    timestamp = db.Column(db.BigInteger, primary_key=True)  # milliseconds since epoch
+    price = db.Column(db.Float, nullable=False)
+    market_cap = db.Column(db.Float)
+    volume = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<PricePoint {self.coin_id} {self.resolution} {self.timestamp}>'
+
+    def to_dict(self):
+        return {
+            'coin_id': self.coin_id,
+            'resolution': self.resolution,
+            'timestamp': self.timestamp,
+            'price': self.price,
+            'market_cap': self.market_cap,
+            'volume': self.volume
+        }
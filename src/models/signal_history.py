@@ -0,0 +1,113 @@
+from src.models.user import db
+
+# Kinds of stored signals; picks are the sale-of-the-day opportunities
+SIGNAL_KINDS = ('pick', 'volume_anomaly', 'momentum')
+
+
+class PickRecord(db.Model):
+    __tablename__ = 'pick_history'
+    __table_args__ = (
+        db.Index('ix_pick_history_coin_recorded', 'coin_id', 'recorded_at'),
+        db.Index('ix_pick_history_recorded', 'recorded_at'),
+        db.Index('ix_pick_history_open', 'outcome', 'recorded_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    recorded_at = db.Column(db.BigInteger, nullable=False)  # milliseconds since epoch
+    coin_id = db.Column(db.String(100), nullable=False)
+    symbol = db.Column(db.String(20))
+    risk_level = db.Column(db.String(10), nullable=False)
+    confidence = db.Column(db.Integer, nullable=False)
+    value_score = db.Column(db.Integer)
+    price = db.Column(db.Float, nullable=False)
+    entry_point = db.Column(db.Float)
+    exit_point = db.Column(db.Float)
+    price_target = db.Column(db.Float)
+    stop_loss = db.Column(db.Float)
+    # Open picks have no outcome; closed ones are 'target', 'stop' or 'expired'
+    outcome = db.Column(db.String(10))
+    closed_at = db.Column(db.BigInteger)
+    return_pct = db.Column(db.Float)
+
+    def __repr__(self):
+        return f'<PickRecord {self.coin_id} {self.recorded_at}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'recorded_at': self.recorded_at,
+            'coin_id': self.coin_id,
+            'symbol': self.symbol,
+            'risk_level': self.risk_level,
+            'confidence': self.confidence,
+            'value_score': self.value_score,
+            'price': self.price,
+            'entry_point': self.entry_point,
+            'exit_point': self.exit_point,
+            'price_target': self.price_target,
+            'stop_loss': self.stop_loss,
+            'outcome': self.outcome,
+            'closed_at': self.closed_at,
+            'return_pct': self.return_pct
+        }
+
+
+class SignalRecord(db.Model):
+    __tablename__ = 'signal_history'
+    __table_args__ = (
+        db.Index('ix_signal_history_kind_recorded', 'kind', 'recorded_at'),
+        db.Index('ix_signal_history_coin_recorded', 'coin_id', 'recorded_at'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)
+    recorded_at = db.Column(db.BigInteger, nullable=False)  # milliseconds since epoch
+    coin_id = db.Column(db.String(100), nullable=False)
+    price = db.Column(db.Float)
+    strength = db.Column(db.Float)
+    details = db.Column(db.JSON)
+
+    def __repr__(self):
+        return f'<SignalRecord {self.kind} {self.coin_id} {self.recorded_at}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'kind': self.kind,
+            'recorded_at': self.recorded_at,
+            'coin_id': self.coin_id,
+            'price': self.price,
+            'strength': self.strength,
+            'details': self.details
+        }
+
+
+class DailySignalRollup(db.Model):
+    """Per day, kind and risk level totals, kept current as signals are stored and picks close"""
+    __tablename__ = 'signal_daily_rollup'
+
+    day = db.Column(db.Date, primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    risk_level = db.Column(db.String(10), primary_key=True)  # '' for signals without one
+    signals = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0)
+    closed = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    return_sum = db.Column(db.Float, nullable=False, default=0)
+
+
+class CoinSignalRollup(db.Model):
+    """Lifetime per coin and kind totals behind the leaderboard"""
+    __tablename__ = 'signal_coin_rollup'
+    __table_args__ = (
+        db.Index('ix_signal_coin_rollup_kind', 'kind'),
+    )
+
+    coin_id = db.Column(db.String(100), primary_key=True)
+    kind = db.Column(db.String(20), primary_key=True)
+    signals = db.Column(db.Integer, nullable=False, default=0)
+    confidence_sum = db.Column(db.Float, nullable=False, default=0)
+    closed = db.Column(db.Integer, nullable=False, default=0)
+    wins = db.Column(db.Integer, nullable=False, default=0)
+    return_sum = db.Column(db.Float, nullable=False, default=0)
+    last_recorded_at = db.Column(db.BigInteger)
@@ -0,0 +1,111 @@
+from flask import Blueprint, jsonify, request
+import os
+from src.models.signal_history import SIGNAL_KINDS
+from src.services.http_cache import cached_response
+from src.services.market_data import coingecko_client
+from src.services.signal_history import LEADERBOARD_SORTS, SignalRecorder, coin_history, leaderboard, performance
+from src.services.snapshots import SNAPSHOT_INTERVALS, snapshot_scheduler, snapshot_version
+
+analytics_bp = Blueprint('analytics', __name__)
+
+MAX_HISTORY_DAYS = 365
+MAX_ROWS = 100
+
+# Store new picks and signals after each scan and close picks as prices move;
+# only the scheduled job records, the views below read the stored rollups
+signal_recorder = SignalRecorder(
+    snapshot_scheduler,
+    coingecko_client,
+    picks_per_scan=int(os.environ.get('PICK_HISTORY_SIZE', 10)),
+    universe_size=int(os.environ.get('SWING_UNIVERSE_SIZE', 250))
+)
+snapshot_scheduler.register('signal_history', signal_recorder.record, SNAPSHOT_INTERVALS['signal_history'], warm=False)
+
+def _kind(default='pick'):
+    kind = request.args.get('kind', default)
+    if kind not in SIGNAL_KINDS:
+        raise ValueError(f"Invalid kind. Use one of: {', '.join(SIGNAL_KINDS)}")
+    return kind
+
+def _bounded(name, default, upper):
+    value = request.args.get(name, default, type=int)
+    if value is None or not 1 <= value <= upper:
+        raise ValueError(f"{name} must be between 1 and {upper}")
+    return value
+
+@analytics_bp.route('/performance', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('signal_history'))
+def get_performance():
+    """Get win rate and average return of stored picks or signal counts, by risk level and day"""
+    try:
+        kind = _kind()
+        days = _bounded('days', 30, MAX_HISTORY_DAYS)
+        return jsonify({
+            "success": True,
+            "data": performance(kind, days)
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@analytics_bp.route('/leaderboard', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('signal_history'))
+def get_leaderboard():
+    """Get coins ranked by pick win rate, average return or signal count"""
+    try:
+        kind = _kind()
+        limit = _bounded('limit', 20, MAX_ROWS)
+        sort = request.args.get('sort')
+        if sort is not None and sort not in LEADERBOARD_SORTS:
+            raise ValueError(f"Invalid sort. Use one of: {', '.join(LEADERBOARD_SORTS)}")
+        min_closed = request.args.get('min_closed', type=int)
+        return jsonify({
+            "success": True,
+            "data": leaderboard(kind, limit, sort, min_closed)
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@analytics_bp.route('/history/<coin_id>', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('signal_history'))
+def get_coin_history(coin_id):
+    """Get stored picks or signals for one coin, newest first"""
+    try:
+        kind = _kind()
+        limit = _bounded('limit', 50, MAX_ROWS)
+        before = request.args.get('before', type=int)
+        records = coin_history(coin_id, kind, limit, before)
+        return jsonify({
+            "success": True,
+            "data": {
+                "coin_id": coin_id,
+                "kind": kind,
+                "records": records,
+                "next_before": records[-1]['recorded_at'] if len(records) == limit else None
+            }
+        }), 200
+    except ValueError as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
@@ -1,25 +1,88 @@
-from flask import Blueprint, jsonify, request
-import requests
-import sys
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+import base64
+import binascii
+import json
 import os
+from collections import namedtuple
+from src.services.history_fetcher import iter_markets
+from src.services.http_cache import cached_response
+from src.services.market_data import coingecko_client, market_cache, upstream_client
+from src.services.snapshots import SNAPSHOT_INTERVALS, snapshot_data, snapshot_scheduler, snapshot_version
+from src.services.table import IndexedTable, TableQueryError, parse_fields, parse_list_query, project
 
-# Add the crypto trading system to the path
-sys.path.append('/home/ubuntu/crypto_trading_system/src')
+crypto_bp = Blueprint('crypto', __name__)
 
-from coingecko_client import CoinGeckoClient
-from market_analyzer import MarketAnalyzer
+# Most coins returned in one JSON page and in one NDJSON stream
+MAX_PAGE_LIMIT = 250
+MAX_STREAM_LIMIT = 10000
 
-crypto_bp = Blueprint('crypto', __name__)
+# Sorted and filtered top-coins queries are answered from this many coins
+MARKET_TABLE_SIZE = int(os.environ.get('MARKET_TABLE_SIZE', 1000))
+
+COIN_FIELDS = ('id', 'name', 'symbol', 'price', 'change24h', 'marketCap', 'volume', 'rank')
+
+# Compact tuple row for coins held in the market table snapshot
+CoinRow = namedtuple('CoinRow', COIN_FIELDS)
+
+# Query filter names (min_<name>/max_<name>) and the columns they range over
+COIN_FILTERS = {
+    'rank': 'rank',
+    'price': 'price',
+    'market_cap': 'marketCap',
+    'volume': 'volume',
+    'change24h': 'change24h'
+}
 
-# Initialize clients
-coingecko_client = CoinGeckoClient()
-market_analyzer = MarketAnalyzer(coingecko_client)
+class InvalidCursor(ValueError):
+    pass
+
+def _encode_cursor(offset):
+    return base64.urlsafe_b64encode(f"o:{offset}".encode()).decode().rstrip('=')
+
+def _decode_cursor(cursor):
+    """Return the rank offset encoded in an opaque cursor"""
+    try:
+        prefix, offset = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode().split(':')
+        offset = int(offset)
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise InvalidCursor("Invalid cursor")
+    if prefix != 'o' or offset < 0:
+        raise InvalidCursor("Invalid cursor")
+    return offset
+
+def _format_coin(coin):
+    return {
+        'id': coin['id'],
+        'name': coin['name'],
+        'symbol': coin['symbol'].upper(),
+        'price': coin['current_price'],
+        'change24h': coin['price_change_percentage_24h'],
+        'marketCap': coin['market_cap'],
+        'volume': coin['total_volume'],
+        'rank': coin['market_cap_rank']
+    }
+
+def _stream_coins(coins, fields):
+    """Yield one JSON line per coin as upstream pages arrive"""
+    try:
+        for coin in coins:
+            yield json.dumps(project(coin, fields), separators=(',', ':')) + '\n'
+    except Exception as e:
+        yield json.dumps({"error": str(e)}) + '\n'
+
+def build_market_table():
+    """Index the top MARKET_TABLE_SIZE coins for sorted and filtered queries"""
+    coins = [CoinRow(**_format_coin(coin)) for coin in iter_markets(coingecko_client, limit=MARKET_TABLE_SIZE)]
+    return IndexedTable(coins, {column: [getattr(coin, column) for coin in coins] for column in COIN_FILTERS.values()})
+
+snapshot_scheduler.register('market_table', build_market_table, SNAPSHOT_INTERVALS['market_table'])
 
 @crypto_bp.route('/market-overview', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('global_overview'))
 def get_market_overview():
     """Get global market overview data"""
     try:
-        overview = market_analyzer.get_global_market_overview()
+        overview = snapshot_data('global_overview')
         return jsonify({
             "success": True,
             "data": overview
@@ -31,30 +94,49 @@ def get_market_overview():
         }), 500
 
 @crypto_bp.route('/top-coins', methods=['GET'])
+@cached_response(max_age=30, stale_while_revalidate=60)
 def get_top_coins():
-    """Get top cryptocurrencies by market cap"""
+    """Get top cryptocurrencies by market cap, one cursor page or an NDJSON stream"""
     try:
-        limit = request.args.get('limit', 15, type=int)
-        coins = coingecko_client.get_coins_markets(vs_currency='usd', per_page=limit, page=1)
-        
+        offset = _decode_cursor(request.args['cursor']) if 'cursor' in request.args else 0
+        stream = request.args.get('format') == 'ndjson'
+        limit = request.args.get('limit', MAX_STREAM_LIMIT if stream else 15, type=int)
+        limit = max(1, min(limit, MAX_STREAM_LIMIT if stream else MAX_PAGE_LIMIT))
+        query = parse_list_query(request.args, COIN_FILTERS)
+        fields = parse_fields(request.args, COIN_FIELDS)
+
+        if query['sort'] or query['ranges']:
+            # Sorted or filtered lists come from the latest market table snapshot
+            total, rows = snapshot_data('market_table').query(offset=offset, limit=limit, **query)
+            coins = [row._asdict() for row in rows]
+            has_more = offset + len(coins) < total
+        else:
+            coins = (_format_coin(coin) for coin in iter_markets(coingecko_client, offset=offset, limit=limit))
+            has_more = None
+
+        if stream:
+            # Markets pages fetched while streaming are still interactive calls
+            return Response(
+                stream_with_context(_stream_coins(coins, fields)),
+                mimetype='application/x-ndjson',
+                headers={'X-Accel-Buffering': 'no'}
+            )
+
         # Format the data for frontend
-        formatted_coins = []
-        for coin in coins:
-            formatted_coins.append({
-                'id': coin['id'],
-                'name': coin['name'],
-                'symbol': coin['symbol'].upper(),
-                'price': coin['current_price'],
-                'change24h': coin['price_change_percentage_24h'],
-                'marketCap': coin['market_cap'],
-                'volume': coin['total_volume'],
-                'rank': coin['market_cap_rank']
-            })
-        
+        formatted_coins = [project(coin, fields) for coin in coins]
+        if has_more is None:
+            has_more = len(formatted_coins) == limit
+
         return jsonify({
             "success": True,
-            "data": formatted_coins
+            "data": formatted_coins,
+            "next_cursor": _encode_cursor(offset + limit) if has_more else None
         }), 200
+    except (InvalidCursor, TableQueryError) as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 400
     except Exception as e:
         return jsonify({
             "success": False,
@@ -62,10 +144,11 @@ def get_top_coins():
         }), 500
 
 @crypto_bp.route('/trending', methods=['GET'])
+@cached_response(max_age=120, version=snapshot_version('trending'))
 def get_trending():
     """Get trending cryptocurrencies"""
     try:
-        trending = market_analyzer.get_trending_coins()
+        trending = snapshot_data('trending')
         return jsonify({
             "success": True,
             "data": trending
@@ -77,10 +160,11 @@ def get_trending():
         }), 500
 
 @crypto_bp.route('/volume-anomalies', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('volume_anomalies'))
 def get_volume_anomalies():
     """Get volume anomaly signals"""
     try:
-        anomalies = market_analyzer.scan_volume_anomalies()
+        anomalies = snapshot_data('volume_anomalies')
         return jsonify({
             "success": True,
             "data": anomalies
@@ -91,7 +175,24 @@ def get_volume_anomalies():
             "error": str(e)
         }), 500
 
+@crypto_bp.route('/market-signals', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('market_signals'))
+def get_market_signals():
+    """Get volume anomalies and momentum signals scanned across the whole coin universe"""
+    try:
+        signals = snapshot_data('market_signals')
+        return jsonify({
+            "success": True,
+            "data": signals
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
 @crypto_bp.route('/sentiment', methods=['GET'])
+@cached_response(max_age=300)
 def get_market_sentiment():
     """Get market sentiment data (mock for now, will integrate CoinDesk later)"""
     try:
@@ -125,3 +226,23 @@ def get_market_sentiment():
             "error": str(e)
         }), 500
 
+@crypto_bp.route('/cache-stats', methods=['GET'])
+def get_cache_stats():
+    """Get hit/miss counters for the shared market data cache"""
+    return jsonify({
+        "success": True,
+        "data": market_cache.stats()
+    }), 200
+
+@crypto_bp.route('/upstream-stats', methods=['GET'])
+def get_upstream_stats():
+    """Get CoinGecko latency, error rates, circuit breaker state and rate limit queue"""
+    return jsonify({
+        "success": True,
+        "data": {
+            "circuit": upstream_client.breaker.status(),
+            "methods": upstream_client.stats.snapshot(),
+            "rate_limit_tokens": upstream_client.rate_limiter.available(),
+            "queue_depth": upstream_client.rate_limiter.queue_depth()
+        }
+    }), 200
@@ -1,42 +1,67 @@
 from flask import Blueprint, jsonify, request
-import sys
+import logging
+import math
 import os
-from datetime import datetime
+from src.services.concurrency import gather_sections
+from src.services.http_cache import cached_response
+from src.services.history_fetcher import fetch_top_coin_ids
+from src.services.indicators import group_by_length, latest_indicators
+from src.services.live_indicators import LiveIndicatorFeed
+from src.services.market_data import coingecko_client, price_store
+from src.services.metrics import timed_stage
+from src.services.snapshots import SNAPSHOT_INTERVALS, snapshot_data, snapshot_scheduler, snapshot_time, snapshot_version
 
-# Add the crypto trading system to the path
-sys.path.append('/home/ubuntu/crypto_trading_system/src')
+reports_bp = Blueprint('reports', __name__)
+logger = logging.getLogger(__name__)
 
-from market_analyzer import MarketAnalyzer
-from coingecko_client import CoinGeckoClient
+# Coins analyzed when no ?coins= or ?limit= is given
+DEFAULT_TECHNICAL_COINS = ['bitcoin', 'ethereum', 'solana', 'polkadot', 'cardano']
+MAX_TECHNICAL_COINS = 500
 
-reports_bp = Blueprint('reports', __name__)
+# Indicators for the top coins are kept current from live prices; other
+# coins are computed from stored history on request
+live_indicators = LiveIndicatorFeed(
+    coingecko_client,
+    price_store,
+    coins=int(os.environ.get('LIVE_INDICATOR_COINS', 250)),
+    seed_batch=int(os.environ.get('LIVE_INDICATOR_SEED_BATCH', 20))
+)
+snapshot_scheduler.register('live_indicators', live_indicators.refresh, SNAPSHOT_INTERVALS['live_indicators'])
 
-# Initialize components
-coingecko_client = CoinGeckoClient()
-market_analyzer = MarketAnalyzer(coingecko_client)
+# Per-section timeouts (seconds) for the daily report fan-out
+SECTION_TIMEOUTS = {
+    'global_overview': 8,
+    'trending': 8,
+    'volume_anomalies': 10,
+    'momentum_signals': 10,
+    'category_performance': 12
+}
 
 @reports_bp.route('/daily', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version(*SECTION_TIMEOUTS))
 def generate_daily_report():
     """Generate comprehensive daily trading report"""
     try:
-        # Get global market overview
-        global_overview = market_analyzer.get_global_market_overview()
-        
-        # Get trending analysis
-        trending = market_analyzer.get_trending_coins()
-        
-        # Get volume anomalies
-        volume_anomalies = market_analyzer.scan_volume_anomalies()
-        
-        # Get momentum signals
-        momentum_signals = market_analyzer.scan_momentum_signals()
-        
-        # Get category performance
-        category_performance = market_analyzer.analyze_category_performance()
+        # Read the precomputed sections; any cold section is computed concurrently
+        with timed_stage('sections'):
+            sections, errors = gather_sections({
+                name: (lambda name=name: snapshot_data(name), timeout)
+                for name, timeout in SECTION_TIMEOUTS.items()
+            })
+
+        if not sections:
+            raise RuntimeError(f"All report sections failed: {errors}")
+
+        # Fall back to empty sections for anything that failed
+        global_overview = sections.get('global_overview') or {}
+        trending = sections.get('trending') or []
+        volume_anomalies = sections.get('volume_anomalies') or []
+        momentum_signals = sections.get('momentum_signals') or []
+        category_performance = sections.get('category_performance') or {}
         
         # Compile report data
         report_data = {
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": snapshot_time(*SECTION_TIMEOUTS),
             "global_overview": global_overview,
             "trending_analysis": trending,
             "volume_anomalies": volume_anomalies,
@@ -50,7 +75,9 @@ def generate_daily_report():
                 "anomalies_count": len(volume_anomalies),
                 "momentum_signals_count": len(momentum_signals),
                 "trending_count": len(trending)
-            }
+            },
+            "partial": bool(errors),
+            "errors": errors
         }
         
         return jsonify({
@@ -64,61 +91,74 @@ def generate_daily_report():
             "error": str(e)
         }), 500
 
+def _finite(value):
+    """Convert a NumPy scalar to a JSON-safe float"""
+    value = float(value)
+    return value if math.isfinite(value) else None
+
+def _format_technical(coin_id, values):
+    """Format one coin's latest indicator values for the frontend"""
+    current_price = _finite(values['current_price'])
+    first_price = _finite(values['first_price'])
+    return {
+        'coin_id': coin_id,
+        'current_price': current_price,
+        'rsi_14d': _finite(values['rsi']),
+        'support_level': _finite(values['support'] * 1.02),
+        'resistance_level': _finite(values['resistance'] * 0.98),
+        'price_change_30d': ((current_price - first_price) / first_price) * 100 if first_price else 0,
+        'indicators': {
+            'ema_12': _finite(values['ema_12']),
+            'ema_26': _finite(values['ema_26']),
+            'sma_50': _finite(values['sma_50']),
+            'macd': _finite(values['macd']),
+            'macd_signal': _finite(values['macd_signal']),
+            'macd_histogram': _finite(values['macd_histogram']),
+            'bollinger_upper': _finite(values['bollinger_upper']),
+            'bollinger_middle': _finite(values['bollinger_middle']),
+            'bollinger_lower': _finite(values['bollinger_lower']),
+            'atr_14': _finite(values['atr'])
+        }
+    }
+
 @reports_bp.route('/technical-analysis', methods=['GET'])
+@cached_response(max_age=120, stale_while_revalidate=300)
 def get_technical_analysis():
     """Get technical analysis for major cryptocurrencies"""
     try:
-        # Get top coins for technical analysis
-        top_coins = ['bitcoin', 'ethereum', 'solana', 'polkadot', 'cardano']
-        technical_data = []
+        # Coins can be requested explicitly or as the top N by market cap
+        coins_param = request.args.get('coins', '')
+        limit = request.args.get('limit', type=int)
+        if coins_param:
+            top_coins = [coin_id.strip() for coin_id in coins_param.split(',') if coin_id.strip()]
+        elif limit:
+            top_coins = fetch_top_coin_ids(coingecko_client, min(limit, MAX_TECHNICAL_COINS))
+        else:
+            top_coins = DEFAULT_TECHNICAL_COINS
+        top_coins = top_coins[:MAX_TECHNICAL_COINS]
+        
+        # Coins tracked by the live indicator feed need no history or math here
+        live = snapshot_scheduler.get('live_indicators')
+        live_values = live.data['coins'] if live else {}
+        analyzed = {coin_id: _format_technical(coin_id, live_values[coin_id]) for coin_id in top_coins if coin_id in live_values}
+        remaining = [coin_id for coin_id in top_coins if coin_id not in analyzed]
+        
+        # Get historical data from the local store, fetching only missing points
+        with timed_stage('history'):
+            histories, fetch_errors = price_store.get_histories(remaining, days=30) if remaining else ({}, {})
+        for coin_id, coin_error in fetch_errors.items():
+            logger.warning("Error analyzing %s: %s", coin_id, coin_error)
         
-        for coin_id in top_coins:
-            try:
-                # Get historical data for technical analysis
-                historical_data = coingecko_client.get_coin_market_chart(
-                    coin_id, vs_currency='usd', days=30
-                )
-                
-                if historical_data and 'prices' in historical_data:
-                    prices = [price[1] for price in historical_data['prices']]
-                    current_price = prices[-1] if prices else 0
-                    
-                    # Calculate basic technical indicators
-                    if len(prices) >= 14:
-                        # Simple RSI calculation
-                        gains = []
-                        losses = []
-                        for i in range(1, len(prices)):
-                            change = prices[i] - prices[i-1]
-                            if change > 0:
-                                gains.append(change)
-                                losses.append(0)
-                            else:
-                                gains.append(0)
-                                losses.append(abs(change))
-                        
-                        avg_gain = sum(gains[-14:]) / 14
-                        avg_loss = sum(losses[-14:]) / 14
-                        rs = avg_gain / avg_loss if avg_loss != 0 else 0
-                        rsi = 100 - (100 / (1 + rs))
-                        
-                        # Support and resistance levels
-                        recent_prices = prices[-30:]
-                        support_level = min(recent_prices) * 1.02
-                        resistance_level = max(recent_prices) * 0.98
-                        
-                        technical_data.append({
-                            'coin_id': coin_id,
-                            'current_price': current_price,
-                            'rsi_14d': rsi,
-                            'support_level': support_level,
-                            'resistance_level': resistance_level,
-                            'price_change_30d': ((current_price - prices[0]) / prices[0]) * 100 if prices[0] != 0 else 0
-                        })
-                        
-            except Exception as coin_error:
-                print(f"Error analyzing {coin_id}: {coin_error}")
-                continue
+        series_by_coin = {coin_id: history['prices'] for coin_id, history in histories.items()}
+        
+        # Compute indicators for all coins at once, batched by series length
+        with timed_stage('indicators'):
+            for coin_ids, closes in group_by_length(series_by_coin, min_length=15):
+                latest = latest_indicators(closes)
+                for row, coin_id in enumerate(coin_ids):
+                    analyzed[coin_id] = _format_technical(coin_id, {name: values[row] for name, values in latest.items()})
+        
+        technical_data = [analyzed[coin_id] for coin_id in top_coins if coin_id in analyzed]
         
         return jsonify({
             "success": True,
@@ -132,11 +172,12 @@ def get_technical_analysis():
         }), 500
 
 @reports_bp.route('/market-summary', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('global_overview', 'volume_anomalies'))
 def get_market_summary():
     """Get condensed market summary"""
     try:
-        global_overview = market_analyzer.get_global_market_overview()
-        volume_anomalies = market_analyzer.scan_volume_anomalies()
+        global_overview = snapshot_data('global_overview')
+        volume_anomalies = snapshot_data('volume_anomalies')
         
         summary = {
             "market_cap": global_overview.get('total_market_cap', 0),
@@ -144,7 +185,7 @@ def get_market_summary():
             "btc_dominance": global_overview.get('btc_dominance', 0),
             "sentiment": global_overview.get('market_sentiment', 'NEUTRAL'),
             "anomalies_detected": len(volume_anomalies),
-            "last_updated": datetime.now().isoformat()
+            "last_updated": snapshot_time('global_overview', 'volume_anomalies')
         }
         
         return jsonify({
@@ -158,3 +199,25 @@ def get_market_summary():
             "error": str(e)
         }), 500
 
+@reports_bp.route('/categories', methods=['GET'])
+@cached_response(max_age=60, version=snapshot_version('category_aggregates'))
+def get_category_performance():
+    """Get market-cap-weighted return, volume share and dispersion per category"""
+    try:
+        return jsonify({
+            "success": True,
+            "data": snapshot_data('category_aggregates')
+        }), 200
+    except Exception as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 500
+
+@reports_bp.route('/snapshots', methods=['GET'])
+def get_snapshot_status():
+    """Get version, age and error state of the background snapshots"""
+    return jsonify({
+        "success": True,
+        "data": snapshot_scheduler.status()
+    }), 200
@@ -0,0 +1,83 @@
+from flask import Blueprint, Response, jsonify
+import os
+import queue
+from src.services.market_data import COINGECKO_CACHE_POLICIES, coingecko_client
+from src.services.metrics import registry
+from src.services.price_feed import FeedFull, PriceFeed, format_event
+
+stream_bp = Blueprint('stream', __name__)
+
+# Every open stream holds a greenlet (async mode) or a whole worker thread
+# (sync mode) for as long as the client stays connected, so each worker
+# caps its streams; in sync mode the default leaves half the threads free.
+if os.environ.get('SERVER_MODE', 'async') == 'async':
+    DEFAULT_MAX_STREAM_CLIENTS = 100
+else:
+    DEFAULT_MAX_STREAM_CLIENTS = max(1, int(os.environ.get('WORKER_THREADS', 8)) // 2)
+MAX_STREAM_CLIENTS = int(os.environ.get('MAX_STREAM_CLIENTS', DEFAULT_MAX_STREAM_CLIENTS))
+
+# One shared poller for every connected dashboard. It reads the same cached
+# markets pages as everything else, so polling faster than their TTL only
+# sees unchanged data.
+price_feed = PriceFeed(
+    coingecko_client,
+    coins=int(os.environ.get('PRICE_FEED_COINS', 100)),
+    interval=int(os.environ.get('PRICE_FEED_INTERVAL', COINGECKO_CACHE_POLICIES['get_coins_markets'][0])),
+    max_subscribers=MAX_STREAM_CLIENTS
+)
+
+registry.gauge_callback('price_stream_subscribers', 'Connected price stream clients', lambda: [({}, price_feed.stats()['subscribers'])])
+
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_SECONDS = 15
+
+def _price_events(subscriber):
+    """Yield a full snapshot, then only the fields that changed"""
+    version, state = price_feed.snapshot()
+    yield format_event('snapshot', {'version': version, 'coins': state})
+
+    while True:
+        try:
+            event_version, payload = subscriber.get(timeout=HEARTBEAT_SECONDS)
+        except queue.Empty:
+            yield ": keep-alive\n\n"
+            continue
+
+        if payload is None:
+            # Fell behind; start over from a fresh snapshot
+            version, state = price_feed.snapshot()
+            yield format_event('snapshot', {'version': version, 'coins': state})
+        elif event_version > version:
+            version = event_version
+            yield payload
+
+@stream_bp.route('/prices', methods=['GET'])
+def stream_prices():
+    """Stream price, change24h and volume updates as server-sent events"""
+    try:
+        subscriber = price_feed.subscribe()
+    except FeedFull as e:
+        return jsonify({
+            "success": False,
+            "error": str(e)
+        }), 503, {'Retry-After': str(HEARTBEAT_SECONDS)}
+
+    response = Response(
+        _price_events(subscriber),
+        mimetype='text/event-stream',
+        headers={
+            'Cache-Control': 'no-cache',
+            'X-Accel-Buffering': 'no'
+        }
+    )
+    # The server closes the response on disconnect even if it was never iterated
+    response.call_on_close(lambda: price_feed.unsubscribe(subscriber))
+    return response
+
+@stream_bp.route('/stats', methods=['GET'])
+def get_stream_stats():
+    """Get subscriber count and version of the shared price feed"""
+    return jsonify({
+        "success": True,
+        "data": price_feed.stats()
+    }), 200
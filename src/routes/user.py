@@ -1,39 +1,184 @@
+import hmac
+import os
 from flask import Blueprint, jsonify, request
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
 from src.models.user import User, db
+from src.services.cache import TTLCache
 
 user_bp = Blueprint('user', __name__)
 
+MAX_PAGE_SIZE = 1000
+MAX_BULK_USERS = 1000
+
+# Per-process lookups by id and username; writes through this API invalidate
+# their entries, and the short TTL bounds staleness across worker processes
+USER_CACHE_TTL = int(os.environ.get('USER_CACHE_TTL', 30))
+user_cache = TTLCache(max_entries=int(os.environ.get('USER_CACHE_MAX_ENTRIES', 10000)), fallback_ttl=0)
+
+# Bearer token required by every endpoint; the blueprint is not mounted without one
+USER_API_TOKEN = os.environ.get('USER_API_TOKEN', '')
+
+class InvalidUser(ValueError):
+    pass
+
+@user_bp.before_request
+def require_token():
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if not USER_API_TOKEN or scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode(), USER_API_TOKEN.encode()):
+        return jsonify({'error': 'Unauthorized'}), 401
+
+def _lookup(key, condition):
+    """Return the user dict matching condition, or None, through the cache"""
+    def load():
+        user = db.session.scalars(select(User).where(condition)).first()
+        return user.to_dict() if user else None
+    return user_cache.get_or_load(key, load, USER_CACHE_TTL)
+
+def _forget(*users):
+    """Drop cached lookups for users given as dicts or (id, username) pairs"""
+    for user in users:
+        user_id, username = (user['id'], user['username']) if isinstance(user, dict) else user
+        user_cache.invalidate(('id', user_id))
+        user_cache.invalidate(('username', username))
+
+def _user_fields(data, partial=False):
+    """Validate the username/email of one payload entry"""
+    if not isinstance(data, dict):
+        raise InvalidUser("Each user must be a JSON object")
+    fields = {name: data[name] for name in ('username', 'email') if name in data}
+    for name in ('username', 'email'):
+        if name not in fields and not partial:
+            raise InvalidUser(f"{name} is required")
+        if name in fields and (not isinstance(fields[name], str) or not fields[name].strip()):
+            raise InvalidUser(f"{name} must be a non-empty string")
+    return fields
+
+def _bulk_payload(key):
+    data = request.get_json(silent=True) or {}
+    items = data.get(key)
+    if not isinstance(items, list) or not items:
+        raise InvalidUser(f"{key} must be a non-empty list")
+    if len(items) > MAX_BULK_USERS:
+        raise InvalidUser(f"At most {MAX_BULK_USERS} {key} per request")
+    return items
+
+def _unique(values, name):
+    if len(set(values)) != len(values):
+        raise InvalidUser(f"Duplicate {name} in request")
+
+@user_bp.errorhandler(InvalidUser)
+def handle_invalid_user(e):
+    return jsonify({'error': str(e)}), 400
+
+@user_bp.errorhandler(IntegrityError)
+def handle_conflict(e):
+    db.session.rollback()
+    return jsonify({'error': 'Username or email already exists'}), 409
+
 @user_bp.route('/users', methods=['GET'])
 def get_users():
-    users = User.query.all()
-    return jsonify([user.to_dict() for user in users])
+    """List users in id order; pass next_after back as ?after= for the next page"""
+    limit = request.args.get('limit', 100, type=int)
+    after = request.args.get('after', 0, type=int)
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise InvalidUser(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+    users = db.session.scalars(select(User).where(User.id > after).order_by(User.id).limit(limit)).all()
+    return jsonify({
+        'users': [user.to_dict() for user in users],
+        'next_after': users[-1].id if len(users) == limit else None
+    })
 
 @user_bp.route('/users', methods=['POST'])
 def create_user():
-    
-    data = request.json
-    user = User(username=data['username'], email=data['email'])
+    fields = _user_fields(request.get_json(silent=True))
+    user = User(**fields)
     db.session.add(user)
     db.session.commit()
+    _forget(user.to_dict())
     return jsonify(user.to_dict()), 201
 
+@user_bp.route('/users/bulk', methods=['POST'])
+def create_users():
+    """Create many users in one transaction; nothing is created if any entry fails"""
+    rows = [_user_fields(item) for item in _bulk_payload('users')]
+    _unique([row['username'] for row in rows], 'username')
+    _unique([row['email'] for row in rows], 'email')
+    users = [User(**row) for row in rows]
+    db.session.add_all(users)
+    db.session.flush()
+    # Serialize before commit expires every instance and each would be reloaded
+    created = [user.to_dict() for user in users]
+    db.session.commit()
+    _forget(*created)
+    return jsonify({'created': len(created), 'users': created}), 201
+
+@user_bp.route('/users/bulk', methods=['PUT'])
+def update_users():
+    """Update many users by id in one transaction"""
+    rows = []
+    for item in _bulk_payload('users'):
+        fields = _user_fields(item, partial=True)
+        if type(item.get('id')) is not int:
+            raise InvalidUser("Each user needs an integer id")
+        if not fields:
+            raise InvalidUser("Each user needs a username or email to update")
+        rows.append({'id': item['id'], **fields})
+    _unique([row['id'] for row in rows], 'id')
+
+    existing = db.session.execute(select(User.id, User.username).where(User.id.in_([row['id'] for row in rows]))).all()
+    missing = sorted({row['id'] for row in rows} - {user_id for user_id, _ in existing})
+    if missing:
+        return jsonify({'error': 'Users not found', 'ids': missing}), 404
+
+    db.session.execute(update(User), rows)
+    db.session.commit()
+    # Drop cached misses for the new usernames as well as the old entries
+    _forget(*existing, *[(row['id'], row['username']) for row in rows if 'username' in row])
+    return jsonify({'updated': len(rows)})
+
+@user_bp.route('/users/bulk', methods=['DELETE'])
+def delete_users():
+    """Delete many users by id in one transaction"""
+    ids = _bulk_payload('ids')
+    if not all(type(user_id) is int for user_id in ids):
+        raise InvalidUser("ids must be integers")
+    existing = db.session.execute(select(User.id, User.username).where(User.id.in_(ids))).all()
+    db.session.execute(delete(User).where(User.id.in_(ids)))
+    db.session.commit()
+    _forget(*existing)
+    return jsonify({'deleted': len(existing)})
+
 @user_bp.route('/users/<int:user_id>', methods=['GET'])
 def get_user(user_id):
-    user = User.query.get_or_404(user_id)
-    return jsonify(user.to_dict())
+    user = _lookup(('id', user_id), User.id == user_id)
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify(user)
+
+@user_bp.route('/users/by-username/<username>', methods=['GET'])
+def get_user_by_username(username):
+    user = _lookup(('username', username), User.username == username)
+    if user is None:
+        return jsonify({'error': 'User not found'}), 404
+    return jsonify(user)
 
 @user_bp.route('/users/<int:user_id>', methods=['PUT'])
 def update_user(user_id):
-    user = User.query.get_or_404(user_id)
-    data = request.json
-    user.username = data.get('username', user.username)
-    user.email = data.get('email', user.email)
+    user = db.get_or_404(User, user_id)
+    previous = user.to_dict()
+    fields = _user_fields(request.get_json(silent=True), partial=True)
+    user.username = fields.get('username', user.username)
+    user.email = fields.get('email', user.email)
     db.session.commit()
+    _forget(previous, user.to_dict())
     return jsonify(user.to_dict())
 
 @user_bp.route('/users/<int:user_id>', methods=['DELETE'])
 def delete_user(user_id):
-    user = User.query.get_or_404(user_id)
+    user = db.get_or_404(User, user_id)
+    previous = user.to_dict()
     db.session.delete(user)
     db.session.commit()
+    _forget(previous)
     return '', 204
@@ -0,0 +1,330 @@
+"""Replay the swing scanner's rules over stored daily history.
+
+Signals, entry/exit/target levels and trade outcomes are computed with NumPy
+across every day of a coin's history at once; coins are spread across a
+process pool. Run nightly as a snapshot job, whose results are stored in the
+database so restarts serve the last run, or from the command line:
+
+    python -m src.services.backtest --coins 100 --json backtest.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from sqlalchemy import delete, select
+
+from src.models.backtest import BacktestRun
+from src.models.user import db
+from src.services.indicators import rsi, sma, support_resistance
+from src.services.priority import BACKFILL, upstream_priority
+from src.services.swing_scanner import RISK_LEVELS, STOP_LOSS_RATIO
+
+# Days a position is held before it is closed at market, by risk level
+HOLD_DAYS = {'LOW': 28, 'MEDIUM': 21, 'HIGH': 14}
+
+# Days a limit entry stays open after the signal
+FILL_DAYS = 3
+
+MIN_HISTORY_DAYS = 30
+
+# Stored runs kept in the database
+KEEP_RUNS = 30
+
+
+def _first_hit(mask):
+    """Index of the first True in each row, or -1"""
+    return np.where(mask.any(axis=1), mask.argmax(axis=1), -1)
+
+
+def _forward_windows(values, days, width):
+    # windows[i, j] is values[days[i] + 1 + j]; NaN past the end of the series
+    padded = np.concatenate((values, np.full(width + 1, np.nan)))
+    return sliding_window_view(padded[1:], width)[days]
+
+
+def score_history(closes, volumes, market_caps, rank=None):
+    """Scanner scores for every day of one coin's daily history.
+
+    Mirrors SwingScanner._score with daily analogues: ATH is the running
+    maximum of the stored history, support/resistance span 14 days, and
+    volume is compared with its trailing 7-day average. Returns a dict of
+    per-day arrays; `signal` marks days the scanner would have published.
+    """
+    n = len(closes)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        ath_change = (closes / np.maximum.accumulate(closes) - 1) * 100
+        change_7d = np.full(n, np.nan)
+        change_7d[7:] = (closes[7:] / closes[:-7] - 1) * 100
+        volume_ratio = np.where(market_caps > 0, volumes / market_caps, 0)
+        baseline = np.full(n, np.nan)
+        baseline[1:] = sma(volumes, 7)[:-1]
+        volume_increasing = volumes > baseline * 1.2
+
+    rsi_values = rsi(closes)
+    support, resistance = support_resistance(closes, min(14, n))
+
+    deep_discount = ath_change <= -50
+    pullback = change_7d < -5
+    oversold = rsi_values < 30
+    volume_signal = (volume_ratio > 0.1) | volume_increasing
+    near_support = closes <= support * 1.03
+
+    score = np.minimum(40, np.maximum(0, -ath_change) * 0.5)
+    score += np.where(pullback, np.minimum(20, -np.nan_to_num(change_7d)), 0)
+    score += np.select([oversold, rsi_values < 40, rsi_values > 70], [25, 15, -15], 0)
+    score += np.where(volume_signal, 15, np.where(volume_ratio > 0.05, 8, 0))
+    score += np.where(near_support, 10, 0)
+    value_score = np.clip(np.round(score), 0, 100)
+
+    base_risk = 0 if rank and rank <= 20 else 1 if rank and rank <= 100 else 2
+    with np.errstate(invalid='ignore'):
+        volatile = (resistance - support) / closes > 0.15
+    risk_index = np.minimum(2, base_risk + volatile.astype(int))
+    confidence = np.minimum(99, np.round(40 + value_score * 0.55) - 5 * risk_index)
+
+    entry = np.maximum(np.minimum(support * 1.01, closes), closes * 0.97)
+    upside = np.clip(-ath_change / 100 * 0.4, 0.1, 0.6)
+    exit_point = np.minimum(np.maximum(resistance, entry * (1 + upside * 0.5)), entry * (1 + upside * 0.8))
+
+    signal = deep_discount | pullback | oversold | volume_signal | near_support
+    signal &= ~np.isnan(support)
+    return {
+        'signal': signal,
+        'confidence': confidence,
+        'risk_index': risk_index,
+        'entry': entry,
+        'exit': exit_point,
+        'target': entry * (1 + upside),
+        'stop': entry * STOP_LOSS_RATIO
+    }
+
+
+def backtest_coin(coin_id, timestamps, closes, volumes, market_caps, rank=None, min_confidence=0):
+    """Simulate one position at a time through a coin's history; returns its trades.
+
+    A signal places a limit buy at the entry level for FILL_DAYS. Once
+    filled the position closes at the exit level when a close reaches it, at
+    the close that breaks the stop, or at the close HOLD_DAYS later.
+    """
+    closes = np.asarray(closes, dtype=np.float64)
+    if len(closes) < MIN_HISTORY_DAYS:
+        return coin_id, []
+    volumes = np.nan_to_num(np.asarray(volumes, dtype=np.float64))
+    market_caps = np.nan_to_num(np.asarray(market_caps, dtype=np.float64))
+    scores = score_history(closes, volumes, market_caps, rank)
+
+    days = np.flatnonzero(scores['signal'] & (scores['confidence'] >= min_confidence))
+    if not len(days):
+        return coin_id, []
+
+    # Fill day for every candidate signal at once
+    entry = scores['entry'][days]
+    fill_offset = _first_hit(_forward_windows(closes, days, FILL_DAYS) <= entry[:, None])
+    filled = fill_offset >= 0
+    days, entry, fill_day = days[filled], entry[filled], days[filled] + 1 + fill_offset[filled]
+    if not len(days):
+        return coin_id, []
+
+    # Outcome of every filled candidate over the longest holding period
+    risk_index = scores['risk_index'][days]
+    hold = np.array([HOLD_DAYS[level] for level in RISK_LEVELS])[risk_index]
+    width = int(hold.max())
+    windows = _forward_windows(closes, fill_day, width)
+    in_hold = np.arange(width)[None, :] < hold[:, None]
+    exit_level = scores['exit'][days]
+    stop = scores['stop'][days]
+    take_profit = _first_hit((windows >= exit_level[:, None]) & in_hold)
+    stopped = _first_hit((windows <= stop[:, None]) & in_hold)
+
+    trades = []
+    free_from = 0
+    for i, day in enumerate(days):
+        # One open position per coin: skip signals until the last trade closed
+        if day < free_from:
+            continue
+        hits = [(offset, outcome) for offset, outcome in ((take_profit[i], 'target'), (stopped[i], 'stop')) if offset >= 0]
+        if hits:
+            offset, outcome = min(hits)
+            price = exit_level[i] if outcome == 'target' else windows[i, offset]
+        else:
+            offset, outcome = hold[i] - 1, 'timeout'
+            price = windows[i, offset]
+            if np.isnan(price):
+                # Still open at the end of the history
+                break
+        exit_day = fill_day[i] + 1 + offset
+        trades.append({
+            'coin_id': coin_id,
+            'signal_at': int(timestamps[day]),
+            'exit_at': int(timestamps[exit_day]),
+            'risk_level': RISK_LEVELS[risk_index[i]],
+            'confidence': int(scores['confidence'][day]),
+            'outcome': outcome,
+            'return': float(price / entry[i] - 1)
+        })
+        free_from = exit_day + 1
+    return coin_id, trades
+
+
+def _max_drawdown(trades, returns):
+    """Largest peak-to-trough fall of an equal-weight portfolio of the traded coins.
+
+    Each coin gets an equal share of capital and compounds its own trades;
+    trades must be sorted by exit time.
+    """
+    _, coin_index = np.unique([trade['coin_id'] for trade in trades], return_inverse=True)
+    growth = np.log1p(returns)
+    # Equity of each trade's coin sleeve just before the trade closed
+    before = np.empty(len(returns))
+    for coin in range(coin_index.max() + 1):
+        mask = coin_index == coin
+        before[mask] = np.exp(np.cumsum(growth[mask]) - growth[mask])
+    equity = 1 + np.cumsum(before * returns) / (coin_index.max() + 1)
+    peaks = np.maximum.accumulate(np.concatenate(([1.0], equity)))[1:]
+    return float(((equity - peaks) / peaks).min())
+
+
+def summarize_trades(trades):
+    """Win rate, return and drawdown statistics for a list of trades"""
+    if not trades:
+        return {'trades': 0, 'win_rate': 0, 'avg_return': 0, 'median_return': 0, 'max_drawdown': 0, 'outcomes': {}}
+    trades = sorted(trades, key=lambda trade: trade['exit_at'])
+    returns = np.array([trade['return'] for trade in trades])
+    outcomes, counts = np.unique([trade['outcome'] for trade in trades], return_counts=True)
+    return {
+        'trades': len(trades),
+        'win_rate': round(float((returns > 0).mean()) * 100, 2),
+        'avg_return': round(float(returns.mean()) * 100, 2),
+        'median_return': round(float(np.median(returns)) * 100, 2),
+        'max_drawdown': round(_max_drawdown(trades, returns) * 100, 2),
+        'outcomes': {str(outcome): int(count) for outcome, count in zip(outcomes, counts)}
+    }
+
+
+class Backtester:
+    """Runs backtest_coin over the stored daily history of the top coins in a process pool"""
+
+    def __init__(self, client, price_store, coins=100, workers=None, min_confidence=0):
+        self.client = client
+        self.price_store = price_store
+        self.coins = coins
+        self.workers = workers or os.cpu_count() or 1
+        self.min_confidence = min_confidence
+
+    def latest(self, max_age=None):
+        """Return the newest stored result, or None when there is none younger than max_age seconds"""
+        query = select(BacktestRun).order_by(BacktestRun.completed_at.desc()).limit(1)
+        if max_age is not None:
+            query = query.where(BacktestRun.completed_at >= int((time.time() - max_age) * 1000))
+        run = db.session.scalars(query).first()
+        return run.result if run else None
+
+    def refresh(self, max_age=86400):
+        """Return the stored result while it is younger than max_age seconds, else run and store a new one.
+
+        Must be called inside an application context.
+        """
+        result = self.latest(max_age)
+        if result is not None:
+            return result
+        result = self.run()
+        db.session.add(BacktestRun(completed_at=int(time.time() * 1000), coins=result['coins'], result=result))
+        db.session.flush()
+        oldest_kept = db.session.scalars(
+            select(BacktestRun.completed_at).order_by(BacktestRun.completed_at.desc()).offset(KEEP_RUNS - 1).limit(1)
+        ).first()
+        if oldest_kept is not None:
+            db.session.execute(delete(BacktestRun).where(BacktestRun.completed_at < oldest_kept))
+        db.session.commit()
+        return result
+
+    def run(self, coin_ids=None):
+        """Backfill daily history, replay the rules and return summary statistics"""
+        from src.services.history_fetcher import iter_markets
+
+        started = time.monotonic()
+        ranks = {}
+        if coin_ids is None:
+            coins = list(iter_markets(self.client, limit=self.coins))
+            coin_ids = [coin['id'] for coin in coins]
+            ranks = {coin['id']: coin.get('market_cap_rank') for coin in coins}
+
+        # Full-history backfill yields the upstream budget to everything else
+        with upstream_priority(BACKFILL):
+            self.price_store.refresh(coin_ids, days='max', resolution='daily')
+        histories = self.price_store.load(coin_ids, days='max', resolution='daily')
+
+        jobs = [
+            (coin_id, h['timestamps'], h['prices'], h['volumes'], h['market_caps'], ranks.get(coin_id), self.min_confidence)
+            for coin_id, h in histories.items()
+        ]
+        trades_by_coin = {}
+        # spawn keeps workers independent of the server's threads and event loop
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=min(self.workers, max(1, len(jobs))), mp_context=context) as executor:
+            for coin_id, trades in executor.map(_run_job, jobs, chunksize=max(1, len(jobs) // (self.workers * 4))):
+                trades_by_coin[coin_id] = trades
+
+        all_trades = [trade for trades in trades_by_coin.values() for trade in trades]
+        by_coin = {coin_id: summarize_trades(trades) for coin_id, trades in trades_by_coin.items() if trades}
+        return {
+            'summary': summarize_trades(all_trades),
+            'by_risk': {level: summarize_trades([t for t in all_trades if t['risk_level'] == level]) for level in RISK_LEVELS},
+            'by_confidence': {
+                band: summarize_trades([t for t in all_trades if low <= t['confidence'] < high])
+                for band, (low, high) in {'low': (0, 80), 'medium': (80, 90), 'high': (90, 101)}.items()
+            },
+            'best_coins': sorted(
+                ({'coin_id': coin_id, **stats} for coin_id, stats in by_coin.items() if stats['trades'] >= 3),
+                key=lambda row: row['avg_return'], reverse=True
+            )[:10],
+            'coins': len(histories),
+            'rules': {'hold_days': HOLD_DAYS, 'fill_days': FILL_DAYS, 'stop_loss_ratio': STOP_LOSS_RATIO, 'min_confidence': self.min_confidence},
+            'duration_seconds': round(time.monotonic() - started, 2),
+            'generated_at': datetime.now().isoformat()
+        }
+
+
+def _run_job(job):
+    return backtest_coin(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Backtest the swing scanner rules over stored daily history')
+    parser.add_argument('--coins', type=int, default=100, help='top N coins by market cap')
+    parser.add_argument('--coin-ids', help='comma separated coin ids instead of the top N')
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--min-confidence', type=int, default=0)
+    parser.add_argument('--json', help='write the full result to this file')
+    parser.add_argument('--store', action='store_true', help='save the result as the one served by the API')
+    args = parser.parse_args()
+    if args.store and args.coin_ids:
+        parser.error('--store backtests the top --coins coins and cannot be combined with --coin-ids')
+
+    from src.main import app
+    from src.services.market_data import coingecko_client, price_store
+
+    backtester = Backtester(coingecko_client, price_store, coins=args.coins, workers=args.workers, min_confidence=args.min_confidence)
+    coin_ids = [coin_id.strip() for coin_id in args.coin_ids.split(',')] if args.coin_ids else None
+    with app.app_context():
+        result = backtester.refresh(max_age=0) if args.store else backtester.run(coin_ids)
+
+    print(f"{'':<10}{'trades':>8}{'win %':>8}{'avg %':>8}{'median %':>10}{'max dd %':>10}")
+    for name, stats in [('all', result['summary'])] + list(result['by_risk'].items()):
+        print(f"{name:<10}{stats['trades']:>8}{stats['win_rate']:>8}{stats['avg_return']:>8}{stats['median_return']:>10}{stats['max_drawdown']:>10}")
+    print(f"{result['coins']} coins in {result['duration_seconds']}s")
+
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,183 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    __slots__ = ('value', 'stored_at', 'fresh_until', 'stale_until')
+
+    def __init__(self, value, ttl, stale_ttl, age=0):
+        now = time.monotonic() - age
+        self.value = value
+        self.stored_at = time.time() - age
+        self.fresh_until = now + ttl
+        self.stale_until = now + ttl + stale_ttl
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry TTLs, stale-while-revalidate and request coalescing.
+
+    Expired entries are kept (until evicted) so a failed reload can fall back
+    to the last known good value for up to fallback_ttl seconds. Values are
+    shared between callers and must be treated as read-only.
+
+    With a shared store (see shared_store.py) a local miss first looks for a
+    value another worker process loaded within the ttl before calling loader.
+    """
+
+    def __init__(self, max_entries=512, fallback_ttl=3600, shared=None):
+        self.max_entries = max_entries
+        self.fallback_ttl = fallback_ttl
+        self.shared = shared
+        self._entries = OrderedDict()
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'shared_hits': 0,
+            'coalesced': 0,
+            'refreshes': 0,
+            'evictions': 0,
+            'errors': 0,
+            'fallbacks': 0
+        }
+
+    def get_or_load(self, key, loader, ttl, stale_ttl=0):
+        """Return the cached value for key, calling loader at most once per miss"""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now < entry.stale_until:
+                self._entries.move_to_end(key)
+                if now < entry.fresh_until:
+                    self._stats['hits'] += 1
+                    return entry.value
+
+                # Serve the stale value and refresh it in the background
+                self._stats['stale_hits'] += 1
+                if key not in self._inflight:
+                    self._stats['refreshes'] += 1
+                    future = self._inflight[key] = Future()
+                    threading.Thread(
+                        target=self._load,
+                        args=(key, loader, ttl, stale_ttl, future),
+                        daemon=True
+                    ).start()
+                return entry.value
+
+            future = self._inflight.get(key)
+            if future is not None:
+                self._stats['coalesced'] += 1
+                leader = False
+            else:
+                self._stats['misses'] += 1
+                future = self._inflight[key] = Future()
+                leader = True
+
+        if leader:
+            self._load(key, loader, ttl, stale_ttl, future)
+        return future.result()
+
+    def _fetch(self, key, loader, ttl):
+        """Return (value, age), reusing a value another worker stored within ttl"""
+        if self.shared is None:
+            return loader(), 0
+        try:
+            found = self.shared.get(key)
+        except Exception as e:
+            logger.warning("Shared cache read failed: %s", e)
+            found = None
+        if found is not None:
+            stored_at, value = found
+            age = max(0, time.time() - stored_at)
+            if age < ttl:
+                with self._lock:
+                    self._stats['shared_hits'] += 1
+                return value, age
+
+        value = loader()
+        try:
+            self.shared.set(key, value, ttl)
+        except Exception as e:
+            logger.warning("Shared cache write failed: %s", e)
+        return value, 0
+
+    def _load(self, key, loader, ttl, stale_ttl, future):
+        try:
+            value, age = self._fetch(key, loader, ttl)
+        except Exception as e:
+            with self._lock:
+                self._stats['errors'] += 1
+                self._inflight.pop(key, None)
+                # Serve the last known good value while upstream is failing
+                entry = self._entries.get(key)
+                if entry is not None and time.time() - entry.stored_at < self.fallback_ttl:
+                    self._stats['fallbacks'] += 1
+                    future.set_result(entry.value)
+                    return
+            future.set_exception(e)
+            return
+
+        with self._lock:
+            self._entries[key] = _Entry(value, ttl, stale_ttl, age)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self._stats['evictions'] += 1
+            self._inflight.pop(key, None)
+        future.set_result(value)
+
+    def invalidate(self, key=None):
+        """Drop one entry, or every entry when no key is given"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self):
+        """Return a snapshot of the hit/miss counters"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats['entries'] = len(self._entries)
+            stats['max_entries'] = self.max_entries
+            stats['inflight'] = len(self._inflight)
+        served = stats['hits'] + stats['stale_hits'] + stats['coalesced']
+        lookups = served + stats['misses']
+        stats['hit_ratio'] = round(served / lookups, 4) if lookups else 0
+        return stats
+
+
+class CachedProxy:
+    """Wraps an upstream object so configured method calls are served through a TTLCache.
+
+    policies maps a method name to a (ttl, stale_ttl) tuple in seconds; other
+    attributes are passed through untouched.
+    """
+
+    def __init__(self, target, namespace, policies, cache):
+        self._target = target
+        self._namespace = namespace
+        self._policies = policies
+        self._cache = cache
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        policy = self._policies.get(name)
+        if policy is None or not callable(attr):
+            return attr
+
+        ttl, stale_ttl = policy
+
+        def cached_call(*args, **kwargs):
+            key = (self._namespace, name, args, tuple(sorted(kwargs.items())))
+            return self._cache.get_or_load(key, lambda: attr(*args, **kwargs), ttl, stale_ttl)
+
+        cached_call.__name__ = name
+        return cached_call
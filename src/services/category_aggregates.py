@@ -0,0 +1,213 @@
+import json
+import logging
+import math
+import threading
+import time
+from datetime import datetime
+
+from src.services.history_fetcher import MARKET_PAGE_SIZE, iter_markets
+
+logger = logging.getLogger(__name__)
+
+# CoinGecko category ids whose members are aggregated; membership is read
+# from the markets endpoint filtered by category, so it follows upstream
+DEFAULT_CATEGORY_IDS = (
+    'layer-1', 'layer-2', 'decentralized-finance-defi', 'meme-token', 'exchange-based-tokens',
+    'artificial-intelligence', 'gaming', 'stablecoins'
+)
+
+# Members read per category, by market cap
+CATEGORY_MEMBERS = MARKET_PAGE_SIZE
+
+# Running sums are rebuilt from the per-coin values after this many updates
+# so floating point error from repeated add/subtract cannot accumulate
+REBUILD_EVERY = 1000
+
+_SUMS = ('market_cap', 'weighted_change', 'volume', 'change_sum', 'change_sq', 'count')
+
+
+def load_categories(path):
+    """Return {category: [coin ids]} from a JSON file"""
+    with open(path) as f:
+        return json.load(f)
+
+
+def fetch_categories(client, category_ids, members=CATEGORY_MEMBERS):
+    """Return {category id: [coin ids]} from CoinGecko's per-category markets pages"""
+    return {
+        category_id: [coin['id'] for coin in iter_markets(client, limit=members, category=category_id) if coin.get('id')]
+        for category_id in category_ids
+    }
+
+
+def _contribution(coin):
+    """(market_cap, volume, change_24h) of one markets row, zeros for missing values"""
+    values = []
+    for key in ('market_cap', 'total_volume', 'price_change_percentage_24h'):
+        value = coin.get(key)
+        values.append(float(value) if isinstance(value, (int, float)) and math.isfinite(value) else 0.0)
+    return tuple(values)
+
+
+class CategoryAggregator:
+    """Market-cap-weighted return, volume share and dispersion per category as running totals.
+
+    apply() folds in only the coins whose values changed since the last call,
+    subtracting each coin's previous contribution and adding the new one, so
+    an update costs O(changed coins x their categories) and reading the
+    aggregates costs O(categories). version increases with every change,
+    including membership changes.
+    """
+
+    def __init__(self, categories=None):
+        self._coins = {}
+        self._market_volume = 0.0
+        self._updates = 0
+        self._lock = threading.Lock()
+        self.version = 0
+        self.updated_at = None
+        self._set_members(categories or {})
+        self._totals = {category: dict.fromkeys(_SUMS, 0.0) for category in self.categories}
+
+    def _set_members(self, categories):
+        self.categories = categories
+        self._members = {}
+        for category, coin_ids in categories.items():
+            for coin_id in coin_ids:
+                self._members.setdefault(coin_id, []).append(category)
+
+    def set_categories(self, categories):
+        """Replace category membership and recompute the totals from the stored coin values"""
+        with self._lock:
+            if categories == self.categories:
+                return
+            self._set_members(categories)
+            self._rebuild()
+            self._updates = 0
+            self.version += 1
+            self.updated_at = time.time()
+
+    def _add(self, coin_id, values, sign):
+        market_cap, volume, change = values
+        self._market_volume += sign * volume
+        for category in self._members.get(coin_id, ()):
+            totals = self._totals[category]
+            totals['market_cap'] += sign * market_cap
+            totals['weighted_change'] += sign * market_cap * change
+            totals['volume'] += sign * volume
+            totals['change_sum'] += sign * change
+            totals['change_sq'] += sign * change * change
+            totals['count'] += sign
+
+    def _rebuild(self):
+        self._totals = {category: dict.fromkeys(_SUMS, 0.0) for category in self.categories}
+        self._market_volume = 0.0
+        for coin_id, values in self._coins.items():
+            self._add(coin_id, values, 1)
+
+    def apply(self, coins, complete=False):
+        """Fold in changed markets rows; with complete=True drop coins missing from coins.
+
+        Returns the number of coins whose contribution changed.
+        """
+        changed = 0
+        with self._lock:
+            seen = set()
+            for coin in coins:
+                coin_id = coin.get('id')
+                if not coin_id:
+                    continue
+                seen.add(coin_id)
+                values = _contribution(coin)
+                previous = self._coins.get(coin_id)
+                if previous == values:
+                    continue
+                if previous is not None:
+                    self._add(coin_id, previous, -1)
+                self._add(coin_id, values, 1)
+                self._coins[coin_id] = values
+                changed += 1
+
+            if complete:
+                for coin_id in [coin_id for coin_id in self._coins if coin_id not in seen]:
+                    self._add(coin_id, self._coins.pop(coin_id), -1)
+                    changed += 1
+
+            if changed:
+                self._updates += changed
+                if self._updates >= REBUILD_EVERY:
+                    self._rebuild()
+                    self._updates = 0
+                self.version += 1
+                self.updated_at = time.time()
+        return changed
+
+    def snapshot(self):
+        """Return the current aggregates for every category with their version stamp"""
+        with self._lock:
+            categories = {}
+            for category, totals in self._totals.items():
+                count = round(totals['count'])
+                if not count:
+                    continue
+                mean = totals['change_sum'] / count
+                members = [(coin_id, self._coins[coin_id][2]) for coin_id in self.categories[category] if coin_id in self._coins]
+                best = max(members, key=lambda member: member[1])
+                worst = min(members, key=lambda member: member[1])
+                categories[category] = {
+                    'coins': count,
+                    'market_cap': round(totals['market_cap'], 2),
+                    'volume_24h': round(totals['volume'], 2),
+                    'volume_share': round(totals['volume'] / self._market_volume * 100, 2) if self._market_volume > 0 else 0,
+                    'weighted_change_24h': round(totals['weighted_change'] / totals['market_cap'], 2) if totals['market_cap'] > 0 else 0,
+                    'average_change_24h': round(mean, 2),
+                    'dispersion': round(math.sqrt(max(0.0, totals['change_sq'] / count - mean * mean)), 2),
+                    'best_performer': {'coin_id': best[0], 'change_24h': round(best[1], 2)},
+                    'worst_performer': {'coin_id': worst[0], 'change_24h': round(worst[1], 2)}
+                }
+            return {
+                'version': self.version,
+                'updated_at': datetime.fromtimestamp(self.updated_at).isoformat() if self.updated_at else None,
+                'categories': dict(sorted(categories.items(), key=lambda item: item[1]['weighted_change_24h'], reverse=True))
+            }
+
+
+class CategoryFeed:
+    """Applies the top coins' markets rows to a CategoryAggregator once per cycle.
+
+    Membership comes from a {category: [coin ids]} JSON file when map_path is
+    set, else from CoinGecko's markets pages for each of category_ids, and is
+    re-read every membership_seconds.
+    """
+
+    def __init__(self, client, aggregator, coins=1000, category_ids=DEFAULT_CATEGORY_IDS, map_path=None, membership_seconds=3600):
+        self.client = client
+        self.aggregator = aggregator
+        self.coins = coins
+        self.category_ids = category_ids
+        self.map_path = map_path
+        self.membership_seconds = membership_seconds
+        self._membership_at = None
+
+    def _refresh_membership(self, now):
+        if self._membership_at is not None and now - self._membership_at < self.membership_seconds:
+            return
+        try:
+            if self.map_path:
+                categories = load_categories(self.map_path)
+            else:
+                categories = fetch_categories(self.client, self.category_ids)
+        except Exception as e:
+            if self._membership_at is None:
+                raise
+            # Keep the previous membership until the next attempt
+            logger.warning("Error refreshing category membership: %s", e)
+            return
+        self.aggregator.set_categories(categories)
+        self._membership_at = now
+
+    def refresh(self):
+        self._refresh_membership(time.monotonic())
+        coins = list(iter_markets(self.client, limit=self.coins))
+        self.aggregator.apply(coins, complete=True)
+        return self.aggregator.snapshot()
@@ -0,0 +1,48 @@
+import contextvars
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+from src.services.priority import current_priority, upstream_priority
+
+# Shared pool for fanning out independent upstream sections
+section_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('SECTION_WORKERS', 16)),
+    thread_name_prefix='section'
+)
+
+
+def _at_priority(priority, func):
+    with upstream_priority(priority):
+        return func()
+
+
+def gather_sections(sections, timeout=10):
+    """Run independent sections concurrently and collect whatever finishes in time.
+
+    sections maps a name to a callable or to a (callable, timeout) tuple.
+    Returns (results, errors): results holds the value of every section that
+    succeeded, errors holds a message for every section that failed or timed out.
+    Sections run in a copy of the caller's context at the caller's upstream
+    priority, since pool threads have no request context of their own.
+    """
+    started = time.monotonic()
+    priority = current_priority()
+    pending = []
+    for name, section in sections.items():
+        func, section_timeout = section if isinstance(section, tuple) else (section, timeout)
+        future = section_executor.submit(contextvars.copy_context().run, _at_priority, priority, func)
+        pending.append((started + section_timeout, name, future))
+
+    results = {}
+    errors = {}
+    for deadline, name, future in sorted(pending, key=lambda item: item[0]):
+        try:
+            results[name] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            errors[name] = f"timed out after {deadline - started:.1f}s"
+        except Exception as e:
+            errors[name] = str(e)
+
+    return results, errors
@@ -0,0 +1,109 @@
+import os
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+
+from src.services.priority import current_priority, upstream_priority
+from src.services.upstream import CircuitOpenError
+
+# CoinGecko's largest markets page
+MARKET_PAGE_SIZE = 250
+
+# Extra price change windows requested with every markets page; the 7d change
+# arrives as price_change_percentage_7d_in_currency
+MARKET_PRICE_CHANGES = '24h,7d'
+
+# Bounded pool shared by every batch history fetch
+history_executor = ThreadPoolExecutor(
+    max_workers=int(os.environ.get('HISTORY_FETCH_WORKERS', 8)),
+    thread_name_prefix='history'
+)
+
+
+def is_transient(error):
+    """True for failures worth retrying: connection errors, timeouts, 429 and 5xx responses"""
+    status = getattr(getattr(error, 'response', None), 'status_code', None) or getattr(error, 'status_code', None)
+    if isinstance(status, int):
+        return status == 429 or status >= 500
+    return isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError))
+
+
+def with_retries(func, retries=3, base_delay=1.0, max_delay=10.0):
+    """Call func, retrying transient failures with exponential backoff and jitter"""
+    for attempt in range(retries + 1):
+        try:
+            return func()
+        except CircuitOpenError:
+            # Upstream is known to be down; fail fast
+            raise
+        except Exception as e:
+            # Client errors such as a 404 for an unknown coin id will not go away
+            if attempt == retries or not is_transient(e):
+                raise
+            delay = min(max_delay, base_delay * (2 ** attempt))
+            time.sleep(delay * random.uniform(0.5, 1.0))
+
+
+def fetch_histories(client, coin_ids, days=30, vs_currency='usd', retries=3):
+    """Fetch market charts for many coins concurrently.
+
+    Returns (histories, errors) keyed by coin id. Upstream pacing is left to
+    the client, which is rate limited below the shared cache; the fetches
+    keep the caller's upstream priority.
+    """
+    priority = current_priority()
+
+    def fetch(coin_id):
+        with upstream_priority(priority):
+            return with_retries(lambda: client.get_coin_market_chart(coin_id, vs_currency=vs_currency, days=days), retries)
+
+    futures = {
+        history_executor.submit(fetch, coin_id): coin_id
+        for coin_id in dict.fromkeys(coin_ids)
+    }
+
+    histories = {}
+    errors = {}
+    for future in as_completed(futures):
+        coin_id = futures[future]
+        try:
+            histories[coin_id] = future.result()
+        except Exception as e:
+            errors[coin_id] = str(e)
+
+    return histories, errors
+
+
+def iter_markets(client, offset=0, limit=None, vs_currency='usd', page_size=MARKET_PAGE_SIZE, **params):
+    """Yield market rows by rank starting at `offset`, fetching one page at a time.
+
+    Pages always have `page_size` rows so every caller shares the same cached
+    upstream pages whatever offset or limit it asks for. Every page carries the
+    MARKET_PRICE_CHANGES windows; extra params (such as a CoinGecko
+    `category`) are passed to every page request.
+    """
+    page = offset // page_size + 1
+    skip = offset % page_size
+    remaining = limit
+    while remaining is None or remaining > 0:
+        coins = client.get_coins_markets(
+            vs_currency=vs_currency, per_page=page_size, page=page, price_change_percentage=MARKET_PRICE_CHANGES, **params
+        )
+        for coin in coins[skip:]:
+            yield coin
+            if remaining is not None:
+                remaining -= 1
+                if remaining == 0:
+                    return
+        if len(coins) < page_size:
+            return
+        skip = 0
+        page += 1
+
+
+def fetch_top_coin_ids(client, limit, vs_currency='usd'):
+    """Return the ids of the top `limit` coins by market cap"""
+    page_size = min(MARKET_PAGE_SIZE, limit)
+    return [coin['id'] for coin in iter_markets(client, limit=limit, vs_currency=vs_currency, page_size=page_size)]
@@ -0,0 +1,168 @@
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+from functools import wraps
+
+from flask import make_response, request
+
+from src.services.metrics import registry
+
+try:
+    import brotli
+except ImportError:  # optional dependency
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_BYTES = 1024
+
+# Each encoding is its own representation and gets its own strong ETag
+ETAG_SUFFIXES = {None: '', 'gzip': '-gz', 'br': '-br'}
+
+
+class PreparedBody:
+    """A serialized 200 response plus its lazily compressed variants"""
+
+    def __init__(self, token, body, mimetype, last_modified=None):
+        self.token = token
+        self.body = body
+        self.mimetype = mimetype
+        self.last_modified = last_modified
+        self.etag = hashlib.blake2b(body, digest_size=12).hexdigest()
+        self._encoded = {}
+
+    def etag_for(self, encoding):
+        return self.etag + ETAG_SUFFIXES[encoding]
+
+    def encoded(self, encoding):
+        if encoding not in self._encoded:
+            if encoding == 'br':
+                self._encoded[encoding] = brotli.compress(self.body)
+            else:
+                self._encoded[encoding] = gzip.compress(self.body, compresslevel=6)
+        return self._encoded[encoding]
+
+
+class BodyCache:
+    """Bounded LRU of prepared bodies keyed by route and query string"""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'reused': 0, 'built': 0, 'not_modified': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+            return entry
+
+    def put(self, key, entry):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def count(self, stat):
+        with self._lock:
+            self.stats[stat] += 1
+
+
+body_cache = BodyCache()
+
+registry.counter_callback(
+    'http_body_cache_total', 'Cached response bodies reused, built or answered with 304',
+    lambda: [({'result': result}, count) for result, count in body_cache.stats.items()]
+)
+
+
+def _request_key():
+    return (
+        request.endpoint,
+        tuple(sorted((request.view_args or {}).items())),
+        tuple(sorted(request.args.items(multi=True)))
+    )
+
+
+def _choose_encoding(size):
+    if size < MIN_COMPRESS_BYTES:
+        return None
+    accepted = request.accept_encodings
+    if brotli is not None and accepted['br']:
+        return 'br'
+    if accepted['gzip']:
+        return 'gzip'
+    return None
+
+
+def _not_modified(entry, etag):
+    if request.if_none_match:
+        return request.if_none_match.contains(etag)
+    if entry.last_modified is not None and request.if_modified_since is not None:
+        return int(entry.last_modified) <= request.if_modified_since.timestamp()
+    return False
+
+
+def _build_response(entry, cache_control):
+    encoding = _choose_encoding(len(entry.body))
+    etag = entry.etag_for(encoding)
+    if _not_modified(entry, etag):
+        body_cache.count('not_modified')
+        response = make_response('', 304)
+    else:
+        response = make_response(entry.encoded(encoding) if encoding else entry.body, 200)
+        response.mimetype = entry.mimetype
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+    response.set_etag(etag)
+    if entry.last_modified is not None:
+        response.last_modified = datetime.fromtimestamp(entry.last_modified, tz=timezone.utc)
+    response.headers['Cache-Control'] = cache_control
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def cached_response(max_age=30, stale_while_revalidate=None, version=None):
+    """Add ETag/Last-Modified, 304 handling and Cache-Control to a GET view.
+
+    version is an optional callable returning (token, last_modified_epoch) for
+    the data the view serves. With it the serialized body is reused without
+    calling the view until the token changes; without it the ETag is derived
+    from the freshly built body.
+    """
+    cache_control = f'public, max-age={max_age}'
+    if stale_while_revalidate:
+        cache_control += f', stale-while-revalidate={stale_while_revalidate}'
+
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET':
+                return view(*args, **kwargs)
+
+            key = _request_key()
+            token, last_modified = version() if version else (None, None)
+            if token is not None:
+                entry = body_cache.get(key)
+                if entry is not None and entry.token == token:
+                    body_cache.count('reused')
+                    return _build_response(entry, cache_control)
+
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200 or response.is_streamed:
+                return response
+
+            entry = PreparedBody(token, response.get_data(), response.mimetype, last_modified)
+            if token is not None:
+                body_cache.put(key, entry)
+            body_cache.count('built')
+            return _build_response(entry, cache_control)
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,182 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+# All indicators accept a 1-D price series or a 2-D matrix with one coin per
+# row and time along the last axis, and return arrays of the same shape with
+# NaN where there is not yet enough history.
+
+
+def _as_matrix(values):
+    arr = np.asarray(values, dtype=np.float64)
+    if arr.ndim == 1:
+        return arr[np.newaxis, :], True
+    if arr.ndim != 2:
+        raise ValueError("Expected a 1-D series or a 2-D (coins x time) matrix")
+    return arr, False
+
+
+def _restore(arr, was_1d):
+    return arr[0] if was_1d else arr
+
+
+def stack_series(series_list, length=None):
+    """Stack price series into a (coins x time) matrix aligned on their most recent points"""
+    if not series_list:
+        return np.empty((0, 0))
+    length = length or min(len(series) for series in series_list)
+    return np.array([np.asarray(series, dtype=np.float64)[-length:] for series in series_list])
+
+
+def group_by_length(series_by_coin, min_length=1):
+    """Yield (coin_ids, matrix) batches of series that share the same length"""
+    groups = {}
+    for coin_id, series in series_by_coin.items():
+        if len(series) >= min_length:
+            groups.setdefault(len(series), []).append(coin_id)
+    for coin_ids in groups.values():
+        yield coin_ids, stack_series([series_by_coin[coin_id] for coin_id in coin_ids])
+
+
+def sma(prices, period):
+    """Simple moving average"""
+    arr, was_1d = _as_matrix(prices)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        csum = np.cumsum(arr, axis=1)
+        window_sums = csum[:, period - 1:].copy()
+        window_sums[:, 1:] -= csum[:, :-period]
+        out[:, period - 1:] = window_sums / period
+    return _restore(out, was_1d)
+
+
+def _smooth(arr, period, alpha):
+    # Recursive smoothing seeded with the SMA of the first `period` values;
+    # loops over time only, every step is vectorized across coins.
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] < period:
+        return out
+    out[:, period - 1] = arr[:, :period].mean(axis=1)
+    for t in range(period, arr.shape[1]):
+        out[:, t] = out[:, t - 1] + alpha * (arr[:, t] - out[:, t - 1])
+    return out
+
+
+def ema(prices, period):
+    """Exponential moving average with the standard 2 / (period + 1) weight"""
+    arr, was_1d = _as_matrix(prices)
+    return _restore(_smooth(arr, period, 2.0 / (period + 1)), was_1d)
+
+
+def wilder(values, period):
+    """Wilder's smoothed moving average (alpha = 1 / period)"""
+    arr, was_1d = _as_matrix(values)
+    return _restore(_smooth(arr, period, 1.0 / period), was_1d)
+
+
+def rsi(prices, period=14):
+    """Relative Strength Index using Wilder smoothing"""
+    arr, was_1d = _as_matrix(prices)
+    out = np.full(arr.shape, np.nan)
+    if arr.shape[1] <= period:
+        return _restore(out, was_1d)
+
+    changes = np.diff(arr, axis=1)
+    avg_gain = _smooth(np.clip(changes, 0, None), period, 1.0 / period)
+    avg_loss = _smooth(np.clip(-changes, 0, None), period, 1.0 / period)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = 100 - 100 / (1 + avg_gain / avg_loss)
+    # No losses in the window: fully overbought, or neutral when flat
+    values = np.where(avg_loss == 0, np.where(avg_gain == 0, 50.0, 100.0), values)
+    values[np.isnan(avg_gain)] = np.nan
+
+    out[:, 1:] = values
+    return _restore(out, was_1d)
+
+
+def macd(prices, fast=12, slow=26, signal=9):
+    """MACD line, signal line and histogram"""
+    arr, was_1d = _as_matrix(prices)
+    macd_line = _smooth(arr, fast, 2.0 / (fast + 1)) - _smooth(arr, slow, 2.0 / (slow + 1))
+
+    signal_line = np.full(arr.shape, np.nan)
+    start = slow - 1
+    if arr.shape[1] - start >= signal:
+        signal_line[:, start:] = _smooth(macd_line[:, start:], signal, 2.0 / (signal + 1))
+
+    return (
+        _restore(macd_line, was_1d),
+        _restore(signal_line, was_1d),
+        _restore(macd_line - signal_line, was_1d)
+    )
+
+
+def bollinger(prices, period=20, num_std=2.0):
+    """Bollinger bands as (middle, upper, lower)"""
+    arr, was_1d = _as_matrix(prices)
+    middle = np.full(arr.shape, np.nan)
+    width = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= period:
+        windows = sliding_window_view(arr, period, axis=1)
+        middle[:, period - 1:] = windows.mean(axis=2)
+        width[:, period - 1:] = num_std * windows.std(axis=2)
+    return (
+        _restore(middle, was_1d),
+        _restore(middle + width, was_1d),
+        _restore(middle - width, was_1d)
+    )
+
+
+def atr(high, low, close, period=14):
+    """Average True Range using Wilder smoothing"""
+    high, was_1d = _as_matrix(high)
+    low, _ = _as_matrix(low)
+    close, _ = _as_matrix(close)
+
+    true_range = high - low
+    prev_close = close[:, :-1]
+    true_range[:, 1:] = np.maximum.reduce([
+        true_range[:, 1:],
+        np.abs(high[:, 1:] - prev_close),
+        np.abs(low[:, 1:] - prev_close)
+    ])
+    return _restore(_smooth(true_range, period, 1.0 / period), was_1d)
+
+
+def support_resistance(prices, window=30):
+    """Rolling support (window minimum) and resistance (window maximum)"""
+    arr, was_1d = _as_matrix(prices)
+    support = np.full(arr.shape, np.nan)
+    resistance = np.full(arr.shape, np.nan)
+    if arr.shape[1] >= window:
+        windows = sliding_window_view(arr, window, axis=1)
+        support[:, window - 1:] = windows.min(axis=2)
+        resistance[:, window - 1:] = windows.max(axis=2)
+    return _restore(support, was_1d), _restore(resistance, was_1d)
+
+
+def latest_indicators(closes, rsi_period=14, level_window=30):
+    """Compute the latest value of every indicator for a (coins x time) matrix of closes"""
+    closes, _ = _as_matrix(closes)
+    window = min(level_window, closes.shape[1])
+    support, resistance = support_resistance(closes, window)
+    macd_line, signal_line, histogram = macd(closes)
+    middle, upper, lower = bollinger(closes)
+
+    return {
+        'current_price': closes[:, -1],
+        'first_price': closes[:, 0],
+        'rsi': rsi(closes, rsi_period)[:, -1],
+        'ema_12': ema(closes, 12)[:, -1],
+        'ema_26': ema(closes, 26)[:, -1],
+        'sma_50': sma(closes, 50)[:, -1],
+        'macd': macd_line[:, -1],
+        'macd_signal': signal_line[:, -1],
+        'macd_histogram': histogram[:, -1],
+        'bollinger_middle': middle[:, -1],
+        'bollinger_upper': upper[:, -1],
+        'bollinger_lower': lower[:, -1],
+        'atr': atr(closes, closes, closes)[:, -1],
+        'support': support[:, -1],
+        'resistance': resistance[:, -1]
+    }
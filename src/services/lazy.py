@@ -0,0 +1,25 @@
+import threading
+
+
+class LazyProxy:
+    """Stands in for an object that is only built, once, on first attribute access.
+
+    Lets modules import shared clients without paying for their construction
+    (or their imports) until a request or background job actually uses them.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._target = None
+        self._lock = threading.Lock()
+
+    def resolve(self):
+        """Return the wrapped object, building it if needed"""
+        if self._target is None:
+            with self._lock:
+                if self._target is None:
+                    self._target = self._factory()
+        return self._target
+
+    def __getattr__(self, name):
+        return getattr(self.resolve(), name)
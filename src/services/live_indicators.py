@@ -0,0 +1,47 @@
+import time
+from datetime import datetime
+
+from src.services.history_fetcher import iter_markets
+from src.services.streaming_indicators import IndicatorBook
+
+# Fewest stored points worth seeding a coin with (RSI needs 15)
+MIN_SEED_POINTS = 15
+
+
+class LiveIndicatorFeed:
+    """Keeps an IndicatorBook current for the top coins from markets pages.
+
+    Each run ticks every seeded coin with its latest market price, which is
+    O(1) per coin, and seeds up to seed_batch new coins from local hourly
+    history so the covered universe grows at a bounded upstream cost.
+    """
+
+    def __init__(self, client, price_store, coins=250, seed_batch=20, book=None):
+        self.client = client
+        self.price_store = price_store
+        self.coins = coins
+        self.seed_batch = seed_batch
+        self.book = book or IndicatorBook()
+
+    def refresh(self):
+        """Tick the book with current prices and return the latest values for the universe"""
+        now = time.time()
+        coins = [coin for coin in iter_markets(self.client, limit=self.coins) if coin.get('current_price')]
+
+        unseeded = [coin['id'] for coin in coins if coin['id'] not in self.book]
+        if unseeded and self.seed_batch:
+            self._seed(unseeded[:self.seed_batch])
+
+        for coin in coins:
+            self.book.tick(coin['id'], coin['current_price'], now)
+
+        return {
+            'updated_at': datetime.now().isoformat(),
+            'coins': self.book.values([coin['id'] for coin in coins])
+        }
+
+    def _seed(self, coin_ids):
+        self.price_store.refresh(coin_ids, days=30)
+        for coin_id, series in self.price_store.load(coin_ids, days=30).items():
+            if len(series['prices']) >= MIN_SEED_POINTS:
+                self.book.seed(coin_id, series['timestamps'], series['prices'])
@@ -0,0 +1,109 @@
+import os
+import sys
+
+from src.services.cache import TTLCache, CachedProxy
+from src.services.lazy import LazyProxy
+from src.services.metrics import registry
+from src.services.price_store import PriceStore
+from src.services.rate_limit import PriorityTokenBucket
+from src.services.shared_store import open_store
+from src.services.upstream import CircuitBreaker, UpstreamClient, pooled_session
+
+# (ttl, stale_ttl) in seconds for each cached upstream call
+COINGECKO_CACHE_POLICIES = {
+    'get_coins_markets': (60, 240),
+    'get_coin_market_chart': (300, 1500)
+}
+
+# Cross-process store shared by gunicorn workers (unset for a single process)
+shared_store = open_store(os.environ.get('SHARED_CACHE_URL'))
+
+# One process-wide cache shared by every blueprint, backed by the shared store
+market_cache = TTLCache(
+    max_entries=int(os.environ.get('MARKET_CACHE_MAX_ENTRIES', 512)),
+    fallback_ttl=int(os.environ.get('MARKET_CACHE_FALLBACK_SECONDS', 3600)),
+    shared=shared_store
+)
+
+# Every upstream call (cache misses and refreshes) draws from one request budget,
+# split evenly across worker processes and served interactive calls first
+upstream_rate_limiter = PriorityTokenBucket(
+    int(os.environ.get('RATE_LIMIT_PER_MINUTE', 60)) / max(1, int(os.environ.get('WEB_CONCURRENCY', 1)))
+)
+
+# Where the crypto trading system (coingecko_client, market_analyzer) is installed
+CRYPTO_TRADING_SYSTEM_PATH = os.environ.get('CRYPTO_TRADING_SYSTEM_PATH', '/home/ubuntu/crypto_trading_system/src')
+
+upstream_session = pooled_session(
+    pool_size=int(os.environ.get('UPSTREAM_POOL_SIZE', 20)),
+    timeout=float(os.environ.get('UPSTREAM_TIMEOUT_SECONDS', 10))
+)
+
+
+def _add_trading_system_path():
+    if CRYPTO_TRADING_SYSTEM_PATH not in sys.path:
+        sys.path.append(CRYPTO_TRADING_SYSTEM_PATH)
+
+
+def _create_coingecko_client():
+    _add_trading_system_path()
+    from coingecko_client import CoinGeckoClient
+
+    client = CoinGeckoClient()
+    # Point the client at a stand-in server (benchmarks, local development)
+    if os.environ.get('COINGECKO_BASE_URL') and hasattr(client, 'base_url'):
+        client.base_url = os.environ['COINGECKO_BASE_URL']
+    if hasattr(client, 'session'):
+        client.session = upstream_session
+    return client
+
+
+def _create_market_analyzer():
+    _add_trading_system_path()
+    from market_analyzer import MarketAnalyzer
+
+    return MarketAnalyzer(coingecko_client)
+
+
+# Raw CoinGecko client, built on first use and only ever called through upstream_client
+coingecko = LazyProxy(_create_coingecko_client)
+
+# Single guarded upstream client: pooled keep-alive session, circuit breaker and metrics
+upstream_client = UpstreamClient(
+    coingecko,
+    breaker=CircuitBreaker(
+        failure_threshold=int(os.environ.get('CIRCUIT_FAILURE_THRESHOLD', 5)),
+        reset_timeout=int(os.environ.get('CIRCUIT_RESET_SECONDS', 30))
+    ),
+    rate_limiter=upstream_rate_limiter
+)
+
+# Initialize shared clients; the analyzer is also built on first use and only
+# ever runs inside snapshot jobs, which are its cache
+coingecko_client = CachedProxy(upstream_client, 'coingecko', COINGECKO_CACHE_POLICIES, market_cache)
+market_analyzer = LazyProxy(_create_market_analyzer)
+
+# Local price history, refreshed incrementally straight from the guarded client;
+# its own refresh interval stands in for the response cache
+price_store = PriceStore(upstream_client, refresh_interval=int(os.environ.get('PRICE_STORE_REFRESH_SECONDS', 300)))
+
+# Expose cache and upstream health on /metrics
+registry.counter_callback(
+    'market_cache_lookups_total', 'Shared market cache lookups by result',
+    lambda: [({'result': result}, market_cache.stats()[result]) for result in ('hits', 'stale_hits', 'coalesced', 'misses', 'shared_hits', 'fallbacks')]
+)
+registry.gauge_callback('market_cache_hit_ratio', 'Share of lookups served without a new upstream call', lambda: [({}, market_cache.stats()['hit_ratio'])])
+registry.gauge_callback('market_cache_entries', 'Entries held in the shared market cache', lambda: [({}, market_cache.stats()['entries'])])
+registry.gauge_callback(
+    'upstream_circuit_open', '1 while the CoinGecko circuit breaker is open or half open',
+    lambda: [({}, 0 if upstream_client.breaker.state == 'closed' else 1)]
+)
+registry.gauge_callback('upstream_rate_limit_tokens', 'Upstream request tokens currently available', lambda: [({}, upstream_rate_limiter.available())])
+registry.gauge_callback(
+    'upstream_queue_depth', 'Upstream calls waiting for a rate limit token, by priority',
+    lambda: [({'priority': priority}, depth) for priority, depth in upstream_rate_limiter.queue_depth().items()]
+)
+registry.counter_callback(
+    'upstream_deduplicated_total', 'Upstream calls served by an identical call already in flight',
+    lambda: [({}, sum(stats['deduplicated'] for stats in upstream_client.stats.snapshot().values()))]
+)
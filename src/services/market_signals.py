@@ -0,0 +1,212 @@
+import math
+import threading
+import time
+
+import numpy as np
+
+from src.services.history_fetcher import iter_markets
+
+# A coin's 24h volume this many standard deviations above its own recent
+# samples, or its volume/market cap this far above the rest of the market,
+# is an anomaly
+VOLUME_ZSCORE_THRESHOLD = 3.0
+MARKET_ZSCORE_THRESHOLD = 2.5
+
+# Own-history z-scores need at least this many samples
+MIN_VOLUME_SAMPLES = 24
+
+# Coins in the top (bottom) share of momentum ranks are bullish (bearish) signals
+MOMENTUM_TAIL = 0.05
+
+# Most entries returned per signal list
+MAX_SIGNALS = 50
+
+
+def _clean(value, digits=4):
+    return round(float(value), digits) if value is not None and math.isfinite(value) else None
+
+
+def _percentile_ranks(values):
+    """Rank of each value in [0, 1]; NaNs rank lowest"""
+    order = np.argsort(np.nan_to_num(values, nan=-np.inf), kind='stable')
+    ranks = np.empty(len(values))
+    ranks[order] = np.arange(len(values))
+    return ranks / max(1, len(values) - 1)
+
+
+class VolumeHistory:
+    """Ring buffer of 24h volume samples for every coin seen, one row per coin.
+
+    All coins are sampled together, at most once per sample_seconds, so one
+    column holds one point in time and per-coin statistics are row reductions.
+    """
+
+    def __init__(self, window=168, sample_seconds=3600):
+        self.window = window
+        self.sample_seconds = sample_seconds
+        self.values = np.full((0, window), np.nan)
+        self.index = {}
+        self.position = 0
+        self.sampled_at = None
+
+    def rows(self, coin_ids):
+        """Return row indexes for coin_ids, adding rows for new coins, and the new coin ids"""
+        new = [coin_id for coin_id in coin_ids if coin_id not in self.index]
+        if new:
+            for coin_id in new:
+                self.index[coin_id] = len(self.index)
+            if len(self.index) > len(self.values):
+                grown = np.full((max(len(self.index), 2 * len(self.values)), self.window), np.nan)
+                grown[:len(self.values)] = self.values
+                self.values = grown
+        return np.array([self.index[coin_id] for coin_id in coin_ids], dtype=np.intp), new
+
+    def seed(self, coin_id, volumes):
+        """Fill an empty row with past hourly volumes, oldest overwritten first"""
+        volumes = np.asarray(volumes, dtype=np.float64)[-(self.window - 1):]
+        columns = (self.position - len(volumes) + np.arange(len(volumes))) % self.window
+        self.values[self.index[coin_id], columns] = volumes
+
+    def stats(self, rows):
+        """Per-row (mean, std, sample count) of the stored samples"""
+        samples = self.values[rows]
+        present = ~np.isnan(samples)
+        counts = present.sum(axis=1)
+        filled = np.where(present, samples, 0.0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mean = filled.sum(axis=1) / counts
+            variance = (filled * filled).sum(axis=1) / counts - mean * mean
+        return mean, np.sqrt(np.maximum(variance, 0)), counts
+
+    def sample(self, rows, volumes, now):
+        """Store volumes as the next column when sample_seconds have passed"""
+        if self.sampled_at is not None and now - self.sampled_at < self.sample_seconds:
+            return
+        self.values[:, self.position] = np.nan
+        self.values[rows, self.position] = volumes
+        self.position = (self.position + 1) % self.window
+        self.sampled_at = now
+
+
+class MarketSignalDetector:
+    """Volume anomalies and momentum signals across the whole coin universe in one pass.
+
+    Each scan reads the top `universe_size` coins from the cached markets
+    pages into arrays, then scores every coin at once: the z-score of its 24h
+    volume against its own recent samples, the z-score of its volume/market
+    cap ratio against the rest of the market, and percentile ranks of price
+    change and turnover. Coins with stored hourly history are seeded from the
+    price store the first time they are seen; must run in an application
+    context when a price store is given.
+    """
+
+    def __init__(self, client, price_store=None, universe_size=1000, reuse_seconds=30, history=None):
+        self.client = client
+        self.price_store = price_store
+        self.universe_size = universe_size
+        self.reuse_seconds = reuse_seconds
+        self.history = history or VolumeHistory()
+        self._lock = threading.Lock()
+        self._result = None
+        self._scanned_at = None
+
+    def scan(self):
+        """Return both signal lists, reusing a scan made within reuse_seconds"""
+        with self._lock:
+            now = time.time()
+            if self._result is None or now - self._scanned_at >= self.reuse_seconds:
+                self._result = self._scan(now)
+                self._scanned_at = now
+            return self._result
+
+    def _seed(self, coin_ids):
+        histories = self.price_store.load(coin_ids, days=self.history.window // 24, resolution='hourly')
+        for coin_id, history in histories.items():
+            volumes = history['volumes'][~np.isnan(history['volumes'])]
+            if len(volumes):
+                self.history.seed(coin_id, volumes)
+
+    def _scan(self, now):
+        coins = [coin for coin in iter_markets(self.client, limit=self.universe_size) if coin.get('id')]
+        if not coins:
+            return {'volume_anomalies': [], 'momentum_signals': [], 'universe_size': 0}
+
+        def column(key):
+            return np.array([coin.get(key) if coin.get(key) is not None else np.nan for coin in coins], dtype=np.float64)
+
+        ids = [coin['id'] for coin in coins]
+        volume = column('total_volume')
+        market_cap = column('market_cap')
+        change_24h = column('price_change_percentage_24h')
+        change_7d = column('price_change_percentage_7d_in_currency')
+
+        rows, new = self.history.rows(ids)
+        if new and self.price_store is not None:
+            self._seed(new)
+
+        # Volume against the coin's own history, before this cycle's sample joins it
+        mean, std, counts = self.history.stats(rows)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            own_z = np.where((counts >= MIN_VOLUME_SAMPLES) & (std > 0), (volume - mean) / std, np.nan)
+            turnover = np.where(market_cap > 0, volume / market_cap, np.nan)
+            log_turnover = np.log(np.where(turnover > 0, turnover, np.nan))
+        self.history.sample(rows, volume, now)
+
+        # Turnover against the rest of the market, on a log scale
+        spread = np.nanstd(log_turnover) if np.any(~np.isnan(log_turnover)) else 0
+        market_z = (log_turnover - np.nanmean(log_turnover)) / spread if spread else np.full(len(coins), np.nan)
+
+        own_score = np.nan_to_num(own_z / VOLUME_ZSCORE_THRESHOLD, nan=-np.inf)
+        market_score = np.nan_to_num(market_z / MARKET_ZSCORE_THRESHOLD, nan=-np.inf)
+        anomaly_score = np.maximum(own_score, market_score)
+        anomalous = np.flatnonzero(anomaly_score >= 1)
+        anomalous = anomalous[np.argsort(-anomaly_score[anomalous])][:MAX_SIGNALS]
+
+        # Momentum: price change ranks, confirmed by turnover
+        if np.any(~np.isnan(change_7d)):
+            momentum = 0.5 * _percentile_ranks(change_24h) + 0.3 * _percentile_ranks(change_7d) + 0.2 * _percentile_ranks(turnover)
+        else:
+            momentum = 0.7 * _percentile_ranks(change_24h) + 0.3 * _percentile_ranks(turnover)
+        momentum_rank = _percentile_ranks(momentum)
+        bullish = np.flatnonzero((momentum_rank >= 1 - MOMENTUM_TAIL) & (change_24h > 0))
+        bearish = np.flatnonzero((momentum_rank <= MOMENTUM_TAIL) & (change_24h < 0))
+        signalled = np.concatenate((bullish, bearish))
+        signalled = signalled[np.argsort(-np.abs(momentum_rank[signalled] - 0.5))][:MAX_SIGNALS]
+
+        def entry(i):
+            coin = coins[i]
+            return {
+                'coin_id': ids[i],
+                'symbol': (coin.get('symbol') or '').upper(),
+                'name': coin.get('name'),
+                'rank': coin.get('market_cap_rank'),
+                'current_price': coin.get('current_price'),
+                'volume_24h': _clean(volume[i], 2),
+                'market_cap': _clean(market_cap[i], 2),
+                'price_change_24h': _clean(change_24h[i], 2),
+                'volume_to_mcap': _clean(turnover[i])
+            }
+
+        return {
+            'volume_anomalies': [
+                {
+                    **entry(i),
+                    'volume_zscore': _clean(own_z[i], 2),
+                    'market_zscore': _clean(market_z[i], 2),
+                    'score': _clean(anomaly_score[i], 2),
+                    'signal': 'HISTORY' if own_score[i] >= market_score[i] else 'MARKET'
+                }
+                for i in anomalous
+            ],
+            'momentum_signals': [
+                {
+                    **entry(i),
+                    'price_change_7d': _clean(change_7d[i], 2),
+                    'momentum_rank': _clean(momentum_rank[i], 3),
+                    'score': _clean(momentum[i] * 100, 1),
+                    'direction': 'BULLISH' if change_24h[i] > 0 else 'BEARISH'
+                }
+                for i in signalled
+            ],
+            'universe_size': len(coins)
+        }
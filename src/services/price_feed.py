@@ -0,0 +1,135 @@
+import json
+import logging
+import queue
+import threading
+import time
+
+from src.services.history_fetcher import iter_markets
+
+logger = logging.getLogger(__name__)
+
+# Fields pushed to clients whenever they change
+STREAM_FIELDS = {
+    'price': 'current_price',
+    'change24h': 'price_change_percentage_24h',
+    'volume': 'total_volume'
+}
+
+
+class FeedFull(Exception):
+    """Raised when the feed already has its maximum number of subscribers"""
+
+
+def format_event(event, data):
+    """Serialize one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, separators=(',', ':'))}\n\n"
+
+
+class PriceFeed:
+    """One upstream poller that pushes changed price fields to every subscriber.
+
+    Diff events are serialized once per poll and shared by all subscriber
+    queues. The poller only runs while someone is subscribed, and at most
+    max_subscribers may be subscribed at once.
+    """
+
+    def __init__(self, client, coins=100, interval=60, queue_size=64, max_subscribers=None):
+        self.client = client
+        self.coins = coins
+        self.interval = interval
+        self.queue_size = queue_size
+        self.max_subscribers = max_subscribers
+        self._state = {}
+        self._version = 0
+        self._updated_at = None
+        self._subscribers = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def subscribe(self):
+        """Register a subscriber and return its event queue, raising FeedFull at the cap"""
+        subscriber = queue.Queue(maxsize=self.queue_size)
+        with self._lock:
+            if self.max_subscribers is not None and len(self._subscribers) >= self.max_subscribers:
+                raise FeedFull(f"Price stream is at its limit of {self.max_subscribers} clients")
+            self._subscribers.add(subscriber)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._poll_loop, name='price-feed', daemon=True)
+                self._thread.start()
+        return subscriber
+
+    def unsubscribe(self, subscriber):
+        with self._lock:
+            self._subscribers.discard(subscriber)
+
+    def snapshot(self):
+        """Return (version, full state) for a client that is just connecting"""
+        with self._lock:
+            return self._version, {coin_id: dict(fields) for coin_id, fields in self._state.items()}
+
+    def stats(self):
+        with self._lock:
+            return {
+                'subscribers': len(self._subscribers),
+                'coins': len(self._state),
+                'version': self._version,
+                'updated_at': self._updated_at,
+                'interval': self.interval,
+                'max_subscribers': self.max_subscribers
+            }
+
+    def _poll_loop(self):
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            started = time.monotonic()
+            try:
+                self.poll()
+            except Exception as e:
+                logger.warning("Error polling price feed: %s", e)
+            time.sleep(max(0, self.interval - (time.monotonic() - started)))
+
+    def poll(self):
+        """Read the top coins from the shared markets pages and broadcast what changed"""
+        coins = list(iter_markets(self.client, limit=self.coins))
+
+        changes = {}
+        with self._lock:
+            for coin in coins:
+                current = {field: coin.get(source) for field, source in STREAM_FIELDS.items()}
+                previous = self._state.get(coin['id'])
+                if previous is None:
+                    fields = dict(current, symbol=coin['symbol'].upper(), name=coin['name'], rank=coin['market_cap_rank'])
+                    self._state[coin['id']] = fields
+                    changes[coin['id']] = fields
+                    continue
+                diff = {field: value for field, value in current.items() if previous.get(field) != value}
+                if diff:
+                    previous.update(diff)
+                    changes[coin['id']] = diff
+
+            if not changes:
+                return
+            self._version += 1
+            self._updated_at = time.time()
+            version = self._version
+            subscribers = list(self._subscribers)
+
+        payload = format_event('update', {'version': version, 'changes': changes})
+        for subscriber in subscribers:
+            try:
+                subscriber.put_nowait((version, payload))
+            except queue.Full:
+                # Slow client: drop its backlog and ask it to resync from a snapshot
+                _drain(subscriber)
+                subscriber.put_nowait((version, None))
+
+
+def _drain(subscriber):
+    try:
+        while True:
+            subscriber.get_nowait()
+    except queue.Empty:
+        pass
@@ -0,0 +1,173 @@
+import math
+import time
+
+import numpy as np
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.exc import IntegrityError
+
+from src.models.price_history import PricePoint
+from src.models.user import db
+from src.services.history_fetcher import fetch_histories
+
+DAY_MS = 86400 * 1000
+
+# CoinGecko returns hourly points for 2-90 day windows and daily points beyond
+# 90 days, so each stored resolution has its own fetch window and retention.
+RESOLUTIONS = {
+    'hourly': {'min_days': 2, 'max_days': 90, 'retention_days': 90},
+    'daily': {'min_days': 91, 'max_days': None, 'retention_days': None}
+}
+
+
+class PriceStore:
+    """Local per-coin price history that only fetches the delta since the last stored point.
+
+    The client should be uncached: a cached or stale payload would overwrite
+    newer stored points with older ones. Must be used inside an application
+    context.
+    """
+
+    def __init__(self, client, refresh_interval=300):
+        self.client = client
+        self.refresh_interval = refresh_interval
+
+    def stored_ranges(self, coin_ids, resolution='hourly'):
+        """Return {coin_id: (first_timestamp, last_timestamp)} for the stored history"""
+        rows = db.session.execute(
+            select(PricePoint.coin_id, func.min(PricePoint.timestamp), func.max(PricePoint.timestamp))
+            .where(PricePoint.resolution == resolution, PricePoint.coin_id.in_(coin_ids))
+            .group_by(PricePoint.coin_id)
+        ).all()
+        return {coin_id: (first, last) for coin_id, first, last in rows}
+
+    def _fetch_window(self, coin_range, now, days, resolution):
+        # Returns the number of days to fetch, or None when local data is fresh
+        config = RESOLUTIONS[resolution]
+        if coin_range is not None:
+            first, last = coin_range
+            if now - last < self.refresh_interval * 1000:
+                return None
+            if days == 'max' or first <= now - (days - 1) * DAY_MS:
+                # Only the tail is missing
+                window = math.ceil((now - last) / DAY_MS) + 1
+                window = max(config['min_days'], window)
+                return min(window, config['max_days']) if config['max_days'] else window
+
+        if days == 'max':
+            return days
+        window = max(days, config['min_days'])
+        return min(window, config['max_days']) if config['max_days'] else window
+
+    def refresh(self, coin_ids, days=30, resolution='hourly'):
+        """Bring local history up to date, fetching only what is missing; returns errors by coin"""
+        now = int(time.time() * 1000)
+        ranges = self.stored_ranges(coin_ids, resolution)
+
+        by_window = {}
+        for coin_id in coin_ids:
+            window = self._fetch_window(ranges.get(coin_id), now, days, resolution)
+            if window is not None:
+                by_window.setdefault(window, []).append(coin_id)
+
+        errors = {}
+        for window, window_coins in by_window.items():
+            histories, failed = fetch_histories(self.client, window_coins, days=window)
+            errors.update(failed)
+            self._store(histories, resolution)
+
+        if by_window:
+            self._prune(now, resolution)
+        return errors
+
+    def _store(self, histories, resolution):
+        try:
+            for coin_id, data in histories.items():
+                rows = _to_rows(coin_id, resolution, data)
+                if not rows:
+                    continue
+                # Replace stored points inside the fetched span, including the
+                # previous live point, with the upstream version; anything newer
+                # than the last fetched point is kept
+                db.session.execute(
+                    delete(PricePoint).where(
+                        PricePoint.coin_id == coin_id,
+                        PricePoint.resolution == resolution,
+                        PricePoint.timestamp.between(rows[0]['timestamp'], rows[-1]['timestamp'])
+                    )
+                )
+                db.session.execute(insert(PricePoint), rows)
+            db.session.commit()
+        except IntegrityError:
+            # A concurrent refresh stored the same points first
+            db.session.rollback()
+
+    def _prune(self, now, resolution):
+        retention_days = RESOLUTIONS[resolution]['retention_days']
+        if retention_days is None:
+            return
+        db.session.execute(
+            delete(PricePoint).where(
+                PricePoint.resolution == resolution,
+                PricePoint.timestamp < now - retention_days * DAY_MS
+            )
+        )
+        db.session.commit()
+
+    def load(self, coin_ids, days=30, resolution='hourly'):
+        """Read stored history as NumPy arrays keyed by coin id, without touching upstream"""
+        query = select(
+            PricePoint.coin_id, PricePoint.timestamp, PricePoint.price,
+            PricePoint.volume, PricePoint.market_cap
+        ).where(PricePoint.resolution == resolution, PricePoint.coin_id.in_(coin_ids))
+        if days != 'max':
+            query = query.where(PricePoint.timestamp >= int(time.time() * 1000) - days * DAY_MS)
+        rows = db.session.execute(query.order_by(PricePoint.coin_id, PricePoint.timestamp)).all()
+        if not rows:
+            return {}
+
+        coins, timestamps, prices, volumes, market_caps = zip(*rows)
+        coins = np.array(coins)
+        timestamps = np.array(timestamps, dtype=np.int64)
+        prices = np.array(prices, dtype=np.float64)
+        volumes = np.array(volumes, dtype=np.float64)
+        market_caps = np.array(market_caps, dtype=np.float64)
+
+        boundaries = np.flatnonzero(coins[1:] != coins[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(coins)]))
+        return {
+            str(coins[start]): {
+                'timestamps': timestamps[start:end],
+                'prices': prices[start:end],
+                'volumes': volumes[start:end],
+                'market_caps': market_caps[start:end]
+            }
+            for start, end in zip(starts, ends)
+        }
+
+    def get_histories(self, coin_ids, days=30, resolution='hourly'):
+        """Refresh stale coins then read everything locally; returns (histories, errors)"""
+        errors = self.refresh(coin_ids, days=days, resolution=resolution)
+        return self.load(coin_ids, days=days, resolution=resolution), errors
+
+
+def _to_rows(coin_id, resolution, data):
+    """Convert a CoinGecko market_chart payload into price_history rows"""
+    if not data or not data.get('prices'):
+        return []
+    market_caps = dict(data.get('market_caps') or [])
+    volumes = dict(data.get('total_volumes') or [])
+
+    # Upstream occasionally repeats the final timestamp; keep the last value
+    points = {int(timestamp): price for timestamp, price in data['prices'] if price is not None}
+    return [
+        {
+            'coin_id': coin_id,
+            'resolution': resolution,
+            'timestamp': timestamp,
+            'price': price,
+            'market_cap': market_caps.get(timestamp),
+            'volume': volumes.get(timestamp)
+        }
+        for timestamp, price in sorted(points.items())
+    ]
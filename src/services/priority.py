@@ -0,0 +1,33 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from flask import has_request_context
+
+# Upstream request priorities, most urgent first
+INTERACTIVE = 'interactive'
+BACKGROUND = 'background'
+BACKFILL = 'backfill'
+PRIORITIES = (INTERACTIVE, BACKGROUND, BACKFILL)
+
+_priority = ContextVar('upstream_priority', default=None)
+
+
+def current_priority():
+    """Priority for upstream calls made here: the innermost upstream_priority block,
+    else interactive while serving a request and background on any other thread"""
+    priority = _priority.get()
+    if priority is not None:
+        return priority
+    return INTERACTIVE if has_request_context() else BACKGROUND
+
+
+@contextmanager
+def upstream_priority(priority):
+    """Run upstream calls made inside the block at the given priority"""
+    if priority not in PRIORITIES:
+        raise ValueError(f"Unknown upstream priority: {priority}")
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
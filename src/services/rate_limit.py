@@ -0,0 +1,100 @@
+import heapq
+import itertools
+import threading
+import time
+
+from src.services.priority import PRIORITIES
+
+
+class RateLimitExceeded(Exception):
+    """Raised when no upstream request token becomes available in time"""
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at a fixed rate per minute"""
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate_per_second = rate_per_minute / 60.0
+        self.capacity = capacity or max(1, rate_per_minute)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate_per_second)
+        self._updated = now
+
+    def acquire(self, timeout=None):
+        """Block until a token is available, raising RateLimitExceeded after timeout seconds"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate_per_second
+
+            if deadline is not None and now + wait > deadline:
+                raise RateLimitExceeded(f"No upstream request token available within {timeout}s")
+            time.sleep(wait)
+
+    def available(self):
+        """Return the number of whole tokens currently available"""
+        with self._lock:
+            self._refill(time.monotonic())
+            return int(self._tokens)
+
+
+class PriorityTokenBucket(TokenBucket):
+    """Token bucket that hands out tokens to waiting callers in priority order.
+
+    Callers queue by (priority rank, arrival); only the head of the queue may
+    take a token, so a backlog of low priority calls never delays a more
+    urgent one by more than the refill time of a single token.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None, priorities=PRIORITIES):
+        super().__init__(rate_per_minute, capacity)
+        self.priorities = priorities
+        self._waiters = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition(self._lock)
+
+    def acquire(self, timeout=None, priority=None):
+        """Block until this caller is first in line and a token is free; returns seconds waited"""
+        rank = self.priorities.index(priority or self.priorities[0])
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        entry = [rank, next(self._sequence)]
+        with self._condition:
+            heapq.heappush(self._waiters, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    self._refill(now)
+                    first = self._waiters[0] is entry
+                    if first and self._tokens >= 1:
+                        self._tokens -= 1
+                        return now - started
+
+                    # The head sleeps until its token refills; the rest until the head changes
+                    wait = (1 - self._tokens) / self.rate_per_second if first else None
+                    if deadline is not None:
+                        if first and now + wait > deadline or now >= deadline:
+                            raise RateLimitExceeded(f"No upstream request token available within {timeout}s")
+                        wait = min(wait, deadline - now) if wait is not None else deadline - now
+                    self._condition.wait(wait)
+            finally:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+                self._condition.notify_all()
+
+    def queue_depth(self):
+        """Return the number of callers waiting for a token, by priority"""
+        with self._lock:
+            depth = dict.fromkeys(self.priorities, 0)
+            for rank, _ in self._waiters:
+                depth[self.priorities[rank]] += 1
+            return depth
@@ -0,0 +1,291 @@
+import copy
+import logging
+import threading
+import time
+from dataclasses import dataclass
+
+from src.services.metrics import snapshot_compute_time
+from src.services.priority import BACKGROUND, upstream_priority
+
+logger = logging.getLogger(__name__)
+
+# Followers re-check leadership this often; shared snapshots are re-read at most this often
+FOLLOWER_POLL_SECONDS = 5
+SHARED_POLL_SECONDS = 1
+
+# On a cold start followers wait this long for the leader's first snapshot,
+# checking the store every LEADER_POLL_SECONDS, instead of computing it
+LEADER_WAIT_SECONDS = 30
+LEADER_POLL_SECONDS = 0.2
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    """A published job result; data is a private copy and must be treated as read-only"""
+    name: str
+    version: int
+    data: object
+    computed_at: float
+    duration: float
+
+
+class _Job:
+    def __init__(self, name, func, interval, warm=True):
+        self.name = name
+        self.func = func
+        self.interval = interval
+        self.warm = warm
+        self.lock = threading.Lock()
+        self.runs = 0
+        self.failures = 0
+        self.last_error = None
+
+
+class SnapshotScheduler:
+    """Recomputes registered jobs on a fixed cadence and publishes immutable snapshots.
+
+    Handlers read the latest snapshot instead of computing on the request thread.
+    With a shared store, snapshots are published to it and only the worker
+    process holding the store's leader lock recomputes; the others read what
+    the leader published.
+    """
+
+    def __init__(self, store=None):
+        self.store = store
+        self.leader = store is None
+        self._jobs = {}
+        self._snapshots = {}
+        self._stamps = {}
+        self._app = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._start_lock = threading.Lock()
+
+    @property
+    def running(self):
+        return bool(self._threads)
+
+    def register(self, name, func, interval, warm=True):
+        """Register func to be recomputed every interval seconds.
+
+        Jobs registered with warm=False (long batch work) are left out of
+        warm_up() and pending(), so they never hold back readiness.
+        """
+        self._jobs[name] = _Job(name, func, interval, warm)
+
+    def init_app(self, app):
+        """Run jobs inside app's application context"""
+        self._app = app
+
+    def start(self, app=None):
+        """Start one background thread per job; safe to call repeatedly"""
+        with self._start_lock:
+            if self._threads:
+                return
+            self._app = app or self._app
+            self._stop.clear()
+            if self.store is not None:
+                thread = threading.Thread(target=self._leader_loop, name='snapshot-leader', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+            for job in self._jobs.values():
+                thread = threading.Thread(target=self._loop, args=(job,), name=f'snapshot-{job.name}', daemon=True)
+                self._threads.append(thread)
+                thread.start()
+
+    def stop(self):
+        self._stop.set()
+        with self._start_lock:
+            for thread in self._threads:
+                thread.join(timeout=5)
+            self._threads = []
+
+    def _leader_loop(self):
+        while not self._stop.is_set():
+            try:
+                leader = self.store.acquire_leadership()
+            except Exception as e:
+                logger.warning("Snapshot leader election failed: %s", e)
+                leader = False
+            if leader != self.leader:
+                logger.info("Snapshot scheduler is now %s", 'the leader' if leader else 'a follower')
+            self.leader = leader
+            self._stop.wait(FOLLOWER_POLL_SECONDS)
+
+    def _loop(self, job):
+        while not self._stop.is_set():
+            if not self.leader:
+                self._stop.wait(FOLLOWER_POLL_SECONDS)
+                continue
+            # A new leader picks up where the previous one's published snapshots left off
+            snapshot = self.get(job.name)
+            age = time.time() - snapshot.computed_at if snapshot else None
+            if age is None or age >= job.interval:
+                with upstream_priority(BACKGROUND):
+                    self.run(job.name)
+                age = 0
+            self._stop.wait(max(0, job.interval - age))
+
+    def run(self, name):
+        """Recompute one job now and publish the result; returns the latest snapshot"""
+        job = self._jobs[name]
+        with job.lock:
+            return self._run_locked(job)
+
+    def _run_locked(self, job):
+        started = time.monotonic()
+        try:
+            if self._app is not None:
+                with self._app.app_context():
+                    data = job.func()
+            else:
+                data = job.func()
+        except Exception as e:
+            job.failures += 1
+            job.last_error = str(e)
+            snapshot_compute_time.observe(time.monotonic() - started, job=job.name, outcome='error')
+            logger.warning("Error computing snapshot %s: %s", job.name, e)
+            return self._snapshots.get(job.name)
+
+        previous = self.get(job.name)
+        snapshot = Snapshot(
+            name=job.name,
+            version=previous.version + 1 if previous else 1,
+            data=copy.deepcopy(data),
+            computed_at=time.time(),
+            duration=time.monotonic() - started
+        )
+        self._publish(snapshot)
+        snapshot_compute_time.observe(snapshot.duration, job=job.name, outcome='ok')
+        job.runs += 1
+        job.last_error = None
+        return snapshot
+
+    def _publish(self, snapshot):
+        self._snapshots[snapshot.name] = snapshot
+        if self.store is None:
+            return
+        try:
+            self.store.set(('snapshot', snapshot.name), snapshot)
+            self._stamps[snapshot.name] = (self.store.stamp(('snapshot', snapshot.name)), time.monotonic())
+        except Exception as e:
+            logger.warning("Error sharing snapshot %s: %s", snapshot.name, e)
+
+    def warm_up(self):
+        """Compute every missing snapshot on background threads"""
+        for name in self._warm_jobs():
+            threading.Thread(target=self._warm, args=(name,), name=f'warm-{name}', daemon=True).start()
+
+    def _warm(self, name):
+        try:
+            with upstream_priority(BACKGROUND):
+                self.get_or_compute(name)
+        except Exception as e:
+            logger.warning("Error warming snapshot %s: %s", name, e)
+
+    def _warm_jobs(self):
+        return [name for name, job in self._jobs.items() if job.warm]
+
+    def pending(self):
+        """Return the names of warm-up jobs that have no published snapshot yet"""
+        return [name for name in self._warm_jobs() if self.get(name) is None]
+
+    def get(self, name):
+        """Return the latest published snapshot, or None"""
+        if self.store is None:
+            return self._snapshots.get(name)
+
+        checked_at = self._stamps.get(name, (None, None))[1]
+        if checked_at is not None and time.monotonic() - checked_at < SHARED_POLL_SECONDS:
+            return self._snapshots.get(name)
+        return self._read_shared(name)
+
+    def _read_shared(self, name):
+        # Re-read from the shared store only when its copy has changed
+        stamp = self._stamps.get(name, (None, None))[0]
+        try:
+            latest = self.store.stamp(('snapshot', name))
+            if latest is not None and latest != stamp:
+                found = self.store.get(('snapshot', name))
+                if found is not None:
+                    self._snapshots[name] = found[1]
+            self._stamps[name] = (latest, time.monotonic())
+        except Exception as e:
+            logger.warning("Error reading shared snapshot %s: %s", name, e)
+        return self._snapshots.get(name)
+
+    def get_or_compute(self, name):
+        """Return the latest snapshot, computing it on the caller's thread only when needed.
+
+        That is on a cold start, or when the scheduler is not running and the
+        snapshot is older than its interval. A running follower never computes:
+        it waits up to LEADER_WAIT_SECONDS for the leader to publish.
+        """
+        job = self._jobs[name]
+        snapshot = self.get(name)
+        if snapshot is not None and (self.running or time.time() - snapshot.computed_at < job.interval):
+            return snapshot
+
+        if self.running and not self.leader:
+            latest = self._wait_for_leader(name)
+            if latest is None:
+                raise RuntimeError(f"Snapshot {name} has not been published by the leader yet")
+            return latest
+
+        with job.lock:
+            # Another caller may have published while we waited for the lock
+            latest = self._snapshots.get(name)
+            if latest is snapshot:
+                latest = self._run_locked(job)
+        if latest is None:
+            raise RuntimeError(f"Snapshot {name} is unavailable: {job.last_error}")
+        return latest
+
+    def _wait_for_leader(self, name):
+        deadline = time.monotonic() + LEADER_WAIT_SECONDS
+        while self.running and not self.leader:
+            snapshot = self._read_shared(name)
+            if snapshot is not None:
+                return snapshot
+            if time.monotonic() >= deadline or self._stop.wait(LEADER_POLL_SECONDS):
+                return None
+        # Took over leadership (or stopped) while waiting
+        return self.get_or_compute(name)
+
+    def version(self, *names):
+        """Return (versions, latest computed_at) for the named snapshots.
+
+        Returns (None, None) while any of them is missing or, with the
+        scheduler stopped, older than its interval.
+        """
+        now = time.time()
+        snapshots = [self.get(name) for name in names]
+        for name, snapshot in zip(names, snapshots):
+            if snapshot is None:
+                return None, None
+            if not self.running and now - snapshot.computed_at >= self._jobs[name].interval:
+                return None, None
+        # computed_at keeps tokens unique if two workers ever publish the same version
+        return tuple((snapshot.version, snapshot.computed_at) for snapshot in snapshots), max(snapshot.computed_at for snapshot in snapshots)
+
+    def status(self):
+        """Return per-job version, age and error information"""
+        now = time.time()
+        status = {}
+        for name, job in self._jobs.items():
+            snapshot = self.get(name)
+            status[name] = {
+                'interval': job.interval,
+                'version': snapshot.version if snapshot else 0,
+                'age_seconds': round(now - snapshot.computed_at, 1) if snapshot else None,
+                'duration_seconds': round(snapshot.duration, 3) if snapshot else None,
+                'runs': job.runs,
+                'failures': job.failures,
+                'last_error': job.last_error
+            }
+        return {
+            'running': self.running,
+            'leader': self.leader,
+            'store': self.store.name if self.store is not None else 'local',
+            'jobs': status
+        }
@@ -0,0 +1,180 @@
+import fcntl
+import hashlib
+import os
+import pickle
+import stat
+import struct
+import tempfile
+import time
+import uuid
+from urllib.parse import urlparse
+
+try:
+    import redis
+except ImportError:  # optional dependency
+    redis = None
+
+# A Redis leader that stops renewing hands over after this many seconds
+LEADER_LEASE_SECONDS = 30
+
+# File store writers remove expired entries and abandoned temp files this often
+PRUNE_SECONDS = 60
+
+# Each file starts with its expiry time (0 for none) so pruning reads 8 bytes
+_HEADER = struct.Struct('<d')
+
+
+def _digest(key):
+    return hashlib.sha1(repr(key).encode()).hexdigest()
+
+
+class FileStore:
+    """Cross-process store for workers on one host, backed by files in a shared directory.
+
+    Put the directory on tmpfs (/dev/shm) to keep it in memory. Writes are
+    atomic renames, and leadership is an exclusive flock that the OS releases
+    when the leader process exits. Entries are pickled (snapshots hold NumPy
+    tables), so the directory must be private to the workers' user: it is
+    created with mode 0700, and a directory owned by anyone else is refused.
+    """
+
+    name = 'file'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.geteuid():
+            raise RuntimeError(f"Shared cache directory {directory} must be a directory owned by this user")
+        if stat.S_IMODE(info.st_mode) & 0o077:
+            os.chmod(directory, 0o700)
+        self._lock_file = None
+        self._pruned_at = 0
+
+    def _path(self, key):
+        return os.path.join(self.directory, _digest(key))
+
+    def get(self, key):
+        """Return (stored_at, value), or None when missing or expired"""
+        try:
+            with open(self._path(key), 'rb') as f:
+                expires_at, = _HEADER.unpack(f.read(_HEADER.size))
+                if expires_at and expires_at < time.time():
+                    return None
+                stored_at, value = pickle.load(f)
+        except (OSError, EOFError, struct.error, pickle.UnpicklingError):
+            return None
+        return stored_at, value
+
+    def set(self, key, value, ttl=None):
+        now = time.time()
+        payload = _HEADER.pack(now + ttl if ttl else 0) + pickle.dumps((now, value), protocol=pickle.HIGHEST_PROTOCOL)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix='.tmp-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(payload)
+            os.replace(tmp_path, self._path(key))
+        except OSError:
+            os.unlink(tmp_path)
+            raise
+        if now - self._pruned_at >= PRUNE_SECONDS:
+            self._pruned_at = now
+            self.prune(now)
+
+    def prune(self, now=None):
+        """Delete expired entries and temp files left by interrupted writes; returns the number removed"""
+        now = now or time.time()
+        removed = 0
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.name.startswith('.tmp-'):
+                    expired = entry.stat().st_mtime < now - PRUNE_SECONDS
+                elif entry.name == 'leader.lock':
+                    continue
+                else:
+                    with open(entry.path, 'rb') as f:
+                        expires_at, = _HEADER.unpack(f.read(_HEADER.size))
+                    expired = 0 < expires_at < now
+                if expired:
+                    os.unlink(entry.path)
+                    removed += 1
+            except (OSError, struct.error):
+                # Replaced or removed by another worker meanwhile
+                continue
+        return removed
+
+    def stamp(self, key):
+        """Cheap token that changes whenever key is rewritten, or None when absent"""
+        try:
+            stat = os.stat(self._path(key))
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_mtime_ns
+
+    def acquire_leadership(self):
+        """Return True while this process holds the leader lock"""
+        if self._lock_file is not None:
+            return True
+        lock_file = open(os.path.join(self.directory, 'leader.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        return True
+
+
+class RedisStore:
+    """Cross-process store on any Redis-compatible server, shared across hosts"""
+
+    name = 'redis'
+
+    def __init__(self, url, prefix='traderdan'):
+        self.client = redis.Redis.from_url(url)
+        self.prefix = prefix
+        self._leader_id = uuid.uuid4().hex
+
+    def _key(self, key):
+        return f'{self.prefix}:{_digest(key)}'
+
+    def get(self, key):
+        payload = self.client.get(self._key(key))
+        if payload is None:
+            return None
+        return pickle.loads(payload)
+
+    def set(self, key, value, ttl=None):
+        payload = pickle.dumps((time.time(), value), protocol=pickle.HIGHEST_PROTOCOL)
+        expire = int(ttl) if ttl else None
+        with self.client.pipeline() as pipe:
+            pipe.set(self._key(key), payload, ex=expire)
+            pipe.set(self._key(key) + ':stamp', uuid.uuid4().hex, ex=expire)
+            pipe.execute()
+
+    def stamp(self, key):
+        return self.client.get(self._key(key) + ':stamp')
+
+    def acquire_leadership(self):
+        lock_key = f'{self.prefix}:leader'
+        if self.client.set(lock_key, self._leader_id, nx=True, ex=LEADER_LEASE_SECONDS):
+            return True
+        if self.client.get(lock_key) == self._leader_id.encode():
+            self.client.expire(lock_key, LEADER_LEASE_SECONDS)
+            return True
+        return False
+
+
+def open_store(url):
+    """Open the store named by SHARED_CACHE_URL (file:///path or redis://host), or None"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme == 'file':
+        return FileStore(parsed.path)
+    if parsed.scheme in ('redis', 'rediss', 'unix'):
+        if redis is None:
+            raise RuntimeError("SHARED_CACHE_URL points at Redis but the redis package is not installed")
+        return RedisStore(url)
+    raise ValueError(f"Unsupported SHARED_CACHE_URL scheme: {parsed.scheme}")
+
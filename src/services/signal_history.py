@@ -0,0 +1,306 @@
+import time
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import insert, select, update
+
+from src.models.signal_history import CoinSignalRollup, DailySignalRollup, PickRecord, SignalRecord
+from src.models.user import db
+from src.services.backtest import HOLD_DAYS
+from src.services.history_fetcher import iter_markets
+from src.services.swing_scanner import RISK_LEVELS
+
+DAY_MS = 86400 * 1000
+
+# Snapshots whose entries are stored as signals, by signal kind
+SIGNAL_SOURCES = {
+    'volume_anomaly': 'volume_anomalies',
+    'momentum': 'momentum_signals'
+}
+
+# A coin flagged again by the same detector within this window is stored once
+SIGNAL_COOLDOWN_SECONDS = 3600
+
+# Entry keys read as a signal's strength, in order of preference
+STRENGTH_KEYS = ('score', 'strength', 'anomaly_score', 'momentum_score', 'volume_ratio', 'volume_spike')
+
+ROLLUP_TOTALS = ('signals', 'confidence_sum', 'closed', 'wins', 'return_sum')
+
+LEADERBOARD_SORTS = ('win_rate', 'avg_return', 'signals')
+
+
+def _day(timestamp):
+    return datetime.fromtimestamp(timestamp / 1000, tz=timezone.utc).date()
+
+
+def _first_number(entry, keys):
+    for key in keys:
+        value = entry.get(key)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+    return None
+
+
+def _rates(totals):
+    """Turn summed rollup columns into counts and averages"""
+    signals, closed = totals['signals'], totals['closed']
+    return {
+        'signals': signals,
+        'closed': closed,
+        'wins': totals['wins'],
+        'win_rate': round(totals['wins'] / closed * 100, 2) if closed else None,
+        'avg_return': round(totals['return_sum'] / closed * 100, 2) if closed else None,
+        'avg_confidence': round(totals['confidence_sum'] / signals, 1) if signals and totals['confidence_sum'] else None
+    }
+
+
+class _RollupBatch:
+    """Rollup increments gathered during one recording pass, applied in a single flush"""
+
+    def __init__(self):
+        self.daily = {}
+        self.coins = {}
+
+    def add(self, recorded_at, kind, coin_id, risk_level='', **totals):
+        for table, key in ((self.daily, (_day(recorded_at), kind, risk_level)), (self.coins, (coin_id, kind))):
+            current = table.setdefault(key, dict.fromkeys(ROLLUP_TOTALS, 0))
+            for name, value in totals.items():
+                current[name] += value
+        if totals.get('signals'):
+            latest = self.coins[(coin_id, kind)]
+            latest['last_recorded_at'] = max(latest.get('last_recorded_at') or 0, recorded_at)
+
+    def flush(self):
+        self._apply(DailySignalRollup, ('day', 'kind', 'risk_level'), self.daily)
+        self._apply(CoinSignalRollup, ('coin_id', 'kind'), self.coins)
+
+    @staticmethod
+    def _apply(model, key_columns, increments):
+        if not increments:
+            return
+        first = getattr(model, key_columns[0])
+        rows = db.session.scalars(select(model).where(first.in_({key[0] for key in increments}))).all()
+        existing = {tuple(getattr(row, column) for column in key_columns): row for row in rows}
+        for key, totals in increments.items():
+            row = existing.get(key)
+            if row is None:
+                row = model(**dict(zip(key_columns, key)), **dict.fromkeys(ROLLUP_TOTALS, 0))
+                db.session.add(row)
+            for name in ROLLUP_TOTALS:
+                setattr(row, name, getattr(row, name) + totals[name])
+            if totals.get('last_recorded_at'):
+                row.last_recorded_at = max(row.last_recorded_at or 0, totals['last_recorded_at'])
+
+
+class SignalRecorder:
+    """Stores picks and signals from the published snapshots, and closes picks as prices move.
+
+    Runs as a snapshot job inside an application context. New rows are bulk
+    inserted and the rollup tables are updated in the same transaction, so the
+    analytics queries below only ever read a few pre-aggregated rows. A coin
+    with an open pick is not picked again until that pick closes.
+    """
+
+    def __init__(self, scheduler, client, picks_per_scan=10, universe_size=250):
+        self.scheduler = scheduler
+        self.client = client
+        self.picks_per_scan = picks_per_scan
+        self.universe_size = universe_size
+        self._stored_versions = {}
+
+    def _new_snapshot(self, name):
+        # Each published snapshot is stored once
+        snapshot = self.scheduler.get(name)
+        if snapshot is None or self._stored_versions.get(name) == snapshot.version:
+            return None
+        self._stored_versions[name] = snapshot.version
+        return snapshot
+
+    def record(self):
+        """Store anything new since the last pass and return what was written"""
+        now = int(time.time() * 1000)
+        rollups = _RollupBatch()
+        try:
+            picks = self._record_picks(rollups)
+            signals = {kind: self._record_signals(kind, source, rollups) for kind, source in SIGNAL_SOURCES.items()}
+            closed = self._close_picks(now, rollups)
+            rollups.flush()
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            self._stored_versions.clear()
+            raise
+        return {'picks': picks, 'signals': signals, 'closed': closed, 'recorded_at': now}
+
+    def _record_picks(self, rollups):
+        snapshot = self._new_snapshot('swing_opportunities')
+        if snapshot is None:
+            return 0
+        recorded_at = int(snapshot.computed_at * 1000)
+        _, indexes = snapshot.data.select(self.picks_per_scan)
+        picks = [snapshot.data.by_confidence[i] for i in indexes]
+        if not picks:
+            return 0
+
+        open_coins = set(db.session.scalars(
+            select(PickRecord.coin_id).where(
+                PickRecord.outcome.is_(None), PickRecord.coin_id.in_([opp.coin_id for opp in picks])
+            )
+        ))
+        rows = [
+            {
+                'recorded_at': recorded_at,
+                'coin_id': opp.coin_id,
+                'symbol': opp.symbol,
+                'risk_level': opp.risk_level,
+                'confidence': opp.entry_confidence,
+                'value_score': opp.value_score,
+                'price': opp.current_price,
+                'entry_point': opp.entry_point,
+                'exit_point': opp.exit_point,
+                'price_target': opp.price_target,
+                'stop_loss': opp.stop_loss
+            }
+            for opp in picks if opp.coin_id not in open_coins and opp.current_price
+        ]
+        if rows:
+            db.session.execute(insert(PickRecord), rows)
+        for row in rows:
+            rollups.add(recorded_at, 'pick', row['coin_id'], row['risk_level'], signals=1, confidence_sum=row['confidence'])
+        return len(rows)
+
+    def _record_signals(self, kind, source, rollups):
+        snapshot = self._new_snapshot(source)
+        if snapshot is None or not isinstance(snapshot.data, list):
+            return 0
+        recorded_at = int(snapshot.computed_at * 1000)
+        entries = {}
+        for entry in snapshot.data:
+            coin_id = (entry.get('coin_id') or entry.get('id')) if isinstance(entry, dict) else None
+            if coin_id:
+                entries.setdefault(coin_id, entry)
+        if not entries:
+            return 0
+
+        recent = set(db.session.scalars(
+            select(SignalRecord.coin_id).where(
+                SignalRecord.kind == kind,
+                SignalRecord.recorded_at > recorded_at - SIGNAL_COOLDOWN_SECONDS * 1000,
+                SignalRecord.coin_id.in_(list(entries))
+            )
+        ))
+        rows = [
+            {
+                'kind': kind,
+                'recorded_at': recorded_at,
+                'coin_id': coin_id,
+                'price': _first_number(entry, ('current_price', 'price')),
+                'strength': _first_number(entry, STRENGTH_KEYS),
+                'details': entry
+            }
+            for coin_id, entry in entries.items() if coin_id not in recent
+        ]
+        if rows:
+            db.session.execute(insert(SignalRecord), rows)
+        for row in rows:
+            rollups.add(recorded_at, kind, row['coin_id'], signals=1)
+        return len(rows)
+
+    def _close_picks(self, now, rollups):
+        open_picks = db.session.execute(
+            select(
+                PickRecord.id, PickRecord.recorded_at, PickRecord.coin_id, PickRecord.risk_level,
+                PickRecord.price, PickRecord.exit_point, PickRecord.stop_loss
+            ).where(PickRecord.outcome.is_(None))
+        ).all()
+        if not open_picks:
+            return 0
+
+        prices = {coin['id']: coin.get('current_price') for coin in iter_markets(self.client, limit=self.universe_size)}
+        updates = []
+        for pick in open_picks:
+            price = prices.get(pick.coin_id)
+            expired = now - pick.recorded_at >= HOLD_DAYS[pick.risk_level] * DAY_MS
+            if price and pick.exit_point and price >= pick.exit_point:
+                outcome = 'target'
+            elif price and pick.stop_loss and price <= pick.stop_loss:
+                outcome = 'stop'
+            elif expired:
+                outcome = 'expired'
+            else:
+                continue
+            # Returns are measured from the price when the pick was published
+            return_pct = price / pick.price - 1 if price else None
+            updates.append({'id': pick.id, 'outcome': outcome, 'closed_at': now, 'return_pct': return_pct})
+            if return_pct is not None:
+                rollups.add(
+                    pick.recorded_at, 'pick', pick.coin_id, pick.risk_level,
+                    closed=1, wins=int(return_pct > 0), return_sum=return_pct
+                )
+        if updates:
+            db.session.execute(update(PickRecord), updates)
+        return len(updates)
+
+
+def performance(kind, days=30):
+    """Totals, per risk level and per day statistics for one kind over the last `days` days"""
+    since = datetime.now(timezone.utc).date() - timedelta(days=days - 1)
+    rows = db.session.scalars(
+        select(DailySignalRollup)
+        .where(DailySignalRollup.kind == kind, DailySignalRollup.day >= since)
+        .order_by(DailySignalRollup.day)
+    ).all()
+
+    total = dict.fromkeys(ROLLUP_TOTALS, 0)
+    by_risk, by_day = {}, {}
+    for row in rows:
+        for bucket in (total, by_risk.setdefault(row.risk_level, dict.fromkeys(ROLLUP_TOTALS, 0)),
+                       by_day.setdefault(row.day, dict.fromkeys(ROLLUP_TOTALS, 0))):
+            for name in ROLLUP_TOTALS:
+                bucket[name] += getattr(row, name)
+    return {
+        'kind': kind,
+        'days': days,
+        'totals': _rates(total),
+        'by_risk': {level: _rates(by_risk[level]) for level in RISK_LEVELS if level in by_risk} if kind == 'pick' else {},
+        'daily': [{'day': day.isoformat(), **_rates(totals)} for day, totals in by_day.items()]
+    }
+
+
+def leaderboard(kind, limit=20, sort=None, min_closed=None):
+    """Coins ranked by win rate, average return or signal count"""
+    sort = sort or ('win_rate' if kind == 'pick' else 'signals')
+    min_closed = min_closed or 0
+    if sort != 'signals':
+        # Rates are only defined once something has closed
+        min_closed = max(min_closed, 1)
+    order = {
+        'win_rate': CoinSignalRollup.wins * 1.0 / CoinSignalRollup.closed,
+        'avg_return': CoinSignalRollup.return_sum / CoinSignalRollup.closed,
+        'signals': CoinSignalRollup.signals
+    }[sort]
+    rows = db.session.scalars(
+        select(CoinSignalRollup)
+        .where(CoinSignalRollup.kind == kind, CoinSignalRollup.closed >= min_closed)
+        .order_by(order.desc(), CoinSignalRollup.signals.desc())
+        .limit(limit)
+    ).all()
+    return [
+        {
+            'coin_id': row.coin_id,
+            'last_recorded_at': row.last_recorded_at,
+            **_rates({name: getattr(row, name) for name in ROLLUP_TOTALS})
+        }
+        for row in rows
+    ]
+
+
+def coin_history(coin_id, kind, limit=50, before=None):
+    """Stored records for one coin, newest first; pass the last recorded_at as `before` for the next page"""
+    model = PickRecord if kind == 'pick' else SignalRecord
+    query = select(model).where(model.coin_id == coin_id)
+    if kind != 'pick':
+        query = query.where(SignalRecord.kind == kind)
+    if before is not None:
+        query = query.where(model.recorded_at < before)
+    rows = db.session.scalars(query.order_by(model.recorded_at.desc()).limit(limit)).all()
+    return [row.to_dict() for row in rows]
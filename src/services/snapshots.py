@@ -0,0 +1,81 @@
+import os
+from datetime import datetime
+
+from src.services.category_aggregates import DEFAULT_CATEGORY_IDS, CategoryAggregator, CategoryFeed
+from src.services.market_data import market_analyzer, coingecko_client, price_store, shared_store
+from src.services.market_signals import MarketSignalDetector
+from src.services.scheduler import SnapshotScheduler
+
+# Recompute cadence (seconds) for each published snapshot
+SNAPSHOT_INTERVALS = {
+    'global_overview': 60,
+    'trending': 300,
+    'volume_anomalies': 120,
+    'momentum_signals': 120,
+    'market_signals': 120,
+    'category_performance': 600,
+    'category_aggregates': 60,
+    'swing_opportunities': 300,
+    'market_table': 60,
+    'live_indicators': 60,
+    'backtest': 3600,  # checks the stored run; reruns after BACKTEST_MAX_AGE_SECONDS
+    'signal_history': 120
+}
+
+# Set BACKGROUND_JOBS=false to compute snapshots on demand instead
+BACKGROUND_JOBS_ENABLED = os.environ.get('BACKGROUND_JOBS', 'true').lower() == 'true'
+
+# Set WARMUP_ON_START=true to compute snapshots as soon as a worker boots
+# instead of on the first request; /ready reports 503 until they exist
+WARMUP_ON_START = os.environ.get('WARMUP_ON_START', 'false').lower() == 'true'
+
+# With a shared store only the leader worker recomputes; the others read its snapshots
+snapshot_scheduler = SnapshotScheduler(store=shared_store)
+
+# Jobs call the analyzer directly so every run recomputes; its
+# upstream calls still go through the shared cache and rate limiter. The
+# lambdas keep the analyzer from being built until a job first runs.
+snapshot_scheduler.register('global_overview', lambda: market_analyzer.get_global_market_overview(), SNAPSHOT_INTERVALS['global_overview'])
+snapshot_scheduler.register('trending', lambda: market_analyzer.get_trending_coins(), SNAPSHOT_INTERVALS['trending'])
+snapshot_scheduler.register('volume_anomalies', lambda: market_analyzer.scan_volume_anomalies(), SNAPSHOT_INTERVALS['volume_anomalies'])
+snapshot_scheduler.register('momentum_signals', lambda: market_analyzer.scan_momentum_signals(), SNAPSHOT_INTERVALS['momentum_signals'])
+snapshot_scheduler.register('category_performance', lambda: market_analyzer.analyze_category_performance(), SNAPSHOT_INTERVALS['category_performance'])
+
+# Whole-universe volume anomalies and momentum signals from one vectorized
+# scan, served on their own endpoint next to the analyzer's lists
+market_signals = MarketSignalDetector(
+    coingecko_client,
+    price_store=price_store,
+    universe_size=int(os.environ.get('MARKET_SIGNAL_COINS', 1000))
+)
+snapshot_scheduler.register('market_signals', market_signals.scan, SNAPSHOT_INTERVALS['market_signals'])
+
+# Category aggregates are running totals; each cycle folds in only the coins
+# that changed. Members come from CoinGecko's categories (CATEGORY_IDS) or a
+# CATEGORY_MAP_PATH file.
+category_aggregator = CategoryAggregator()
+category_feed = CategoryFeed(
+    coingecko_client,
+    category_aggregator,
+    coins=int(os.environ.get('CATEGORY_COINS', 1000)),
+    category_ids=[category_id.strip() for category_id in os.environ.get('CATEGORY_IDS', ','.join(DEFAULT_CATEGORY_IDS)).split(',') if category_id.strip()],
+    map_path=os.environ.get('CATEGORY_MAP_PATH'),
+    membership_seconds=int(os.environ.get('CATEGORY_MEMBERSHIP_SECONDS', 3600))
+)
+snapshot_scheduler.register('category_aggregates', category_feed.refresh, SNAPSHOT_INTERVALS['category_aggregates'])
+
+
+def snapshot_data(name):
+    """Return the data of the latest snapshot, computing it if none is published yet"""
+    return snapshot_scheduler.get_or_compute(name).data
+
+
+def snapshot_version(*names):
+    """Build a cached_response version callable for views served from the named snapshots"""
+    return lambda: snapshot_scheduler.version(*names)
+
+
+def snapshot_time(*names):
+    """Return when the newest of the named snapshots was computed, as an ISO timestamp"""
+    computed = [snapshot.computed_at for snapshot in map(snapshot_scheduler.get, names) if snapshot]
+    return datetime.fromtimestamp(max(computed)).isoformat() if computed else datetime.now().isoformat()
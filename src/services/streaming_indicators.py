@@ -0,0 +1,247 @@
+import math
+import threading
+import time
+from collections import deque
+
+# Incremental counterparts of the batch indicators in indicators.py. Each
+# keeps O(1) state per coin: committed bars are folded in with commit(), and
+# peek(x) evaluates the indicator as if x were the next bar without changing
+# any state, so the in-progress bar can move on every tick.
+
+NAN = float('nan')
+
+
+class RunningEMA:
+    """Recursive smoothing seeded with the SMA of the first `period` values"""
+
+    def __init__(self, period, alpha=None):
+        self.period = period
+        self.alpha = alpha if alpha is not None else 2.0 / (period + 1)
+        self.count = 0
+        self._seed_sum = 0.0
+        self.value = NAN
+
+    def _next(self, x):
+        if self.count + 1 < self.period:
+            return NAN
+        if self.count + 1 == self.period:
+            return (self._seed_sum + x) / self.period
+        return self.value + self.alpha * (x - self.value)
+
+    def peek(self, x):
+        return self._next(x)
+
+    def commit(self, x):
+        self.value = self._next(x)
+        if self.count < self.period:
+            self._seed_sum += x
+        self.count += 1
+
+
+class RunningRSI:
+    """Wilder RSI from running average gains and losses"""
+
+    def __init__(self, period=14):
+        self.gain = RunningEMA(period, 1.0 / period)
+        self.loss = RunningEMA(period, 1.0 / period)
+        self.last = None
+
+    @staticmethod
+    def _rsi(avg_gain, avg_loss):
+        if math.isnan(avg_gain):
+            return NAN
+        if avg_loss == 0:
+            return 50.0 if avg_gain == 0 else 100.0
+        return 100 - 100 / (1 + avg_gain / avg_loss)
+
+    def peek(self, x):
+        if self.last is None:
+            return NAN
+        change = x - self.last
+        return self._rsi(self.gain.peek(max(change, 0.0)), self.loss.peek(max(-change, 0.0)))
+
+    def commit(self, x):
+        if self.last is not None:
+            change = x - self.last
+            self.gain.commit(max(change, 0.0))
+            self.loss.commit(max(-change, 0.0))
+        self.last = x
+
+
+class RollingWindow:
+    """Rolling mean, population std, min and max over the last `window` values.
+
+    Holds the last window - 1 committed values so a peeked value completes the
+    window. Min and max come from monotonic deques: each value is pushed and
+    popped at most once, so updates are amortized O(1).
+    """
+
+    def __init__(self, window):
+        self.window = window
+        self._values = deque()
+        self._sum = 0.0
+        self._sumsq = 0.0
+        self._mins = deque()
+        self._maxs = deque()
+        self._index = 0
+
+    def peek_stats(self, x):
+        """Return (mean, std) including x, or NaNs until the window is full"""
+        if len(self._values) + 1 < self.window:
+            return NAN, NAN
+        total = self._sum + x
+        mean = total / self.window
+        variance = max(0.0, (self._sumsq + x * x) / self.window - mean * mean)
+        return mean, math.sqrt(variance)
+
+    def peek_extremes(self, x):
+        """Return (min, max) over the held values and x"""
+        low = min(self._mins[0][1], x) if self._mins else x
+        high = max(self._maxs[0][1], x) if self._maxs else x
+        return low, high
+
+    def commit(self, x):
+        self._values.append(x)
+        self._sum += x
+        self._sumsq += x * x
+        if len(self._values) > self.window - 1:
+            old = self._values.popleft()
+            self._sum -= old
+            self._sumsq -= old * old
+
+        while self._mins and self._mins[-1][1] >= x:
+            self._mins.pop()
+        self._mins.append((self._index, x))
+        while self._maxs and self._maxs[-1][1] <= x:
+            self._maxs.pop()
+        self._maxs.append((self._index, x))
+
+        oldest = self._index - (self.window - 1) + 1
+        if self._mins[0][0] < oldest:
+            self._mins.popleft()
+        if self._maxs[0][0] < oldest:
+            self._maxs.popleft()
+        self._index += 1
+
+
+class IncrementalIndicators:
+    """Every indicator of latest_indicators() for one coin, updated in O(1) per bar or tick.
+
+    The series is the committed bars plus the bar in progress, whose price
+    moves with each tick until roll() commits it and starts the next bar.
+    """
+
+    def __init__(self, rsi_period=14, level_window=30, history_bars=720):
+        self.rsi = RunningRSI(rsi_period)
+        self.ema_12 = RunningEMA(12)
+        self.ema_26 = RunningEMA(26)
+        self.macd_signal = RunningEMA(9)
+        self.sma_50 = RollingWindow(50)
+        self.bollinger = RollingWindow(20)
+        self.levels = RollingWindow(level_window)
+        self.atr = RunningEMA(14, 1.0 / 14)
+        self.closes = deque(maxlen=history_bars - 1)
+        self.current = None
+
+    def _macd(self, x):
+        return self.ema_12.peek(x) - self.ema_26.peek(x)
+
+    def _true_range(self, x):
+        # Close-only series: high == low == close
+        return abs(x - self.closes[-1]) if self.closes else 0.0
+
+    def _commit(self, close):
+        macd_line = self._macd(close)
+        if not math.isnan(macd_line):
+            self.macd_signal.commit(macd_line)
+        self.atr.commit(self._true_range(close))
+        for indicator in (self.rsi, self.ema_12, self.ema_26, self.sma_50, self.bollinger, self.levels):
+            indicator.commit(close)
+        self.closes.append(close)
+
+    def roll(self, price):
+        """Commit the bar in progress and start a new one at price"""
+        if self.current is not None:
+            self._commit(self.current)
+        self.current = price
+
+    def tick(self, price):
+        """Move the price of the bar in progress"""
+        self.current = price
+
+    def values(self):
+        """Latest value of every indicator, NaN where history is too short"""
+        price = self.current
+        if price is None:
+            return None
+        ema_12, ema_26 = self.ema_12.peek(price), self.ema_26.peek(price)
+        macd_line = ema_12 - ema_26
+        signal = self.macd_signal.peek(macd_line) if not math.isnan(macd_line) else NAN
+        middle, std = self.bollinger.peek_stats(price)
+        support, resistance = self.levels.peek_extremes(price)
+        return {
+            'current_price': price,
+            'first_price': self.closes[0] if self.closes else price,
+            'rsi': self.rsi.peek(price),
+            'ema_12': ema_12,
+            'ema_26': ema_26,
+            'sma_50': self.sma_50.peek_stats(price)[0],
+            'macd': macd_line,
+            'macd_signal': signal,
+            'macd_histogram': macd_line - signal,
+            'bollinger_middle': middle,
+            'bollinger_upper': middle + 2 * std,
+            'bollinger_lower': middle - 2 * std,
+            'atr': self.atr.peek(self._true_range(price)),
+            'support': support,
+            'resistance': resistance
+        }
+
+
+class IndicatorBook:
+    """Incremental indicators for many coins: seeded once from bar history, then ticked.
+
+    A tick moves the coin's bar in progress; once bar_seconds have passed
+    since that bar started it is committed and the tick opens the next one.
+    """
+
+    def __init__(self, bar_seconds=3600, **indicator_options):
+        self.bar_seconds = bar_seconds
+        self._indicator_options = indicator_options
+        self._coins = {}
+        self._lock = threading.Lock()
+
+    def __contains__(self, coin_id):
+        return coin_id in self._coins
+
+    def __len__(self):
+        return len(self._coins)
+
+    def seed(self, coin_id, timestamps, prices):
+        """Replay stored history (timestamps in ms); the last point is the bar in progress"""
+        indicators = IncrementalIndicators(**self._indicator_options)
+        for price in prices:
+            indicators.roll(float(price))
+        with self._lock:
+            self._coins[coin_id] = [indicators, timestamps[-1] / 1000]
+
+    def tick(self, coin_id, price, at=None):
+        """Apply one live price in O(1); returns False for coins that were never seeded"""
+        at = at if at is not None else time.time()
+        with self._lock:
+            entry = self._coins.get(coin_id)
+            if entry is None:
+                return False
+            indicators, bar_started = entry
+            if at - bar_started >= self.bar_seconds:
+                indicators.roll(float(price))
+                entry[1] = at
+            else:
+                indicators.tick(float(price))
+        return True
+
+    def values(self, coin_ids=None):
+        """Return {coin_id: latest indicator values} for the given (or all) seeded coins"""
+        with self._lock:
+            coin_ids = self._coins.keys() if coin_ids is None else [c for c in coin_ids if c in self._coins]
+            return {coin_id: self._coins[coin_id][0].values() for coin_id in coin_ids}
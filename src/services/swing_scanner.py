@@ -0,0 +1,286 @@
+from dataclasses import dataclass, field
+from datetime import datetime
+
+import numpy as np
+
+from src.services.history_fetcher import MARKET_PAGE_SIZE, iter_markets
+from src.services.indicators import rsi, support_resistance
+from src.services.table import IndexedTable
+
+RISK_LEVELS = ('LOW', 'MEDIUM', 'HIGH')
+
+TIME_HORIZONS = {
+    'LOW': '3-4 weeks',
+    'MEDIUM': '2-3 weeks',
+    'HIGH': '1-2 weeks'
+}
+
+# Stop loss suggestion relative to the entry point
+STOP_LOSS_RATIO = 0.95
+
+
+def _pct_return(start, end):
+    return round(((end - start) / start) * 100, 2) if start and end else 0
+
+
+@dataclass(frozen=True, slots=True)
+class Opportunity:
+    coin_id: str
+    coin_name: str
+    symbol: str
+    rank: int
+    current_price: float
+    entry_point: float
+    exit_point: float
+    price_target: float
+    entry_confidence: int
+    risk_level: str
+    time_horizon: str
+    description: str
+    swing_signals: tuple
+    rsi_14d: float
+    volume_trend: str
+    momentum: str
+    support_level: float
+    resistance_level: float
+    market_cap: float
+    volume_24h: float
+    price_change_24h: float
+    price_change_7d: float
+    value_score: int
+    # Derived values, precomputed once per scan
+    stop_loss: float = field(init=False)
+    entry_to_exit_return: float = field(init=False)
+    entry_to_target_return: float = field(init=False)
+    current_to_target_return: float = field(init=False)
+
+    def __post_init__(self):
+        entry = self.entry_point or self.current_price
+        object.__setattr__(self, 'stop_loss', entry * STOP_LOSS_RATIO if entry else None)
+        object.__setattr__(self, 'entry_to_exit_return', _pct_return(self.entry_point, self.exit_point))
+        object.__setattr__(self, 'entry_to_target_return', _pct_return(self.entry_point, self.price_target))
+        object.__setattr__(self, 'current_to_target_return', _pct_return(self.current_price, self.price_target))
+
+
+# Numeric table columns for sorting and range filters, and the attribute each reads
+OPPORTUNITY_COLUMNS = {
+    'confidence': 'entry_confidence',
+    'rank': 'rank',
+    'price': 'current_price',
+    'potential_return': 'current_to_target_return',
+    'market_cap': 'market_cap',
+    'volume': 'volume_24h',
+    'change24h': 'price_change_24h',
+    'value_score': 'value_score'
+}
+
+# Lower bounds of the medium and high confidence bands
+CONFIDENCE_BANDS = (80, 90)
+
+
+class OpportunitySnapshot:
+    """Scored opportunities from one scan, held as one confidence-ordered columnar table.
+
+    Filters, risk buckets and summary statistics are NumPy operations on the
+    table columns rather than loops over the opportunity records.
+    """
+
+    def __init__(self, opportunities, scanned_at=None, universe_size=0):
+        ranked = sorted(opportunities, key=lambda opp: (opp.entry_confidence, opp.value_score), reverse=True)
+        columns = {
+            column: [getattr(opp, attribute) for opp in ranked]
+            for column, attribute in OPPORTUNITY_COLUMNS.items()
+        }
+        columns['risk'] = [RISK_LEVELS.index(opp.risk_level) for opp in ranked]
+        self.table = IndexedTable(ranked, columns)
+        self.by_id = {opp.coin_id: opp for opp in ranked}
+        self.scanned_at = scanned_at or datetime.now().isoformat()
+        self.universe_size = universe_size
+
+    def __len__(self):
+        return len(self.table)
+
+    @property
+    def by_confidence(self):
+        return self.table.rows
+
+    def select(self, limit=None, risk_level=None, min_confidence=None, max_rank=None,
+               sort=None, descending=False, ranges=None, offset=0):
+        """Return (total matches, row indexes) in confidence order unless sorted otherwise"""
+        ranges = dict(ranges or {})
+        if risk_level:
+            code = RISK_LEVELS.index(risk_level)
+            ranges['risk'] = (code, code)
+        if min_confidence is not None:
+            ranges['confidence'] = (min_confidence, None)
+        if max_rank is not None:
+            ranges['rank'] = (None, max_rank)
+        return self.table.select(sort, descending, ranges, limit, offset)
+
+    def query(self, limit=None, risk_level=None, **filters):
+        """Like select, but return the matching opportunities themselves"""
+        total, indexes = self.select(limit, risk_level, **filters)
+        return total, [self.table.rows[i] for i in indexes]
+
+    def top(self, limit=None, risk_level=None, min_confidence=None, max_rank=None):
+        """Return up to limit opportunities in confidence order matching the filters"""
+        return self.query(limit, risk_level, min_confidence=min_confidence, max_rank=max_rank)[1]
+
+    def summarize(self, indexes):
+        """Risk and confidence distributions and averages over the given rows"""
+        columns = self.table.columns
+        confidence = columns['confidence'][indexes]
+        if not len(confidence):
+            return {
+                'total_opportunities': 0,
+                'risk_distribution': {},
+                'confidence_distribution': {'high': 0, 'medium': 0, 'low': 0},
+                'avg_confidence': 0,
+                'avg_potential_return': 0
+            }
+
+        risk_counts = np.bincount(columns['risk'][indexes].astype(int), minlength=len(RISK_LEVELS))
+        low, medium, high = np.bincount(np.searchsorted(CONFIDENCE_BANDS, confidence, side='right'), minlength=3)
+        return {
+            'total_opportunities': len(confidence),
+            'risk_distribution': {level: int(count) for level, count in zip(RISK_LEVELS, risk_counts) if count},
+            'confidence_distribution': {'high': int(high), 'medium': int(medium), 'low': int(low)},
+            'avg_confidence': float(confidence.mean()),
+            'avg_potential_return': float(np.nan_to_num(columns['potential_return'][indexes]).mean())
+        }
+
+
+class SwingScanner:
+    """Scores the top of the market for swing entries from markets data and local history"""
+
+    def __init__(self, client, price_store=None, universe_size=250, history_coins=20):
+        self.client = client
+        self.price_store = price_store
+        self.universe_size = universe_size
+        self.history_coins = history_coins
+
+    def _fetch_universe(self):
+        coins = iter_markets(self.client, limit=self.universe_size, page_size=min(MARKET_PAGE_SIZE, self.universe_size))
+        return [coin for coin in coins if coin.get('current_price')]
+
+    def _load_history(self, coins):
+        # Refresh local history for the largest coins, then read whatever is stored
+        if self.price_store is None or not coins:
+            return {}
+        coin_ids = [coin['id'] for coin in coins]
+        if self.history_coins:
+            self.price_store.refresh(coin_ids[:self.history_coins], days=30)
+        return self.price_store.load(coin_ids, days=30)
+
+    def scan_swing_opportunities(self):
+        """Score the whole universe once and return an OpportunitySnapshot"""
+        coins = self._fetch_universe()
+        histories = self._load_history(coins)
+
+        opportunities = []
+        for coin in coins:
+            opportunity = self._score(coin, histories.get(coin['id']))
+            if opportunity is not None:
+                opportunities.append(opportunity)
+        return OpportunitySnapshot(opportunities, universe_size=len(coins))
+
+    def _score(self, coin, history):
+        price = coin['current_price']
+        rank = coin.get('market_cap_rank')
+        change_24h = coin.get('price_change_percentage_24h') or 0
+        ath_change = coin.get('ath_change_percentage') or 0
+        market_cap = coin.get('market_cap') or 0
+        volume = coin.get('total_volume') or 0
+        support = coin.get('low_24h') or price
+        resistance = coin.get('high_24h') or price
+
+        rsi_value = None
+        change_7d = change_24h
+        volume_trend = 'Stable'
+        if history is not None and len(history['prices']) > 15:
+            prices = history['prices']
+            rsi_value = float(rsi(prices)[-1])
+            window = min(len(prices), 24 * 7)
+            change_7d = ((price - prices[-window]) / prices[-window]) * 100 if prices[-window] else change_24h
+            lows, highs = support_resistance(prices, min(len(prices), 24 * 14))
+            support, resistance = float(lows[-1]), float(highs[-1])
+            volumes = history['volumes'][~np.isnan(history['volumes'])]
+            if len(volumes) > 48:
+                recent, baseline = volumes[-24:].mean(), volumes[:-24].mean()
+                if baseline and recent > baseline * 1.2:
+                    volume_trend = 'Increasing'
+                elif baseline and recent < baseline * 0.8:
+                    volume_trend = 'Decreasing'
+
+        signals = []
+        score = min(40, max(0, -ath_change) * 0.5)
+        if ath_change <= -50:
+            signals.append('Deep discount from ATH')
+        if change_7d < -5:
+            score += min(20, -change_7d)
+            signals.append('Pullback')
+        if rsi_value is not None:
+            if rsi_value < 30:
+                score += 25
+                signals.append('Oversold RSI')
+            elif rsi_value < 40:
+                score += 15
+            elif rsi_value > 70:
+                score -= 15
+        volume_ratio = volume / market_cap if market_cap else 0
+        if volume_ratio > 0.1 or volume_trend == 'Increasing':
+            score += 15
+            signals.append('Volume increase')
+        elif volume_ratio > 0.05:
+            score += 8
+        if support and price <= support * 1.03:
+            score += 10
+            signals.append('Support level')
+
+        if not signals:
+            return None
+        value_score = int(max(0, min(100, round(score))))
+
+        # Risk follows market cap rank, bumped up for very volatile coins
+        risk_index = 0 if rank and rank <= 20 else 1 if rank and rank <= 100 else 2
+        if price and (resistance - support) / price > 0.15:
+            risk_index = min(2, risk_index + 1)
+        risk_level = RISK_LEVELS[risk_index]
+
+        entry_point = max(min(support * 1.01, price), price * 0.97)
+        upside = min(0.6, max(0.1, -ath_change / 100 * 0.4))
+        price_target = entry_point * (1 + upside)
+        # Take profit at resistance, kept between half and most of the upside
+        exit_point = min(max(resistance, entry_point * (1 + upside * 0.5)), entry_point * (1 + upside * 0.8))
+        momentum = 'Bullish' if change_24h > 0 and change_7d > 0 else 'Bearish' if change_24h < 0 and change_7d < 0 else 'Neutral'
+
+        description = f"Value score of {value_score}/100"
+        if rsi_value is not None:
+            description += f" with RSI at {rsi_value:.1f}"
+        description += f". Down {max(0, -ath_change):.1f}% from all-time high, {change_7d:+.1f}% over 7 days with {volume_trend.lower()} volume."
+
+        return Opportunity(
+            coin_id=coin['id'],
+            coin_name=coin.get('name'),
+            symbol=(coin.get('symbol') or '').upper(),
+            rank=rank,
+            current_price=price,
+            entry_point=round(entry_point, 8),
+            exit_point=round(exit_point, 8),
+            price_target=round(price_target, 8),
+            entry_confidence=min(99, round(40 + value_score * 0.55) - 5 * risk_index),
+            risk_level=risk_level,
+            time_horizon=TIME_HORIZONS[risk_level],
+            description=description,
+            swing_signals=tuple(signals),
+            rsi_14d=round(rsi_value, 1) if rsi_value is not None else None,
+            volume_trend=volume_trend,
+            momentum=momentum,
+            support_level=support,
+            resistance_level=resistance,
+            market_cap=market_cap,
+            volume_24h=volume,
+            price_change_24h=change_24h,
+            price_change_7d=round(change_7d, 2),
+            value_score=value_score
+        )
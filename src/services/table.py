@@ -0,0 +1,114 @@
+import math
+
+import numpy as np
+
+
+class TableQueryError(ValueError):
+    """Unknown sort key, projected field or unparsable range bound in a list query"""
+
+
+class IndexedTable:
+    """Immutable rows plus numeric columns for vectorized filters and presorted orders.
+
+    rows can be any objects; columns maps a column name to one number per row
+    (None becomes NaN and never matches a range filter). Ascending and
+    descending orders for every column are built once, when the snapshot the
+    table belongs to is computed, so a query is a mask and a take.
+    """
+
+    def __init__(self, rows, columns):
+        self.rows = tuple(rows)
+        self.columns = {
+            name: np.array([np.nan if value is None else value for value in values], dtype=float)
+            for name, values in columns.items()
+        }
+        # NaN sorts last in both directions
+        self._orders = {}
+        for name, values in self.columns.items():
+            self._orders[name, False] = np.argsort(values, kind='stable')
+            self._orders[name, True] = np.argsort(-values, kind='stable')
+
+    def __len__(self):
+        return len(self.rows)
+
+    def select(self, sort=None, descending=False, ranges=None, limit=None, offset=0):
+        """Return (total matches, row indexes) for one page of a filtered, sorted query.
+
+        ranges maps a column to (min, max), either of which may be None. With
+        no sort key rows keep the order the table was built in.
+        """
+        if sort is not None and sort not in self.columns:
+            raise TableQueryError(f"Cannot sort by {sort}")
+        order = self._orders[sort, descending] if sort is not None else np.arange(len(self.rows))
+
+        mask = None
+        for name, (low, high) in (ranges or {}).items():
+            values = self.columns[name]
+            for bound, compare in ((low, np.greater_equal), (high, np.less_equal)):
+                if bound is None:
+                    continue
+                matched = compare(values, bound)
+                mask = matched if mask is None else mask & matched
+        if mask is not None:
+            order = order[mask[order]]
+
+        stop = None if limit is None else offset + limit
+        return len(order), order[offset:stop]
+
+    def query(self, sort=None, descending=False, ranges=None, limit=None, offset=0):
+        """Like select, but return the matching rows themselves"""
+        total, indexes = self.select(sort, descending, ranges, limit, offset)
+        return total, [self.rows[i] for i in indexes]
+
+
+def _parse_bound(args, name):
+    value = args.get(name)
+    if value is None or value == '':
+        return None
+    try:
+        bound = float(value)
+    except ValueError:
+        raise TableQueryError(f"{name} must be a number") from None
+    if math.isnan(bound):
+        raise TableQueryError(f"{name} must be a number")
+    return bound
+
+
+def parse_list_query(args, filters):
+    """Read sort and min_/max_ range filters from request args.
+
+    filters maps public filter names to table columns; sort accepts either a
+    filter name or a column name, prefixed with '-' for descending order.
+    """
+    sort = args.get('sort')
+    descending = False
+    if sort:
+        descending = sort.startswith('-')
+        sort = sort.lstrip('-')
+        sort = filters.get(sort, sort)
+
+    ranges = {}
+    for name, column in filters.items():
+        low = _parse_bound(args, f'min_{name}')
+        high = _parse_bound(args, f'max_{name}')
+        if low is not None or high is not None:
+            ranges[column] = (low, high)
+    return {'sort': sort or None, 'descending': descending, 'ranges': ranges}
+
+
+def parse_fields(args, allowed):
+    """Return the fields requested with ?fields=a,b, or None for all of them"""
+    fields = [name.strip() for name in args.get('fields', '').split(',') if name.strip()]
+    if not fields:
+        return None
+    unknown = [name for name in fields if name not in allowed]
+    if unknown:
+        raise TableQueryError(f"Unknown fields: {', '.join(unknown)}. Use any of {', '.join(allowed)}")
+    return fields
+
+
+def project(row, fields):
+    """Keep only the requested fields of a response dict"""
+    if fields is None:
+        return row
+    return {name: row[name] for name in fields}
@@ -0,0 +1,223 @@
+import threading
+import time
+from concurrent.futures import Future
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from src.services.metrics import upstream_latency, upstream_queue_wait
+from src.services.priority import current_priority
+from src.services.rate_limit import RateLimitExceeded
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling upstream while the circuit breaker is open"""
+
+
+class TimeoutSession(requests.Session):
+    """requests.Session that applies a default timeout to every request"""
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def pooled_session(pool_size=20, timeout=10):
+    """Build a keep-alive session with a connection pool sized for our worker threads"""
+    session = TimeoutSession(timeout)
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class CircuitBreaker:
+    """Opens after consecutive failures, then lets one trial call through after reset_timeout"""
+
+    def __init__(self, failure_threshold=5, reset_timeout=30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self.state == 'closed':
+                return True
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = 'half_open'
+                self._trial_in_flight = False
+            if self.state == 'half_open' and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self):
+        """Give back a half-open trial slot that was not used"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self.state = 'closed'
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self._trial_in_flight = False
+            if self.state == 'half_open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+    def status(self):
+        with self._lock:
+            return {
+                'state': self.state,
+                'consecutive_failures': self.failures,
+                'failure_threshold': self.failure_threshold,
+                'reset_timeout': self.reset_timeout
+            }
+
+
+class UpstreamStats:
+    """Per-method call counts, error counts and latency totals"""
+
+    def __init__(self):
+        self._methods = {}
+        self._lock = threading.Lock()
+
+    def record(self, method, duration, error=None):
+        with self._lock:
+            stats = self._methods.setdefault(method, {
+                'calls': 0, 'errors': 0, 'rejected': 0, 'deduplicated': 0, 'total_seconds': 0.0, 'max_seconds': 0.0
+            })
+            if error in ('rejected', 'deduplicated'):
+                stats[error] += 1
+                return
+            stats['calls'] += 1
+            stats['total_seconds'] += duration
+            stats['max_seconds'] = max(stats['max_seconds'], duration)
+            if error:
+                stats['errors'] += 1
+
+    def snapshot(self):
+        with self._lock:
+            methods = {name: dict(stats) for name, stats in self._methods.items()}
+        for stats in methods.values():
+            stats['avg_seconds'] = round(stats['total_seconds'] / stats['calls'], 4) if stats['calls'] else 0
+            stats['error_rate'] = round(stats['errors'] / stats['calls'], 4) if stats['calls'] else 0
+            stats['total_seconds'] = round(stats['total_seconds'], 4)
+            stats['max_seconds'] = round(stats['max_seconds'], 4)
+        return methods
+
+
+class UpstreamClient:
+    """Guards an upstream API client with a shared session, rate limit, circuit breaker and metrics.
+
+    Every public method of the wrapped client is passed through; the session
+    is installed on clients that expose a `session` attribute. Identical calls
+    already in flight share one upstream request; the callers joining it wait
+    at most wait_timeout seconds for its result. With a PriorityTokenBucket
+    the caller's priority (see priority.py) decides its place in the queue.
+    """
+
+    def __init__(self, target, session=None, breaker=None, rate_limiter=None, rate_limit_timeout=30, wait_timeout=60):
+        self._target = target
+        self.breaker = breaker or CircuitBreaker()
+        self.rate_limiter = rate_limiter
+        self.rate_limit_timeout = rate_limit_timeout
+        self.wait_timeout = wait_timeout
+        self.stats = UpstreamStats()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+        if session is not None and hasattr(target, 'session'):
+            target.session = session
+
+    def __getattr__(self, name):
+        attr = getattr(self._target, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+
+        def guarded_call(*args, **kwargs):
+            key = (name, args, tuple(sorted(kwargs.items())))
+            try:
+                with self._inflight_lock:
+                    future = self._inflight.get(key)
+                    leader = future is None
+                    if leader:
+                        future = self._inflight[key] = Future()
+            except TypeError:
+                # Unhashable arguments: no deduplication
+                return self._call(name, attr, args, kwargs)
+
+            if not leader:
+                self.stats.record(name, 0, error='deduplicated')
+                return future.result(timeout=self.wait_timeout)
+            try:
+                result = self._call(name, attr, args, kwargs)
+            except Exception as e:
+                future.set_exception(e)
+                raise
+            else:
+                future.set_result(result)
+                return result
+            finally:
+                with self._inflight_lock:
+                    self._inflight.pop(key, None)
+                # Interrupted by a BaseException such as a gevent Timeout or
+                # GreenletExit: the waiters get CancelledError instead of hanging
+                future.cancel()
+
+        guarded_call.__name__ = name
+        return guarded_call
+
+    def _acquire(self):
+        priority = current_priority()
+        if hasattr(self.rate_limiter, 'queue_depth'):
+            waited = self.rate_limiter.acquire(timeout=self.rate_limit_timeout, priority=priority)
+        else:
+            started = time.monotonic()
+            self.rate_limiter.acquire(timeout=self.rate_limit_timeout)
+            waited = time.monotonic() - started
+        upstream_queue_wait.observe(waited, priority=priority)
+
+    def _call(self, name, attr, args, kwargs):
+        if not self.breaker.allow():
+            self.stats.record(name, 0, error='rejected')
+            upstream_latency.observe(0, method=name, outcome='rejected')
+            raise CircuitOpenError(f"Upstream circuit is open, skipping {name}")
+        if self.rate_limiter is not None:
+            try:
+                self._acquire()
+            except RateLimitExceeded:
+                # Our own budget ran out, which says nothing about upstream health
+                self.breaker.release_trial()
+                raise
+
+        started = time.monotonic()
+        try:
+            result = attr(*args, **kwargs)
+        except Exception as e:
+            duration = time.monotonic() - started
+            self.stats.record(name, duration, error=type(e).__name__)
+            upstream_latency.observe(duration, method=name, outcome='error')
+            self.breaker.record_failure()
+            raise
+        except BaseException:
+            # Interrupted rather than failed: free a half-open trial slot
+            self.breaker.release_trial()
+            raise
+        duration = time.monotonic() - started
+        self.stats.record(name, duration)
+        upstream_latency.observe(duration, method=name, outcome='ok')
+        self.breaker.record_success()
+        return result
@@ -0,0 +1,18 @@
+import pytest
+from flask import Flask
+
+from src.models.user import db
+
+
+@pytest.fixture
+def app():
+    """Bare Flask app on an in-memory SQLite database, inside an application context"""
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = 'sqlite://'
+    app.config['TESTING'] = True
+    db.init_app(app)
+    with app.app_context():
+        db.create_all()
+        yield app
+        db.session.remove()
+        db.drop_all()
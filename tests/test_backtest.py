@@ -0,0 +1,64 @@
+import pytest
+
+from src.models.backtest import BacktestRun
+from src.models.user import db
+from src.services import backtest
+from src.services.backtest import Backtester
+
+
+class CountingBacktester(Backtester):
+    def __init__(self):
+        super().__init__(client=None, price_store=None)
+        self.runs = 0
+
+    def run(self, coin_ids=None):
+        self.runs += 1
+        return {'coins': 10, 'run': self.runs}
+
+
+@pytest.mark.usefixtures('app')
+def test_fresh_stored_result_is_served_without_running():
+    backtester = CountingBacktester()
+    assert backtester.latest() is None
+    assert backtester.refresh(max_age=3600) == {'coins': 10, 'run': 1}
+    assert CountingBacktester().refresh(max_age=3600) == {'coins': 10, 'run': 1}
+    assert backtester.runs == 1
+
+
+@pytest.mark.usefixtures('app')
+def test_stale_result_is_recomputed():
+    backtester = CountingBacktester()
+    backtester.refresh()
+    db.session.execute(db.update(BacktestRun).values(completed_at=BacktestRun.completed_at - 7200 * 1000))
+    db.session.commit()
+
+    assert backtester.refresh(max_age=3600) == {'coins': 10, 'run': 2}
+    assert backtester.latest(max_age=3600)['run'] == 2
+
+
+@pytest.mark.usefixtures('app')
+def test_only_the_newest_runs_are_kept(monkeypatch):
+    monkeypatch.setattr(backtest, 'KEEP_RUNS', 2)
+    backtester = CountingBacktester()
+    for completed_at in (1, 2, 3):
+        db.session.add(BacktestRun(completed_at=completed_at, coins=1, result={}))
+    db.session.commit()
+
+    backtester.refresh(max_age=3600)
+    kept = db.session.scalars(db.select(BacktestRun).order_by(BacktestRun.completed_at)).all()
+    assert [run.completed_at for run in kept][:1] == [3]
+    assert [run.result for run in kept][1:] == [{'coins': 10, 'run': 1}]
+
+
+def test_endpoint_serves_the_stored_run_without_computing(app):
+    from src.routes.opportunities import opportunities_bp, snapshot_scheduler
+
+    app.register_blueprint(opportunities_bp, url_prefix='/api/opportunities')
+    client = app.test_client()
+    assert client.get('/api/opportunities/backtest').status_code == 503
+
+    db.session.add(BacktestRun(completed_at=1, coins=5, result={'coins': 5}))
+    db.session.commit()
+    response = client.get('/api/opportunities/backtest')
+    assert response.get_json()['data'] == {'coins': 5}
+    assert snapshot_scheduler.get('backtest') is None
@@ -0,0 +1,141 @@
+import threading
+import time
+
+import pytest
+
+from src.services.cache import CachedProxy, TTLCache
+
+
+class Counter:
+    def __init__(self, value='value'):
+        self.calls = 0
+        self.value = value
+
+    def __call__(self):
+        self.calls += 1
+        return f'{self.value}-{self.calls}'
+
+
+def test_fresh_entries_are_served_without_reloading():
+    cache = TTLCache()
+    loader = Counter()
+    assert cache.get_or_load('key', loader, ttl=60) == 'value-1'
+    assert cache.get_or_load('key', loader, ttl=60) == 'value-1'
+    assert loader.calls == 1
+    assert cache.stats()['hits'] == 1
+
+
+def test_expired_entries_are_reloaded():
+    cache = TTLCache()
+    loader = Counter()
+    cache.get_or_load('key', loader, ttl=0.01)
+    time.sleep(0.02)
+    assert cache.get_or_load('key', loader, ttl=0.01) == 'value-2'
+    assert cache.stats()['misses'] == 2
+
+
+def test_stale_entries_are_served_while_refreshing_in_the_background():
+    cache = TTLCache()
+    loader = Counter()
+    cache.get_or_load('key', loader, ttl=0.01, stale_ttl=60)
+    time.sleep(0.02)
+    assert cache.get_or_load('key', loader, ttl=0.01, stale_ttl=60) == 'value-1'
+
+    deadline = time.monotonic() + 2
+    while cache.stats()['inflight'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert loader.calls == 2
+    assert cache.get_or_load('key', loader, ttl=0.01, stale_ttl=60) == 'value-2'
+
+
+def test_concurrent_misses_share_one_load():
+    cache = TTLCache()
+    release = threading.Event()
+    calls = []
+
+    def loader():
+        calls.append(1)
+        release.wait(2)
+        return 'loaded'
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_load('key', loader, ttl=60))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == ['loaded'] * 5
+    assert len(calls) == 1
+    assert cache.stats()['coalesced'] == 4
+
+
+def test_failed_reload_falls_back_to_last_known_good_value():
+    cache = TTLCache(fallback_ttl=60)
+    cache.get_or_load('key', lambda: 'good', ttl=0.01)
+    time.sleep(0.02)
+
+    def failing():
+        raise RuntimeError('upstream down')
+
+    assert cache.get_or_load('key', failing, ttl=0.01) == 'good'
+    assert cache.stats()['fallbacks'] == 1
+
+
+def test_failed_load_without_fallback_raises():
+    cache = TTLCache(fallback_ttl=0)
+
+    def failing():
+        raise RuntimeError('upstream down')
+
+    with pytest.raises(RuntimeError):
+        cache.get_or_load('key', failing, ttl=60)
+    assert cache.stats()['inflight'] == 0
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = TTLCache(max_entries=2)
+    cache.get_or_load('a', lambda: 1, ttl=60)
+    cache.get_or_load('b', lambda: 2, ttl=60)
+    cache.get_or_load('a', lambda: 1, ttl=60)
+    cache.get_or_load('c', lambda: 3, ttl=60)
+
+    loader = Counter()
+    cache.get_or_load('a', loader, ttl=60)
+    cache.get_or_load('b', loader, ttl=60)
+    assert loader.calls == 1
+    assert cache.stats()['evictions'] >= 1
+
+
+def test_invalidate_drops_an_entry():
+    cache = TTLCache()
+    loader = Counter()
+    cache.get_or_load('key', loader, ttl=60)
+    cache.invalidate('key')
+    assert cache.get_or_load('key', loader, ttl=60) == 'value-2'
+
+
+def test_cached_proxy_caches_configured_methods_by_arguments():
+    class Client:
+        def __init__(self):
+            self.calls = 0
+
+        def markets(self, page=1):
+            self.calls += 1
+            return [page]
+
+        def uncached(self):
+            self.calls += 1
+            return 'raw'
+
+    client = Client()
+    proxy = CachedProxy(client, 'test', {'markets': (60, 0)}, TTLCache())
+    assert proxy.markets(page=1) == [1]
+    assert proxy.markets(page=1) == [1]
+    assert proxy.markets(page=2) == [2]
+    assert client.calls == 2
+    proxy.uncached()
+    proxy.uncached()
+    assert client.calls == 4
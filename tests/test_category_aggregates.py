@@ -0,0 +1,84 @@
+import pytest
+
+from src.services.category_aggregates import CategoryAggregator, CategoryFeed
+
+CATEGORIES = {'layer-1': ['bitcoin', 'ethereum'], 'meme-token': ['dogecoin']}
+
+
+def coin(coin_id, market_cap, volume, change):
+    return {'id': coin_id, 'market_cap': market_cap, 'total_volume': volume, 'price_change_percentage_24h': change}
+
+
+COINS = [coin('bitcoin', 300, 30, 2.0), coin('ethereum', 100, 20, -4.0), coin('dogecoin', 10, 50, 10.0)]
+
+
+def test_aggregates_are_market_cap_weighted():
+    aggregator = CategoryAggregator(CATEGORIES)
+    assert aggregator.apply(COINS) == 3
+    layer_1 = aggregator.snapshot()['categories']['layer-1']
+    assert layer_1['coins'] == 2
+    assert layer_1['market_cap'] == 400
+    assert layer_1['weighted_change_24h'] == pytest.approx(0.5)
+    assert layer_1['average_change_24h'] == -1.0
+    assert layer_1['dispersion'] == 3.0
+    assert layer_1['volume_share'] == 50.0
+    assert layer_1['best_performer'] == {'coin_id': 'bitcoin', 'change_24h': 2.0}
+
+
+def test_only_changed_coins_are_applied():
+    aggregator = CategoryAggregator(CATEGORIES)
+    aggregator.apply(COINS)
+    version = aggregator.version
+    assert aggregator.apply(COINS) == 0
+    assert aggregator.version == version
+
+    assert aggregator.apply([coin('ethereum', 100, 20, 4.0)]) == 1
+    assert aggregator.snapshot()['categories']['layer-1']['weighted_change_24h'] == pytest.approx(2.5)
+
+
+def test_complete_updates_drop_missing_coins():
+    aggregator = CategoryAggregator(CATEGORIES)
+    aggregator.apply(COINS)
+    aggregator.apply(COINS[:2], complete=True)
+    assert 'meme-token' not in aggregator.snapshot()['categories']
+
+
+def test_membership_changes_rebuild_the_totals():
+    aggregator = CategoryAggregator(CATEGORIES)
+    aggregator.apply(COINS)
+    version = aggregator.version
+    aggregator.set_categories({'layer-1': ['bitcoin']})
+    snapshot = aggregator.snapshot()
+    assert snapshot['version'] == version + 1
+    assert list(snapshot['categories']) == ['layer-1']
+    assert snapshot['categories']['layer-1']['market_cap'] == 300
+
+
+class Client:
+    def __init__(self):
+        self.fail = False
+
+    def get_coins_markets(self, vs_currency, per_page, page, category=None, **params):
+        if page > 1:
+            return []
+        if category is not None:
+            if self.fail:
+                raise RuntimeError('upstream down')
+            return [{'id': coin_id} for coin_id in CATEGORIES.get(category, [])]
+        return COINS
+
+
+def test_feed_reads_membership_upstream_and_keeps_it_on_failure():
+    client = Client()
+    feed = CategoryFeed(client, CategoryAggregator(), category_ids=('layer-1', 'meme-token'), membership_seconds=0)
+    assert set(feed.refresh()['categories']) == {'layer-1', 'meme-token'}
+
+    client.fail = True
+    assert set(feed.refresh()['categories']) == {'layer-1', 'meme-token'}
+
+
+def test_feed_reads_membership_from_a_file(tmp_path):
+    path = tmp_path / 'categories.json'
+    path.write_text('{"memes": ["dogecoin"]}')
+    feed = CategoryFeed(Client(), CategoryAggregator(), map_path=str(path))
+    assert list(feed.refresh()['categories']) == ['memes']
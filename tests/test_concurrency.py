@@ -0,0 +1,72 @@
+import threading
+import time
+
+from src.services.concurrency import gather_sections
+
+
+def test_sections_run_concurrently():
+    barrier = threading.Barrier(3, timeout=2)
+
+    def section(value):
+        def run():
+            barrier.wait()
+            return value
+        return run
+
+    results, errors = gather_sections({'a': section(1), 'b': section(2), 'c': section(3)})
+    assert results == {'a': 1, 'b': 2, 'c': 3}
+    assert errors == {}
+
+
+def test_failures_and_timeouts_are_reported_per_section():
+    release = threading.Event()
+
+    def fails():
+        raise RuntimeError('upstream down')
+
+    def slow():
+        release.wait(2)
+        return 'late'
+
+    started = time.monotonic()
+    results, errors = gather_sections({'ok': lambda: 'fine', 'fails': fails, 'slow': (slow, 0.05)}, timeout=5)
+    release.set()
+
+    assert time.monotonic() - started < 1
+    assert results == {'ok': 'fine'}
+    assert errors['fails'] == 'upstream down'
+    assert errors['slow'].startswith('timed out after')
+
+
+def test_timeouts_count_from_the_start_of_the_gather():
+    def sleeps(seconds):
+        def run():
+            time.sleep(seconds)
+            return seconds
+        return run
+
+    started = time.monotonic()
+    results, errors = gather_sections({'a': (sleeps(0.1), 0.3), 'b': (sleeps(0.1), 0.3)})
+    assert time.monotonic() - started < 0.3
+    assert results == {'a': 0.1, 'b': 0.1} and errors == {}
+
+
+def test_daily_report_is_partial_when_sections_fail(app, monkeypatch):
+    from src.routes import reports
+
+    sections = {'global_overview': {'total_market_cap': 5, 'btc_dominance': 50}, 'trending': [{'id': 'bitcoin'}]}
+
+    def snapshot_data(name):
+        if name not in sections:
+            raise RuntimeError(f'{name} unavailable')
+        return sections[name]
+
+    monkeypatch.setattr(reports, 'snapshot_data', snapshot_data)
+    app.register_blueprint(reports.reports_bp, url_prefix='/api/reports')
+    report = app.test_client().get('/api/reports/daily').get_json()['data']
+
+    assert report['partial'] is True
+    assert set(report['errors']) == {'volume_anomalies', 'momentum_signals', 'category_performance'}
+    assert report['volume_anomalies'] == [] and report['category_performance'] == {}
+    assert report['summary']['total_market_cap'] == 5
+    assert report['summary']['trending_count'] == 1
@@ -0,0 +1,97 @@
+import pytest
+import requests
+
+from src.services import history_fetcher
+from src.services.history_fetcher import fetch_histories, is_transient, iter_markets, with_retries
+from src.services.upstream import CircuitOpenError
+
+
+def http_error(status):
+    response = requests.Response()
+    response.status_code = status
+    return requests.HTTPError(response=response)
+
+
+@pytest.fixture(autouse=True)
+def no_sleep(monkeypatch):
+    monkeypatch.setattr(history_fetcher.time, 'sleep', lambda seconds: None)
+
+
+class Flaky:
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return 'ok'
+
+
+@pytest.mark.parametrize('error, transient', [
+    (http_error(404), False),
+    (http_error(400), False),
+    (http_error(429), True),
+    (http_error(503), True),
+    (requests.ConnectionError(), True),
+    (requests.Timeout(), True),
+    (ValueError('bad payload'), False)
+])
+def test_is_transient(error, transient):
+    assert is_transient(error) is transient
+
+
+def test_transient_failures_are_retried():
+    func = Flaky(http_error(502), requests.Timeout())
+    assert with_retries(func, retries=3) == 'ok'
+    assert func.calls == 3
+
+
+def test_client_errors_fail_on_the_first_attempt():
+    func = Flaky(http_error(404))
+    with pytest.raises(requests.HTTPError):
+        with_retries(func, retries=3)
+    assert func.calls == 1
+
+
+def test_open_circuit_is_not_retried():
+    func = Flaky(CircuitOpenError('open'))
+    with pytest.raises(CircuitOpenError):
+        with_retries(func, retries=3)
+    assert func.calls == 1
+
+
+def test_gives_up_after_the_last_retry():
+    func = Flaky(*[http_error(500)] * 5)
+    with pytest.raises(requests.HTTPError):
+        with_retries(func, retries=2)
+    assert func.calls == 3
+
+
+def test_fetch_histories_collects_results_and_errors():
+    class Client:
+        def get_coin_market_chart(self, coin_id, vs_currency='usd', days=30):
+            if coin_id == 'missing':
+                raise http_error(404)
+            return {'prices': [[0, 1.0]], 'coin': coin_id}
+
+    histories, errors = fetch_histories(Client(), ['bitcoin', 'missing', 'bitcoin'])
+    assert list(histories) == ['bitcoin']
+    assert list(errors) == ['missing']
+
+
+def test_iter_markets_pages_through_shared_pages():
+    class Client:
+        def __init__(self):
+            self.requests = []
+
+        def get_coins_markets(self, vs_currency, per_page, page, **params):
+            self.requests.append((per_page, page, params.get('category')))
+            start = (page - 1) * per_page
+            return [{'id': f'coin{i}'} for i in range(start, min(start + per_page, 25))]
+
+    client = Client()
+    coins = [coin['id'] for coin in iter_markets(client, offset=8, limit=10, page_size=10, category='defi')]
+    assert coins == [f'coin{i}' for i in range(8, 18)]
+    assert client.requests == [(10, 1, 'defi'), (10, 2, 'defi')]
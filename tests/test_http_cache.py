@@ -0,0 +1,103 @@
+import gzip
+
+import pytest
+from flask import Flask, jsonify
+
+from src.services import http_cache
+from src.services.http_cache import BodyCache, cached_response
+
+LAST_MODIFIED = 1_700_000_000
+
+
+@pytest.fixture
+def state(monkeypatch):
+    monkeypatch.setattr(http_cache, 'body_cache', BodyCache())
+    return {'calls': 0, 'token': 'v1', 'size': 10}
+
+
+@pytest.fixture
+def client(state):
+    app = Flask(__name__)
+
+    @app.route('/data')
+    @cached_response(max_age=60, version=lambda: (state['token'], LAST_MODIFIED))
+    def data():
+        state['calls'] += 1
+        return jsonify({'values': list(range(state['size']))})
+
+    @app.route('/missing')
+    @cached_response(max_age=60)
+    def missing():
+        return jsonify({'error': 'not found'}), 404
+
+    return app.test_client()
+
+
+def test_sets_validators_and_cache_control(client):
+    response = client.get('/data')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'public, max-age=60'
+    assert response.headers['ETag']
+    assert response.last_modified.timestamp() == LAST_MODIFIED
+    assert 'Accept-Encoding' in response.headers['Vary']
+
+
+def test_if_none_match_answers_304(client):
+    etag = client.get('/data').headers['ETag']
+    response = client.get('/data', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.headers['ETag'] == etag
+    assert response.data == b''
+    assert client.get('/data', headers={'If-None-Match': '"other"'}).status_code == 200
+
+
+def test_if_modified_since_answers_304(client):
+    assert client.get('/data', headers={'If-Modified-Since': 'Wed, 15 Nov 2023 00:00:00 GMT'}).status_code == 304
+    assert client.get('/data', headers={'If-Modified-Since': 'Tue, 14 Nov 2023 00:00:00 GMT'}).status_code == 200
+
+
+def test_body_is_reused_until_the_version_changes(client, state):
+    first = client.get('/data').headers['ETag']
+    client.get('/data')
+    assert state['calls'] == 1
+
+    state['token'], state['size'] = 'v2', 20
+    assert client.get('/data').headers['ETag'] != first
+    assert state['calls'] == 2
+
+
+def test_large_bodies_are_gzipped_with_their_own_etag(client, state):
+    state['size'] = 1000
+    identity = client.get('/data', headers={'Accept-Encoding': 'identity'})
+    gzipped = client.get('/data', headers={'Accept-Encoding': 'gzip'})
+
+    assert 'Content-Encoding' not in identity.headers
+    assert gzipped.headers['Content-Encoding'] == 'gzip'
+    assert gzip.decompress(gzipped.data) == identity.data
+    assert gzipped.headers['ETag'] != identity.headers['ETag']
+    assert gzipped.headers['Vary'] == identity.headers['Vary'] == 'Accept-Encoding'
+
+    # A validator for one representation does not match another
+    response = client.get('/data', headers={'Accept-Encoding': 'identity', 'If-None-Match': gzipped.headers['ETag']})
+    assert response.status_code == 200
+    response = client.get('/data', headers={'Accept-Encoding': 'gzip', 'If-None-Match': gzipped.headers['ETag']})
+    assert response.status_code == 304
+
+
+def test_brotli_is_preferred_when_installed(client, state):
+    brotli = pytest.importorskip('brotli')
+    state['size'] = 1000
+    response = client.get('/data', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['Content-Encoding'] == 'br'
+    assert response.headers['ETag'].endswith('-br"')
+    assert brotli.decompress(response.data) == client.get('/data').data
+
+
+def test_small_bodies_are_not_compressed(client):
+    assert 'Content-Encoding' not in client.get('/data', headers={'Accept-Encoding': 'gzip'}).headers
+
+
+def test_error_responses_pass_through(client):
+    response = client.get('/missing')
+    assert response.status_code == 404
+    assert 'ETag' not in response.headers
@@ -0,0 +1,105 @@
+import math
+
+import numpy as np
+import pytest
+
+from src.services.indicators import (
+    atr, bollinger, ema, group_by_length, latest_indicators, macd, rsi, sma, stack_series, support_resistance
+)
+
+PRICES = 100 + 10 * np.sin(np.arange(120) / 7) + np.arange(120) * 0.1
+
+
+def reference_ema(values, period, alpha=None):
+    alpha = alpha if alpha is not None else 2 / (period + 1)
+    out = [math.nan] * len(values)
+    out[period - 1] = sum(values[:period]) / period
+    for t in range(period, len(values)):
+        out[t] = out[t - 1] + alpha * (values[t] - out[t - 1])
+    return out
+
+
+def reference_rsi(values, period):
+    changes = [b - a for a, b in zip(values, values[1:])]
+    gains = reference_ema([max(c, 0) for c in changes], period, 1 / period)
+    losses = reference_ema([max(-c, 0) for c in changes], period, 1 / period)
+    return [math.nan] + [
+        math.nan if math.isnan(g) else (100.0 if l == 0 else 100 - 100 / (1 + g / l))
+        for g, l in zip(gains, losses)
+    ]
+
+
+def test_sma_matches_window_means():
+    result = sma(PRICES, 10)
+    assert np.isnan(result[:9]).all()
+    expected = [PRICES[t - 9:t + 1].mean() for t in range(9, len(PRICES))]
+    np.testing.assert_allclose(result[9:], expected)
+
+
+def test_ema_matches_recursive_definition():
+    np.testing.assert_allclose(ema(PRICES, 12), reference_ema(list(PRICES), 12), equal_nan=True)
+
+
+def test_rsi_matches_wilder_definition():
+    np.testing.assert_allclose(rsi(PRICES, 14), reference_rsi(list(PRICES), 14), equal_nan=True)
+
+
+def test_rsi_bounds_for_monotonic_and_flat_series():
+    assert rsi(np.arange(30.0), 14)[-1] == 100
+    assert rsi(np.full(30, 5.0), 14)[-1] == 50
+    assert rsi(np.arange(30.0, 0, -1), 14)[-1] == 0
+
+
+def test_matrix_rows_match_single_series():
+    matrix = np.vstack([PRICES, PRICES[::-1], PRICES * 2])
+    for row, series in zip(rsi(matrix), matrix):
+        np.testing.assert_allclose(row, rsi(series), equal_nan=True)
+    line, signal, histogram = macd(matrix)
+    np.testing.assert_allclose(line[1], macd(matrix[1])[0], equal_nan=True)
+    np.testing.assert_allclose(histogram, line - signal, equal_nan=True)
+
+
+def test_macd_signal_starts_after_slow_ema():
+    line, signal, _ = macd(PRICES)
+    assert np.isnan(line[:25]).all() and not np.isnan(line[25])
+    assert np.isnan(signal[:33]).all() and not np.isnan(signal[33])
+
+
+def test_bollinger_bands_surround_the_middle():
+    middle, upper, lower = bollinger(PRICES, 20, 2.0)
+    np.testing.assert_allclose(middle[19], PRICES[:20].mean())
+    np.testing.assert_allclose(upper[19] - middle[19], 2 * PRICES[:20].std())
+    np.testing.assert_allclose(middle - lower, upper - middle, equal_nan=True)
+
+
+def test_atr_of_close_only_series_smooths_absolute_changes():
+    true_range = np.concatenate(([0.0], np.abs(np.diff(PRICES))))
+    np.testing.assert_allclose(atr(PRICES, PRICES, PRICES, 14), reference_ema(list(true_range), 14, 1 / 14), equal_nan=True)
+
+
+def test_support_resistance_are_window_extremes():
+    support, resistance = support_resistance(PRICES, 30)
+    assert support[-1] == PRICES[-30:].min()
+    assert resistance[-1] == PRICES[-30:].max()
+
+
+def test_short_history_yields_nan():
+    result = latest_indicators(PRICES[:10])
+    assert result['current_price'][0] == PRICES[9]
+    assert math.isnan(result['sma_50'][0])
+    assert math.isnan(result['macd'][0])
+
+
+def test_stack_series_aligns_on_latest_points():
+    matrix = stack_series([[1, 2, 3, 4], [7, 8, 9]])
+    np.testing.assert_array_equal(matrix, [[2, 3, 4], [7, 8, 9]])
+
+
+def test_group_by_length_batches_equal_lengths():
+    groups = dict((tuple(ids), matrix.shape) for ids, matrix in group_by_length({'a': [1, 2], 'b': [3, 4], 'c': [5]}, min_length=2))
+    assert groups == {('a', 'b'): (2, 2)}
+
+
+def test_rejects_higher_dimensions():
+    with pytest.raises(ValueError):
+        sma(np.zeros((2, 2, 2)), 2)
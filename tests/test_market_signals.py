@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+
+from src.services.market_signals import MarketSignalDetector, VolumeHistory, _percentile_ranks
+
+
+class Client:
+    def __init__(self, coins):
+        self.coins = coins
+
+    def get_coins_markets(self, vs_currency, per_page, page, **params):
+        return self.coins[(page - 1) * per_page:page * per_page]
+
+
+def coin(coin_id, volume, market_cap, change_24h=0.0):
+    return {
+        'id': coin_id, 'symbol': coin_id, 'name': coin_id, 'current_price': 1.0,
+        'total_volume': volume, 'market_cap': market_cap, 'price_change_percentage_24h': change_24h
+    }
+
+
+def scan(coins, history=None):
+    return MarketSignalDetector(Client(coins), history=history).scan()
+
+
+def test_turnover_outlier_against_the_market():
+    # One coin trading 100x the turnover of n - 1 identical coins sits
+    # sqrt(n - 1) standard deviations above the mean log turnover
+    outlier = coin('outlier', 1000, 1000)
+    below = scan([coin(f'c{i}', 10, 1000) for i in range(5)] + [outlier])
+    assert below['volume_anomalies'] == []
+
+    above = scan([coin(f'c{i}', 10, 1000) for i in range(9)] + [outlier])
+    anomaly, = above['volume_anomalies']
+    assert anomaly['coin_id'] == 'outlier'
+    assert anomaly['market_zscore'] == 3.0
+    assert anomaly['score'] == 1.2
+    assert anomaly['signal'] == 'MARKET'
+    assert anomaly['volume_zscore'] is None
+    assert above['universe_size'] == 10
+
+
+@pytest.mark.parametrize('volume, anomalous', [(129.0, False), (130.0, True)])
+def test_volume_against_the_coins_own_samples(volume, anomalous):
+    # 24 samples alternating 90 and 110: mean 100, std 10; equal turnover
+    # everywhere leaves no market z-score
+    history = VolumeHistory(window=48, sample_seconds=0)
+    rows, _ = history.rows(['a', 'b'])
+    for i in range(24):
+        history.sample(rows, np.array([90.0, 90.0]) if i % 2 else np.array([110.0, 110.0]), now=i)
+
+    result = scan([coin('a', volume, volume * 10), coin('b', 100.0, 1000.0)], history)
+    assert [entry['coin_id'] for entry in result['volume_anomalies']] == (['a'] if anomalous else [])
+    if anomalous:
+        assert result['volume_anomalies'][0]['volume_zscore'] == 3.0
+        assert result['volume_anomalies'][0]['signal'] == 'HISTORY'
+
+
+def test_own_history_needs_enough_samples():
+    history = VolumeHistory(window=48, sample_seconds=0)
+    rows, _ = history.rows(['a', 'b'])
+    for i in range(23):
+        history.sample(rows, np.array([90.0, 90.0]) if i % 2 else np.array([110.0, 110.0]), now=i)
+    assert scan([coin('a', 1000.0, 10000.0), coin('b', 100.0, 1000.0)], history)['volume_anomalies'] == []
+
+
+def test_momentum_signals_are_the_rank_tails():
+    # Equal turnover: momentum follows the 24h change, so only the best and
+    # worst of 20 coins fall in the 5% tails
+    coins = [coin(f'c{i}', 10, 1000, change_24h=i - 10) for i in range(20)]
+    signals = scan(coins)['momentum_signals']
+    assert [(s['coin_id'], s['direction']) for s in signals] == [('c19', 'BULLISH'), ('c0', 'BEARISH')]
+    assert signals[0]['momentum_rank'] == 1.0
+    assert signals[0]['score'] == 100.0
+
+
+def test_top_ranked_coin_without_a_gain_is_not_bullish():
+    coins = [coin(f'c{i}', 10, 1000, change_24h=i - 30) for i in range(20)]
+    assert [s['direction'] for s in scan(coins)['momentum_signals']] == ['BEARISH']
+
+
+def test_percentile_ranks_put_nan_lowest():
+    np.testing.assert_allclose(_percentile_ranks(np.array([3.0, np.nan, 1.0])), [1.0, 0.0, 0.5])
+
+
+def test_volume_history_grows_and_seeds_rows():
+    history = VolumeHistory(window=4, sample_seconds=0)
+    history.rows(['a'])
+    rows, new = history.rows(['a', 'b', 'c'])
+    assert new == ['b', 'c'] and list(rows) == [0, 1, 2]
+    history.seed('b', [1.0, 2.0, 3.0, 4.0, 5.0])
+    mean, _, counts = history.stats(rows)
+    assert counts.tolist() == [0, 3, 0]
+    assert mean[1] == 4.0
@@ -0,0 +1,69 @@
+from flask import Flask, g
+
+from src.services.metrics import Registry, timed_stage
+
+
+def test_counter_renders_one_sample_per_label_set():
+    registry = Registry()
+    requests = registry.counter('requests_total', 'Requests', ('route',))
+    requests.inc(route='/a')
+    requests.inc(2, route='/b')
+    requests.inc(route='/a')
+    assert registry.render() == (
+        '# HELP requests_total Requests\n'
+        '# TYPE requests_total counter\n'
+        'requests_total{route="/a"} 2\n'
+        'requests_total{route="/b"} 2\n'
+    )
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = Registry()
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.7, 5.0):
+        latency.observe(value)
+    lines = registry.render().splitlines()[2:]
+    assert lines == [
+        'latency_seconds_bucket{le="0.1"} 1',
+        'latency_seconds_bucket{le="1.0"} 3',
+        'latency_seconds_bucket{le="+Inf"} 4',
+        'latency_seconds_sum 6.25',
+        'latency_seconds_count 4'
+    ]
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter('errors_total', 'Errors', ('message',)).inc(message='say "hi"\n')
+    assert 'errors_total{message="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+def test_callback_metrics_are_read_at_scrape_time():
+    registry = Registry()
+    depth = {'value': 1}
+    registry.gauge_callback('queue_depth', 'Depth', lambda: [({'priority': 'interactive'}, depth['value']), ({}, None)])
+
+    def broken():
+        raise RuntimeError('unavailable')
+
+    registry.counter_callback('broken_total', 'Broken', broken)
+    depth['value'] = 7
+    assert registry.render() == '# HELP queue_depth Depth\n# TYPE queue_depth gauge\nqueue_depth{priority="interactive"} 7\n'
+
+
+def test_registering_a_name_twice_returns_the_first_metric():
+    registry = Registry()
+    first = registry.counter('calls_total', 'Calls')
+    assert registry.counter('calls_total', 'Calls') is first
+
+
+def test_timed_stage_reports_to_server_timing_inside_a_request():
+    with timed_stage('outside'):
+        pass
+
+    with Flask(__name__).test_request_context():
+        g.server_timing = []
+        with timed_stage('sections'):
+            pass
+        (name, elapsed), = g.server_timing
+    assert name == 'sections' and elapsed >= 0
@@ -0,0 +1,104 @@
+import json
+import queue
+
+import pytest
+
+from src.routes import stream
+from src.routes.stream import stream_bp
+from src.services.price_feed import FeedFull, PriceFeed, format_event
+
+
+class Client:
+    def __init__(self):
+        self.prices = {'bitcoin': 100.0, 'ethereum': 10.0}
+
+    def get_coins_markets(self, vs_currency, per_page, page, **params):
+        if page > 1:
+            return []
+        return [
+            {'id': coin_id, 'symbol': coin_id[:3], 'name': coin_id.title(), 'market_cap_rank': rank,
+             'current_price': price, 'price_change_percentage_24h': 1.0, 'total_volume': 5.0}
+            for rank, (coin_id, price) in enumerate(self.prices.items(), 1)
+        ]
+
+
+def event(payload):
+    name, data = payload.strip().split('\n')
+    return name[len('event: '):], json.loads(data[len('data: '):])
+
+
+def test_first_poll_publishes_every_coin_then_only_changes():
+    client = Client()
+    feed = PriceFeed(client)
+    subscriber = queue.Queue()
+    feed._subscribers.add(subscriber)
+
+    feed.poll()
+    version, state = feed.snapshot()
+    assert version == 1
+    assert state['bitcoin'] == {'price': 100.0, 'change24h': 1.0, 'volume': 5.0, 'symbol': 'BIT', 'name': 'Bitcoin', 'rank': 1}
+
+    client.prices['bitcoin'] = 101.0
+    feed.poll()
+    feed.poll()
+    assert feed.snapshot()[0] == 2
+    subscriber.get_nowait()
+    version, payload = subscriber.get_nowait()
+    assert event(payload) == ('update', {'version': 2, 'changes': {'bitcoin': {'price': 101.0}}})
+    assert subscriber.empty()
+
+
+def test_slow_subscribers_are_told_to_resync():
+    client = Client()
+    feed = PriceFeed(client, queue_size=1)
+    subscriber = queue.Queue(maxsize=1)
+    feed._subscribers.add(subscriber)
+    feed.poll()
+    client.prices['bitcoin'] = 101.0
+    feed.poll()
+    assert subscriber.get_nowait() == (2, None)
+
+
+def test_subscribers_are_capped():
+    feed = PriceFeed(Client(), interval=0.01, max_subscribers=1)
+    first = feed.subscribe()
+    with pytest.raises(FeedFull):
+        feed.subscribe()
+    feed.unsubscribe(first)
+    feed.unsubscribe(feed.subscribe())
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_format_event():
+    assert format_event('update', {'a': 1}) == 'event: update\ndata: {"a":1}\n\n'
+
+
+@pytest.fixture
+def feed(app, monkeypatch):
+    feed = PriceFeed(Client(), interval=60, max_subscribers=1)
+    monkeypatch.setattr(stream, 'price_feed', feed)
+    app.register_blueprint(stream_bp, url_prefix='/api/stream')
+    return feed
+
+
+def test_stream_starts_with_a_snapshot(app, feed):
+    feed.poll()
+    response = app.test_client().get('/api/stream/prices', buffered=False)
+    assert response.mimetype == 'text/event-stream'
+    name, data = event(next(response.response).decode())
+    assert name == 'snapshot'
+    assert set(data['coins']) == {'bitcoin', 'ethereum'}
+    response.close()
+    assert feed.stats()['subscribers'] == 0
+
+
+def test_unread_stream_is_unsubscribed_on_close(app, feed):
+    client = app.test_client()
+    response = client.get('/api/stream/prices', buffered=False)
+    assert feed.stats()['subscribers'] == 1
+    full = client.get('/api/stream/prices')
+    assert full.status_code == 503
+    assert full.headers['Retry-After']
+
+    response.close()
+    assert feed.stats()['subscribers'] == 0
@@ -0,0 +1,96 @@
+import time
+
+import pytest
+
+from src.models.price_history import PricePoint
+from src.models.user import db
+from src.services.price_store import PriceStore
+
+HOUR = 3600 * 1000
+
+
+class ChartClient:
+    def __init__(self):
+        self.payloads = {}
+        self.requests = []
+
+    def get_coin_market_chart(self, coin_id, vs_currency='usd', days=30):
+        self.requests.append((coin_id, days))
+        return self.payloads[coin_id]
+
+
+def chart(points):
+    return {
+        'prices': [[t, p] for t, p in points],
+        'total_volumes': [[t, p * 10] for t, p in points],
+        'market_caps': [[t, p * 100] for t, p in points]
+    }
+
+
+def stored(coin_id='bitcoin'):
+    points = db.session.query(PricePoint).filter_by(coin_id=coin_id, resolution='hourly').order_by(PricePoint.timestamp)
+    return [(point.timestamp, point.price) for point in points]
+
+
+@pytest.fixture
+def now():
+    return int(time.time() * 1000)
+
+
+def test_first_refresh_stores_the_full_window(app, now):
+    client = ChartClient()
+    client.payloads['bitcoin'] = chart([(now - 2 * HOUR, 1.0), (now - HOUR, 2.0)])
+    store = PriceStore(client)
+
+    assert store.refresh(['bitcoin'], days=30) == {}
+    assert client.requests == [('bitcoin', 30)]
+    assert stored() == [(now - 2 * HOUR, 1.0), (now - HOUR, 2.0)]
+
+    history = store.load(['bitcoin'], days=30)['bitcoin']
+    assert list(history['prices']) == [1.0, 2.0]
+    assert list(history['volumes']) == [10.0, 20.0]
+
+
+def test_fresh_history_is_not_fetched_again(app, now):
+    client = ChartClient()
+    client.payloads['bitcoin'] = chart([(now - HOUR, 1.0), (now - 1000, 2.0)])
+    store = PriceStore(client, refresh_interval=300)
+    store.refresh(['bitcoin'], days=30)
+    store.refresh(['bitcoin'], days=30)
+    assert len(client.requests) == 1
+
+
+def test_stale_history_only_fetches_the_missing_tail(app, now):
+    client = ChartClient()
+    store = PriceStore(client, refresh_interval=0)
+    last = now - 3 * 24 * HOUR + HOUR
+    client.payloads['bitcoin'] = chart([(now - 40 * 24 * HOUR, 1.0), (last, 2.0)])
+    store.refresh(['bitcoin'], days=30)
+
+    client.payloads['bitcoin'] = chart([(last, 2.5), (now - HOUR, 3.0)])
+    store.refresh(['bitcoin'], days=30)
+    # Under three days missing plus one day of overlap
+    assert client.requests[-1] == ('bitcoin', 4)
+    assert stored()[-2:] == [(last, 2.5), (now - HOUR, 3.0)]
+
+
+def test_refresh_replaces_only_the_fetched_span(app, now):
+    client = ChartClient()
+    store = PriceStore(client, refresh_interval=0)
+    client.payloads['bitcoin'] = chart([(now - 3 * HOUR, 1.0), (now - 2 * HOUR - 5, 2.0), (now - HOUR, 3.0), (now - 10, 4.0)])
+    store.refresh(['bitcoin'], days=2)
+
+    # An older payload covering only part of the stored history keeps newer points
+    store._store({'bitcoin': chart([(now - 3 * HOUR, 1.5), (now - 2 * HOUR, 2.5)])}, 'hourly')
+    assert stored() == [(now - 3 * HOUR, 1.5), (now - 2 * HOUR, 2.5), (now - HOUR, 3.0), (now - 10, 4.0)]
+
+
+def test_fetch_errors_are_returned_by_coin(app):
+    class FailingClient:
+        def get_coin_market_chart(self, coin_id, vs_currency='usd', days=30):
+            raise ValueError('unknown coin')
+
+    store = PriceStore(FailingClient())
+    errors = store.refresh(['nope'], days=30)
+    assert list(errors) == ['nope']
+    assert store.load(['nope']) == {}
@@ -0,0 +1,82 @@
+import threading
+import time
+
+from flask import Flask
+
+from src.services.concurrency import gather_sections
+from src.services.priority import BACKFILL, BACKGROUND, INTERACTIVE, current_priority, upstream_priority
+from src.services.scheduler import SnapshotScheduler
+from src.services.upstream import UpstreamClient
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_priority_defaults_by_context():
+    assert current_priority() == BACKGROUND
+    with Flask(__name__).test_request_context():
+        assert current_priority() == INTERACTIVE
+        with upstream_priority(BACKFILL):
+            assert current_priority() == BACKFILL
+        assert current_priority() == INTERACTIVE
+
+
+def test_sections_run_at_the_callers_priority():
+    with Flask(__name__).test_request_context():
+        results, errors = gather_sections({'a': current_priority, 'b': current_priority})
+    assert errors == {}
+    assert results == {'a': INTERACTIVE, 'b': INTERACTIVE}
+
+    with upstream_priority(BACKFILL):
+        results, _ = gather_sections({'a': current_priority})
+    assert results == {'a': BACKFILL}
+
+
+def test_scheduler_only_lowers_priority_on_its_own_threads():
+    seen = []
+
+    def job():
+        seen.append(current_priority())
+        return len(seen)
+
+    scheduler = SnapshotScheduler()
+    scheduler.register('report', job, interval=60)
+    with Flask(__name__).test_request_context():
+        scheduler.get_or_compute('report')
+    assert seen == [INTERACTIVE]
+
+    warming = SnapshotScheduler()
+    warming.register('report', job, interval=60)
+    with upstream_priority(INTERACTIVE):
+        warming.warm_up()
+        assert wait_for(lambda: len(seen) == 2)
+    assert seen[1] == BACKGROUND
+
+
+def test_identical_calls_in_flight_share_one_request():
+    release = threading.Event()
+    calls = []
+
+    class Target:
+        def quote(self, coin_id):
+            calls.append(coin_id)
+            release.wait(2)
+            return {'id': coin_id}
+
+    client = UpstreamClient(Target())
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(client.quote('bitcoin'))) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    assert wait_for(lambda: client.stats.snapshot().get('quote', {}).get('deduplicated') == 3)
+    release.set()
+    for thread in threads:
+        thread.join()
+
+    assert results == [{'id': 'bitcoin'}] * 4
+    assert calls == ['bitcoin']
+    assert client.stats.snapshot()['quote']['calls'] == 1
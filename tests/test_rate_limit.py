@@ -0,0 +1,67 @@
+import threading
+import time
+
+import pytest
+
+from src.services.priority import BACKFILL, BACKGROUND, INTERACTIVE
+from src.services.rate_limit import PriorityTokenBucket, RateLimitExceeded, TokenBucket
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+    return condition()
+
+
+def test_token_bucket_times_out_when_empty():
+    bucket = TokenBucket(rate_per_minute=1, capacity=1)
+    bucket.acquire()
+    assert bucket.available() == 0
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(timeout=0.01)
+
+
+def test_waiters_are_served_most_urgent_first():
+    bucket = PriorityTokenBucket(rate_per_minute=600, capacity=1)
+    bucket.acquire()
+    order = []
+
+    def acquire(priority):
+        bucket.acquire(timeout=5, priority=priority)
+        order.append(priority)
+
+    threads = []
+    for priority in (BACKFILL, BACKGROUND, INTERACTIVE):
+        threads.append(threading.Thread(target=acquire, args=(priority,)))
+        threads[-1].start()
+        assert wait_for(lambda: sum(bucket.queue_depth().values()) == len(threads))
+    for thread in threads:
+        thread.join()
+
+    assert order == [INTERACTIVE, BACKGROUND, BACKFILL]
+
+
+def test_queue_depth_counts_waiters_by_priority():
+    bucket = PriorityTokenBucket(rate_per_minute=60, capacity=1)
+    bucket.acquire()
+    thread = threading.Thread(target=lambda: bucket.acquire(timeout=5, priority=BACKFILL))
+    thread.start()
+    assert wait_for(lambda: bucket.queue_depth()[BACKFILL] == 1)
+    assert bucket.queue_depth() == {INTERACTIVE: 0, BACKGROUND: 0, BACKFILL: 1}
+    thread.join()
+    assert bucket.queue_depth()[BACKFILL] == 0
+
+
+def test_priority_waiter_times_out_and_leaves_the_queue():
+    bucket = PriorityTokenBucket(rate_per_minute=1, capacity=1)
+    bucket.acquire()
+    with pytest.raises(RateLimitExceeded):
+        bucket.acquire(timeout=0.01, priority=INTERACTIVE)
+    assert bucket.queue_depth()[INTERACTIVE] == 0
+
+
+def test_acquire_returns_seconds_waited():
+    bucket = PriorityTokenBucket(rate_per_minute=600, capacity=1)
+    assert bucket.acquire() < 0.05
+    assert 0.05 < bucket.acquire(timeout=1) < 0.5
@@ -0,0 +1,104 @@
+import time
+
+import pytest
+
+from src.services.scheduler import SnapshotScheduler
+
+
+class Job:
+    def __init__(self, fail=False):
+        self.calls = 0
+        self.fail = fail
+
+    def __call__(self):
+        self.calls += 1
+        if self.fail:
+            raise RuntimeError('upstream down')
+        return {'run': self.calls}
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_run_publishes_versioned_copies():
+    scheduler = SnapshotScheduler()
+    job = Job()
+    scheduler.register('report', job, interval=60)
+
+    first = scheduler.run('report')
+    second = scheduler.run('report')
+    assert (first.version, first.data) == (1, {'run': 1})
+    assert (second.version, second.data) == (2, {'run': 2})
+    assert scheduler.get('report') is second
+
+
+def test_get_or_compute_only_computes_when_missing_or_expired():
+    scheduler = SnapshotScheduler()
+    job = Job()
+    scheduler.register('report', job, interval=60)
+
+    assert scheduler.get('report') is None
+    assert scheduler.get_or_compute('report').data == {'run': 1}
+    assert scheduler.get_or_compute('report').data == {'run': 1}
+    assert job.calls == 1
+
+
+def test_failed_run_keeps_the_previous_snapshot():
+    scheduler = SnapshotScheduler()
+    job = Job()
+    scheduler.register('report', job, interval=60)
+    scheduler.run('report')
+
+    job.fail = True
+    assert scheduler.run('report').data == {'run': 1}
+    assert scheduler.status()['jobs']['report']['failures'] == 1
+    assert scheduler.status()['jobs']['report']['last_error'] == 'upstream down'
+
+
+def test_get_or_compute_raises_without_any_snapshot():
+    scheduler = SnapshotScheduler()
+    scheduler.register('report', Job(fail=True), interval=60)
+    with pytest.raises(RuntimeError):
+        scheduler.get_or_compute('report')
+
+
+def test_version_changes_with_each_publish():
+    scheduler = SnapshotScheduler()
+    scheduler.register('a', Job(), interval=60)
+    scheduler.register('b', Job(), interval=60)
+    assert scheduler.version('a', 'b') == (None, None)
+
+    scheduler.run('a')
+    scheduler.run('b')
+    versions, _ = scheduler.version('a', 'b')
+    scheduler.run('b')
+    assert scheduler.version('a', 'b')[0] != versions
+
+
+def test_background_threads_recompute_on_their_interval():
+    scheduler = SnapshotScheduler()
+    job = Job()
+    scheduler.register('report', job, interval=0.05)
+    scheduler.start()
+    try:
+        assert wait_for(lambda: job.calls >= 3)
+    finally:
+        scheduler.stop()
+    assert not scheduler.running
+
+
+def test_cold_jobs_are_left_out_of_warm_up():
+    scheduler = SnapshotScheduler()
+    warm, cold = Job(), Job()
+    scheduler.register('warm', warm, interval=60)
+    scheduler.register('cold', cold, interval=60, warm=False)
+
+    assert scheduler.pending() == ['warm']
+    scheduler.warm_up()
+    assert wait_for(lambda: not scheduler.pending())
+    assert cold.calls == 0
+
@@ -0,0 +1,172 @@
+import os
+import stat
+import threading
+import time
+
+import pytest
+
+from src.services import scheduler as scheduler_module
+from src.services import shared_store
+from src.services.scheduler import SnapshotScheduler
+from src.services.shared_store import FileStore, open_store
+
+
+@pytest.fixture
+def directory(tmp_path):
+    return str(tmp_path / 'cache')
+
+
+def test_values_round_trip_with_their_store_time(directory):
+    store = FileStore(directory)
+    before = time.time()
+    store.set(('coingecko', 'markets'), [{'id': 'bitcoin'}], ttl=60)
+    stored_at, value = store.get(('coingecko', 'markets'))
+    assert value == [{'id': 'bitcoin'}]
+    assert before <= stored_at <= time.time()
+    assert store.get('missing') is None
+
+
+def test_expired_values_are_not_returned(directory):
+    store = FileStore(directory)
+    store.set('key', 'value', ttl=0.01)
+    time.sleep(0.02)
+    assert store.get('key') is None
+
+
+def test_stamp_changes_when_a_key_is_rewritten(directory):
+    store = FileStore(directory)
+    assert store.stamp('key') is None
+    store.set('key', 1)
+    first = store.stamp('key')
+    store.set('key', 2)
+    assert store.stamp('key') != first
+
+
+def test_directory_is_private_to_its_owner(directory):
+    FileStore(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+    os.chmod(directory, 0o777)
+    FileStore(directory)
+    assert stat.S_IMODE(os.stat(directory).st_mode) == 0o700
+
+
+def test_symlinked_directory_is_refused(directory, tmp_path):
+    FileStore(directory)
+    link = str(tmp_path / 'link')
+    os.symlink(directory, link)
+    with pytest.raises(RuntimeError):
+        FileStore(link)
+
+
+def test_prune_removes_expired_entries_and_abandoned_temp_files(directory, monkeypatch):
+    store = FileStore(directory)
+    store.set('expired', 1, ttl=0.01)
+    store.set('kept', 2, ttl=60)
+    store.set('forever', 3)
+    abandoned = os.path.join(directory, '.tmp-abandoned')
+    open(abandoned, 'w').close()
+    os.utime(abandoned, (0, 0))
+    store.acquire_leadership()
+    time.sleep(0.02)
+
+    assert store.prune() == 2
+    assert store.get('kept')[1] == 2
+    assert store.get('forever')[1] == 3
+    assert not os.path.exists(abandoned)
+    assert os.path.exists(os.path.join(directory, 'leader.lock'))
+
+
+def test_writes_prune_at_most_once_per_interval(directory, monkeypatch):
+    monkeypatch.setattr(shared_store, 'PRUNE_SECONDS', 0)
+    store = FileStore(directory)
+    store.set('expired', 1, ttl=0.01)
+    time.sleep(0.02)
+    store.set('other', 2)
+    assert sorted(os.listdir(directory)) == [shared_store._digest('other')]
+
+
+def test_only_one_store_holds_leadership(directory):
+    first, second = FileStore(directory), FileStore(directory)
+    assert first.acquire_leadership()
+    assert first.acquire_leadership()
+    assert not second.acquire_leadership()
+
+
+def test_followers_read_what_the_leader_publishes(directory, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'FOLLOWER_POLL_SECONDS', 0.01)
+    calls = {'leader': 0, 'follower': 0}
+    schedulers = {}
+    for name in ('leader', 'follower'):
+        schedulers[name] = SnapshotScheduler(store=FileStore(directory))
+        schedulers[name].register('report', lambda name=name: calls.__setitem__(name, calls[name] + 1) or {'by': name}, interval=60)
+
+    schedulers['leader'].start()
+    try:
+        deadline = time.monotonic() + 2
+        while calls['leader'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        schedulers['follower'].start()
+        time.sleep(0.1)
+        assert schedulers['follower'].get('report').data == {'by': 'leader'}
+    finally:
+        schedulers['leader'].stop()
+        schedulers['follower'].stop()
+    assert schedulers['leader'].leader and not schedulers['follower'].leader
+    assert calls == {'leader': 1, 'follower': 0}
+
+
+def test_open_store_by_url(directory):
+    assert open_store('') is None
+    assert isinstance(open_store(f'file://{directory}'), FileStore)
+    with pytest.raises(ValueError):
+        open_store('ftp://example.com/cache')
+
+
+def test_follower_waits_for_the_leader_on_a_cold_start(directory, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'FOLLOWER_POLL_SECONDS', 0.01)
+    monkeypatch.setattr(scheduler_module, 'LEADER_POLL_SECONDS', 0.01)
+    leader_store = FileStore(directory)
+    assert leader_store.acquire_leadership()
+    calls = {'leader': 0, 'follower': 0}
+
+    def job(name):
+        calls[name] += 1
+        return {'by': name}
+
+    follower = SnapshotScheduler(store=FileStore(directory))
+    follower.register('report', lambda: job('follower'), interval=60)
+    leader = SnapshotScheduler(store=leader_store)
+    leader.register('report', lambda: job('leader'), interval=60)
+
+    follower.start()
+    results = []
+    waiting = threading.Thread(target=lambda: results.append(follower.get_or_compute('report')))
+    try:
+        waiting.start()
+        time.sleep(0.1)
+        assert not results
+        leader.start()
+        waiting.join(timeout=2)
+    finally:
+        leader.stop()
+        follower.stop()
+    assert results[0].data == {'by': 'leader'}
+    assert calls == {'leader': 1, 'follower': 0}
+
+
+def test_follower_gives_up_when_the_leader_never_publishes(directory, monkeypatch):
+    monkeypatch.setattr(scheduler_module, 'LEADER_WAIT_SECONDS', 0.05)
+    monkeypatch.setattr(scheduler_module, 'LEADER_POLL_SECONDS', 0.01)
+    leader_store = FileStore(directory)
+    assert leader_store.acquire_leadership()
+    calls = []
+    follower = SnapshotScheduler(store=FileStore(directory))
+    follower.register('report', lambda: calls.append(1), interval=60)
+    follower.start()
+    try:
+        with pytest.raises(RuntimeError):
+            follower.get_or_compute('report')
+    finally:
+        follower.stop()
+    assert calls == []
@@ -0,0 +1,160 @@
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from src.models.signal_history import CoinSignalRollup, DailySignalRollup, PickRecord, SignalRecord
+from src.models.user import db
+from src.services.scheduler import Snapshot
+from src.services.signal_history import (
+    DAY_MS, SignalRecorder, _RollupBatch, coin_history, leaderboard, performance
+)
+
+pytestmark = pytest.mark.usefixtures('app')
+
+
+class Picks:
+    def __init__(self, *opportunities):
+        self.by_confidence = list(opportunities)
+
+    def select(self, limit):
+        return None, range(min(limit, len(self.by_confidence)))
+
+
+class Scheduler:
+    def __init__(self):
+        self.snapshots = {}
+
+    def publish(self, name, data):
+        previous = self.snapshots.get(name)
+        self.snapshots[name] = Snapshot(name, previous.version + 1 if previous else 1, data, time.time(), 0)
+
+    def get(self, name):
+        return self.snapshots.get(name)
+
+
+class Client:
+    def __init__(self, prices=None):
+        self.prices = prices or {}
+
+    def get_coins_markets(self, vs_currency, per_page, page, **params):
+        if page > 1:
+            return []
+        return [{'id': coin_id, 'current_price': price} for coin_id, price in self.prices.items()]
+
+
+def opportunity(coin_id, risk_level='MEDIUM', price=100.0, confidence=70):
+    return SimpleNamespace(
+        coin_id=coin_id, symbol=coin_id[:3], risk_level=risk_level, entry_confidence=confidence, value_score=50,
+        current_price=price, entry_point=price, exit_point=price * 1.1, price_target=price * 1.2, stop_loss=price * 0.9
+    )
+
+
+def recorder(prices=None):
+    return SignalRecorder(Scheduler(), Client(prices), picks_per_scan=2)
+
+
+def test_record_stores_picks_and_signals_once_per_snapshot():
+    signal_recorder = recorder({'bitcoin': 100.0, 'ethereum': 100.0})
+    scheduler = signal_recorder.scheduler
+    scheduler.publish('swing_opportunities', Picks(opportunity('bitcoin'), opportunity('ethereum'), opportunity('solana')))
+    scheduler.publish('volume_anomalies', [{'coin_id': 'dogecoin', 'volume_ratio': 4.2}, {'coin_id': 'dogecoin'}])
+
+    result = signal_recorder.record()
+    assert (result['picks'], result['signals'], result['closed']) == (2, {'volume_anomaly': 1, 'momentum': 0}, 0)
+    assert db.session.scalars(db.select(SignalRecord.strength)).all() == [4.2]
+
+    assert signal_recorder.record()['picks'] == 0
+    # Coins with an open pick are not picked again from a newer scan
+    scheduler.publish('swing_opportunities', Picks(opportunity('bitcoin'), opportunity('solana')))
+    assert signal_recorder.record()['picks'] == 1
+    assert db.session.query(PickRecord).count() == 3
+
+
+def test_signals_within_the_cooldown_are_skipped():
+    signal_recorder = recorder()
+    scheduler = signal_recorder.scheduler
+    scheduler.publish('momentum_signals', [{'id': 'bitcoin', 'score': 1}])
+    signal_recorder.record()
+    scheduler.publish('momentum_signals', [{'id': 'bitcoin', 'score': 2}, {'id': 'ethereum', 'score': 3}])
+    assert signal_recorder.record()['signals']['momentum'] == 1
+
+
+def test_picks_close_on_target_stop_or_expiry():
+    signal_recorder = recorder({'bitcoin': 111.0, 'ethereum': 85.0, 'solana': 101.0, 'cardano': 100.0})
+    now = int(time.time() * 1000)
+    db.session.add_all([
+        PickRecord(recorded_at=now, coin_id='bitcoin', risk_level='MEDIUM', confidence=70, price=100.0, exit_point=110.0, stop_loss=90.0),
+        PickRecord(recorded_at=now, coin_id='ethereum', risk_level='MEDIUM', confidence=70, price=100.0, exit_point=110.0, stop_loss=90.0),
+        PickRecord(recorded_at=now - 15 * DAY_MS, coin_id='solana', risk_level='HIGH', confidence=70, price=100.0, exit_point=110.0, stop_loss=90.0),
+        PickRecord(recorded_at=now, coin_id='cardano', risk_level='LOW', confidence=70, price=100.0, exit_point=110.0, stop_loss=90.0)
+    ])
+    db.session.commit()
+
+    assert signal_recorder.record()['closed'] == 3
+    outcomes = dict(db.session.execute(db.select(PickRecord.coin_id, PickRecord.outcome)).all())
+    assert outcomes == {'bitcoin': 'target', 'ethereum': 'stop', 'solana': 'expired', 'cardano': None}
+    bitcoin = db.session.get(CoinSignalRollup, ('bitcoin', 'pick'))
+    assert (bitcoin.closed, bitcoin.wins) == (1, 1)
+    assert bitcoin.return_sum == pytest.approx(0.11)
+    assert db.session.get(CoinSignalRollup, ('ethereum', 'pick')).wins == 0
+
+
+def test_rollup_batches_add_to_existing_rows():
+    now = int(time.time() * 1000)
+    for _ in range(2):
+        batch = _RollupBatch()
+        batch.add(now, 'pick', 'bitcoin', 'LOW', signals=1, confidence_sum=80)
+        batch.add(now, 'pick', 'bitcoin', 'LOW', closed=1, wins=1, return_sum=0.1)
+        batch.flush()
+        db.session.commit()
+
+    day = datetime.fromtimestamp(now / 1000, tz=timezone.utc).date()
+    daily = db.session.get(DailySignalRollup, (day, 'pick', 'LOW'))
+    assert (daily.signals, daily.closed, daily.wins, daily.confidence_sum) == (2, 2, 2, 160)
+    coin = db.session.get(CoinSignalRollup, ('bitcoin', 'pick'))
+    assert coin.return_sum == pytest.approx(0.2)
+    assert coin.last_recorded_at == now
+
+
+def test_performance_and_leaderboard_read_the_rollups():
+    now = int(time.time() * 1000)
+    batch = _RollupBatch()
+    batch.add(now, 'pick', 'bitcoin', 'LOW', signals=2, confidence_sum=150, closed=2, wins=2, return_sum=0.3)
+    batch.add(now, 'pick', 'ethereum', 'HIGH', signals=1, confidence_sum=60, closed=1, wins=0, return_sum=-0.1)
+    batch.add(now - 40 * DAY_MS, 'pick', 'solana', 'HIGH', signals=1, confidence_sum=60)
+    batch.flush()
+    db.session.commit()
+
+    report = performance('pick', days=30)
+    assert report['totals'] == {'signals': 3, 'closed': 3, 'wins': 2, 'win_rate': 66.67, 'avg_return': 6.67, 'avg_confidence': 70.0}
+    assert list(report['by_risk']) == ['LOW', 'HIGH']
+    assert len(report['daily']) == 1
+
+    assert [row['coin_id'] for row in leaderboard('pick')] == ['bitcoin', 'ethereum']
+    assert [row['coin_id'] for row in leaderboard('pick', sort='signals')] == ['bitcoin', 'ethereum', 'solana']
+    assert leaderboard('pick', limit=1)[0]['win_rate'] == 100.0
+
+
+def test_coin_history_pages_newest_first():
+    db.session.add_all([
+        SignalRecord(kind='momentum', recorded_at=at, coin_id='bitcoin', strength=at) for at in (1, 2, 3)
+    ] + [SignalRecord(kind='volume_anomaly', recorded_at=4, coin_id='bitcoin')])
+    db.session.commit()
+
+    first = coin_history('bitcoin', 'momentum', limit=2)
+    assert [record['recorded_at'] for record in first] == [3, 2]
+    assert [record['recorded_at'] for record in coin_history('bitcoin', 'momentum', limit=2, before=2)] == [1]
+    assert coin_history('bitcoin', 'pick') == []
+
+
+def test_analytics_views_do_not_record(app):
+    from src.routes.analytics import analytics_bp, snapshot_scheduler
+
+    app.register_blueprint(analytics_bp, url_prefix='/api/analytics')
+    client = app.test_client()
+    for path in ('/performance', '/leaderboard', '/history/bitcoin'):
+        assert client.get(f'/api/analytics{path}').status_code == 200
+    assert snapshot_scheduler.get('signal_history') is None
+    assert db.session.query(PickRecord).count() == 0
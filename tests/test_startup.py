@@ -0,0 +1,87 @@
+import threading
+import time
+
+from src.services.lazy import LazyProxy
+from src.services.scheduler import SnapshotScheduler
+
+
+class Client:
+    def __init__(self):
+        self.calls = 0
+
+    def ping(self):
+        self.calls += 1
+        return 'pong'
+
+
+def test_lazy_proxy_builds_its_target_once_on_first_use():
+    built = []
+
+    def factory():
+        built.append(Client())
+        return built[-1]
+
+    client = LazyProxy(factory)
+    assert built == []
+    assert client.ping() == 'pong'
+    assert client.ping() == 'pong'
+    assert len(built) == 1
+    assert client.resolve() is built[0]
+    assert built[0].calls == 2
+
+
+def test_lazy_proxy_builds_once_under_concurrent_first_use():
+    built = []
+    started = threading.Barrier(8)
+
+    def factory():
+        time.sleep(0.05)
+        built.append(Client())
+        return built[-1]
+
+    client = LazyProxy(factory)
+
+    def use():
+        started.wait()
+        client.ping()
+
+    threads = [threading.Thread(target=use) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1
+    assert built[0].calls == 8
+
+
+def test_pending_lists_warm_jobs_until_warm_up_publishes_them():
+    scheduler = SnapshotScheduler()
+    release = threading.Event()
+    scheduler.register('prices', lambda: [1, 2], interval=60)
+    scheduler.register('slow', lambda: release.wait(5) and 'done', interval=60)
+    scheduler.register('backtest', lambda: 'batch', interval=3600, warm=False)
+    assert scheduler.pending() == ['prices', 'slow']
+
+    scheduler.warm_up()
+    deadline = time.monotonic() + 5
+    while scheduler.pending() != ['slow'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.pending() == ['slow']
+
+    release.set()
+    while scheduler.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert scheduler.pending() == []
+    assert scheduler.get('prices').data == [1, 2]
+    assert scheduler.get('backtest') is None
+
+
+def test_failed_warm_up_leaves_the_job_pending():
+    scheduler = SnapshotScheduler()
+
+    def fail():
+        raise RuntimeError('upstream down')
+
+    scheduler.register('prices', fail, interval=60)
+    scheduler._warm('prices')
+    assert scheduler.pending() == ['prices']
@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from src.services.indicators import latest_indicators
+from src.services.streaming_indicators import IncrementalIndicators, IndicatorBook, RollingWindow
+
+PRICES = 100 + 10 * np.sin(np.arange(200) / 7) + np.arange(200) * 0.1
+
+
+def assert_matches_batch(values, closes):
+    expected = latest_indicators(closes)
+    assert set(values) == set(expected)
+    for key, column in expected.items():
+        np.testing.assert_allclose(values[key], column[0], rtol=1e-9, equal_nan=True, err_msg=key)
+
+
+@pytest.mark.parametrize('length', [1, 10, 30, 60, 200])
+def test_rolled_series_matches_batch_indicators(length):
+    indicators = IncrementalIndicators()
+    for price in PRICES[:length]:
+        indicators.roll(float(price))
+    assert_matches_batch(indicators.values(), PRICES[:length])
+
+
+def test_tick_moves_the_bar_in_progress():
+    indicators = IncrementalIndicators()
+    for price in PRICES:
+        indicators.roll(float(price))
+    indicators.tick(150.0)
+    assert_matches_batch(indicators.values(), np.append(PRICES[:-1], 150.0))
+
+    indicators.roll(90.0)
+    assert_matches_batch(indicators.values(), np.append(np.append(PRICES[:-1], 150.0), 90.0))
+
+
+def test_rolling_window_extremes_drop_old_values():
+    window = RollingWindow(3)
+    for value in (5.0, 1.0, 4.0, 3.0):
+        window.commit(value)
+    assert window.peek_extremes(2.0) == (2.0, 4.0)
+    assert window.peek_stats(2.0)[0] == pytest.approx(3.0)
+
+
+def test_book_rolls_bars_after_bar_seconds():
+    book = IndicatorBook(bar_seconds=3600)
+    timestamps = [i * 3600_000 for i in range(len(PRICES))]
+    book.seed('bitcoin', timestamps, PRICES)
+    start = timestamps[-1] / 1000
+
+    assert book.tick('bitcoin', 150.0, at=start + 60)
+    assert_matches_batch(book.values()['bitcoin'], np.append(PRICES[:-1], 150.0))
+
+    assert book.tick('bitcoin', 90.0, at=start + 3600)
+    assert_matches_batch(book.values(['bitcoin'])['bitcoin'], np.append(np.append(PRICES[:-1], 150.0), 90.0))
+
+
+def test_book_ignores_unseeded_coins():
+    book = IndicatorBook()
+    assert not book.tick('missing', 1.0)
+    assert 'missing' not in book
+    assert book.values(['missing']) == {}
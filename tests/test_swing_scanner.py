@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+from src.services.swing_scanner import OpportunitySnapshot, SwingScanner
+
+
+class Client:
+    def __init__(self, coins):
+        self.coins = coins
+
+    def get_coins_markets(self, vs_currency, per_page, page, **params):
+        return self.coins[(page - 1) * per_page:page * per_page]
+
+
+def coin(coin_id, rank, price=100.0, ath_change=-60.0, market_cap=1000.0, volume=200.0, low=99.0, high=105.0, change_24h=-2.0):
+    return {
+        'id': coin_id, 'name': coin_id.title(), 'symbol': coin_id[:3], 'market_cap_rank': rank,
+        'current_price': price, 'ath_change_percentage': ath_change, 'market_cap': market_cap,
+        'total_volume': volume, 'low_24h': low, 'high_24h': high, 'price_change_percentage_24h': change_24h
+    }
+
+
+def scan(*coins):
+    return SwingScanner(Client(list(coins))).scan_swing_opportunities()
+
+
+def test_scores_a_coin_from_its_markets_row():
+    # 30 for the ATH discount, 15 for volume/market cap above 0.1, 10 near support
+    opp, = scan(coin('bitcoin', rank=10)).by_confidence
+    assert opp.value_score == 55
+    assert opp.swing_signals == ('Deep discount from ATH', 'Volume increase', 'Support level')
+    assert opp.risk_level == 'LOW'
+    assert opp.entry_confidence == 70
+    assert opp.entry_point == pytest.approx(99.99)
+    assert opp.price_target == pytest.approx(99.99 * 1.24)
+    assert opp.exit_point == pytest.approx(99.99 * 1.12)
+    assert opp.stop_loss == pytest.approx(99.99 * 0.95)
+    assert opp.momentum == 'Bearish'
+    assert opp.current_to_target_return == pytest.approx(23.99, abs=0.01)
+
+
+def test_coins_without_signals_are_skipped():
+    snapshot = scan(coin('quiet', rank=5, ath_change=-10, volume=10, low=90), coin('nothing', rank=6, price=0))
+    assert len(snapshot) == 0
+    assert snapshot.universe_size == 1
+
+
+def test_risk_follows_rank_and_volatility():
+    snapshot = scan(coin('a', rank=10), coin('b', rank=50), coin('c', rank=500), coin('d', rank=10, high=120))
+    assert {opp.coin_id: opp.risk_level for opp in snapshot.by_confidence} == {
+        'a': 'LOW', 'b': 'MEDIUM', 'c': 'HIGH', 'd': 'MEDIUM'
+    }
+    assert [opp.entry_confidence for opp in snapshot.by_confidence] == [70, 65, 65, 60]
+
+
+def test_snapshot_filters_and_summarizes():
+    snapshot = scan(coin('a', rank=10), coin('b', rank=50), coin('c', rank=500))
+    assert [opp.coin_id for opp in snapshot.top(risk_level='MEDIUM')] == ['b']
+    assert [opp.coin_id for opp in snapshot.top(min_confidence=66)] == ['a']
+    assert [opp.coin_id for opp in snapshot.top(max_rank=100)] == ['a', 'b']
+    assert snapshot.query(1)[0] == 3
+
+    _, indexes = snapshot.select()
+    summary = snapshot.summarize(indexes)
+    assert summary['risk_distribution'] == {'LOW': 1, 'MEDIUM': 1, 'HIGH': 1}
+    assert summary['confidence_distribution'] == {'high': 0, 'medium': 0, 'low': 3}
+    assert summary['avg_confidence'] == 65
+    assert snapshot.summarize(np.array([], dtype=int))['total_opportunities'] == 0
+
+
+def test_snapshot_orders_by_confidence_then_value_score():
+    opportunities = scan(coin('a', rank=500), coin('b', rank=10), coin('c', rank=10, ath_change=-90)).by_confidence
+    assert [opp.coin_id for opp in opportunities] == ['c', 'b', 'a']
+    assert OpportunitySnapshot(list(reversed(opportunities))).by_confidence == opportunities
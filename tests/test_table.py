@@ -0,0 +1,66 @@
+import pytest
+from werkzeug.datastructures import MultiDict
+
+from src.services.table import IndexedTable, TableQueryError, parse_fields, parse_list_query, project
+
+FILTERS = {'price': 'current_price', 'rank': 'market_cap_rank'}
+
+ROWS = ['a', 'b', 'c', 'd', 'e']
+TABLE = IndexedTable(ROWS, {'price': [3.0, 1.0, None, 5.0, 2.0], 'rank': [1, 2, 3, 4, 5]})
+
+
+def test_table_sorts_with_missing_values_last():
+    assert TABLE.query(sort='price')[1] == ['b', 'e', 'a', 'd', 'c']
+    assert TABLE.query(sort='price', descending=True)[1] == ['d', 'a', 'e', 'b', 'c']
+
+
+def test_table_keeps_build_order_without_sort():
+    assert TABLE.query()[1] == ROWS
+
+
+def test_table_range_filters_exclude_missing_values():
+    total, rows = TABLE.query(ranges={'price': (2.0, None)})
+    assert (total, rows) == (3, ['a', 'd', 'e'])
+    assert TABLE.query(ranges={'price': (None, 2.0), 'rank': (3, None)})[1] == ['e']
+
+
+def test_table_pages_report_the_total_match_count():
+    total, rows = TABLE.query(sort='rank', descending=True, limit=2, offset=1)
+    assert (total, rows) == (5, ['d', 'c'])
+    assert TABLE.query(sort='rank', limit=2, offset=10) == (5, [])
+
+
+def test_table_rejects_unknown_sort_columns():
+    with pytest.raises(TableQueryError):
+        TABLE.select(sort='volume')
+
+
+def test_sort_accepts_filter_and_column_names():
+    assert parse_list_query(MultiDict({'sort': '-price'}), FILTERS)['sort'] == 'current_price'
+    query = parse_list_query(MultiDict({'sort': 'market_cap_rank'}), FILTERS)
+    assert (query['sort'], query['descending']) == ('market_cap_rank', False)
+    assert parse_list_query(MultiDict({'sort': '-price'}), FILTERS)['descending'] is True
+
+
+def test_range_filters_map_to_columns():
+    query = parse_list_query(MultiDict({'min_price': '1.5', 'max_rank': '100'}), FILTERS)
+    assert query['ranges'] == {'current_price': (1.5, None), 'market_cap_rank': (None, 100.0)}
+
+
+def test_empty_query_has_no_sort_or_ranges():
+    assert parse_list_query(MultiDict({'min_price': ''}), FILTERS) == {'sort': None, 'descending': False, 'ranges': {}}
+
+
+@pytest.mark.parametrize('args', [{'min_price': 'abc'}, {'max_rank': 'nan'}, {'max_price': '1,5'}])
+def test_unparsable_range_bounds_are_rejected(args):
+    with pytest.raises(TableQueryError):
+        parse_list_query(MultiDict(args), FILTERS)
+
+
+def test_fields_are_validated_and_projected():
+    fields = parse_fields(MultiDict({'fields': 'id, price'}), ('id', 'name', 'price'))
+    assert fields == ['id', 'price']
+    assert project({'id': 'btc', 'name': 'Bitcoin', 'price': 1}, fields) == {'id': 'btc', 'price': 1}
+    assert parse_fields(MultiDict(), ('id',)) is None
+    with pytest.raises(TableQueryError):
+        parse_fields(MultiDict({'fields': 'id,secret'}), ('id',))
@@ -0,0 +1,72 @@
+import json
+
+import pytest
+
+from src.routes import crypto
+from src.routes.crypto import _decode_cursor, _encode_cursor, crypto_bp
+
+
+class Client:
+    def __init__(self, count, fail_after=None):
+        self.coins = [
+            {'id': f'coin{i}', 'name': f'Coin {i}', 'symbol': f'c{i}', 'current_price': 100.0 - i,
+             'price_change_percentage_24h': (i % 5) - 2.0, 'market_cap': 1e6 - i, 'total_volume': 10.0 * i,
+             'market_cap_rank': i + 1}
+            for i in range(count)
+        ]
+        self.fail_after = fail_after
+
+    def get_coins_markets(self, vs_currency, per_page, page, **params):
+        if self.fail_after is not None and page > self.fail_after:
+            raise RuntimeError('upstream down')
+        return self.coins[(page - 1) * per_page:page * per_page]
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(crypto, 'coingecko_client', Client(300))
+    monkeypatch.setattr(crypto, 'snapshot_data', lambda name: crypto.build_market_table())
+    app.register_blueprint(crypto_bp, url_prefix='/api/crypto')
+    return app.test_client()
+
+
+def test_cursor_round_trips_and_rejects_garbage():
+    assert _decode_cursor(_encode_cursor(250)) == 250
+    for cursor in ('not base64!', _encode_cursor(-1), 'eDox'):
+        with pytest.raises(crypto.InvalidCursor):
+            _decode_cursor(cursor)
+
+
+def test_pages_follow_next_cursor(client):
+    first = client.get('/api/crypto/top-coins?limit=2').get_json()
+    assert [coin['id'] for coin in first['data']] == ['coin0', 'coin1']
+    second = client.get(f"/api/crypto/top-coins?limit=2&cursor={first['next_cursor']}").get_json()
+    assert [coin['id'] for coin in second['data']] == ['coin2', 'coin3']
+
+    last = client.get(f"/api/crypto/top-coins?limit=250&cursor={_encode_cursor(250)}").get_json()
+    assert len(last['data']) == 50
+    assert last['next_cursor'] is None
+    assert client.get('/api/crypto/top-coins?cursor=bad').status_code == 400
+
+
+def test_sorted_pages_come_from_the_market_table(client):
+    response = client.get('/api/crypto/top-coins?sort=-volume&limit=2&fields=id,volume').get_json()
+    assert response['data'] == [{'id': 'coin299', 'volume': 2990.0}, {'id': 'coin298', 'volume': 2980.0}]
+    last = client.get(f"/api/crypto/top-coins?sort=-volume&limit=2&cursor={_encode_cursor(298)}").get_json()
+    assert [coin['id'] for coin in last['data']] == ['coin1', 'coin0']
+    assert last['next_cursor'] is None
+
+
+def test_ndjson_streams_one_coin_per_line(client):
+    response = client.get('/api/crypto/top-coins?format=ndjson&limit=260&fields=id,rank')
+    assert response.mimetype == 'application/x-ndjson'
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert len(lines) == 260
+    assert lines[-1] == {'id': 'coin259', 'rank': 260}
+
+
+def test_ndjson_ends_with_an_error_line_when_upstream_fails(client, monkeypatch):
+    monkeypatch.setattr(crypto, 'coingecko_client', Client(300, fail_after=1))
+    lines = client.get('/api/crypto/top-coins?format=ndjson&limit=300').get_data(as_text=True).splitlines()
+    assert len(lines) == 251
+    assert json.loads(lines[-1]) == {'error': 'upstream down'}
@@ -0,0 +1,101 @@
+import threading
+import time
+from concurrent.futures import CancelledError
+
+import pytest
+
+from src.services.upstream import CircuitBreaker, CircuitOpenError, UpstreamClient
+
+
+class Interrupted(BaseException):
+    """Stands in for gevent's Timeout and GreenletExit"""
+
+
+class Target:
+    def __init__(self, error=None):
+        self.error = error
+        self.calls = 0
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def quote(self, coin_id):
+        self.calls += 1
+        self.started.set()
+        self.release.wait(2)
+        if self.error is not None:
+            raise self.error
+        return {'id': coin_id}
+
+
+def call_in_thread(client, results):
+    def run():
+        try:
+            results.append(client.quote('bitcoin'))
+        except BaseException as e:
+            results.append(e)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def test_waiters_are_released_when_the_shared_call_is_interrupted():
+    target = Target(Interrupted())
+    client = UpstreamClient(target)
+    leader_results, waiter_results = [], []
+    leader = call_in_thread(client, leader_results)
+    assert target.started.wait(2)
+    waiter = call_in_thread(client, waiter_results)
+    deadline = time.monotonic() + 2
+    while not client.stats.snapshot().get('quote', {}).get('deduplicated') and time.monotonic() < deadline:
+        time.sleep(0.005)
+    target.release.set()
+    leader.join(2)
+    waiter.join(2)
+
+    assert isinstance(leader_results[0], Interrupted)
+    assert isinstance(waiter_results[0], CancelledError)
+    assert not waiter.is_alive()
+    # The next call is made afresh
+    target.error = None
+    assert client.quote('bitcoin') == {'id': 'bitcoin'}
+
+
+def test_waiters_give_up_after_wait_timeout():
+    target = Target()
+    client = UpstreamClient(target, wait_timeout=0.05)
+    leader = call_in_thread(client, [])
+    assert target.started.wait(2)
+    with pytest.raises(TimeoutError):
+        client.quote('bitcoin')
+    target.release.set()
+    leader.join(2)
+    assert target.calls == 1
+
+
+def test_breaker_opens_after_consecutive_failures_and_recovers():
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=0.05)
+    target = Target(RuntimeError('down'))
+    target.release.set()
+    client = UpstreamClient(target, breaker=breaker)
+    for _ in range(2):
+        with pytest.raises(RuntimeError):
+            client.quote('bitcoin')
+    with pytest.raises(CircuitOpenError):
+        client.quote('bitcoin')
+    assert target.calls == 2
+
+    time.sleep(0.06)
+    target.error = None
+    assert client.quote('bitcoin') == {'id': 'bitcoin'}
+    assert breaker.status()['state'] == 'closed'
+
+
+def test_interrupted_trial_frees_the_half_open_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    target = Target(Interrupted())
+    target.release.set()
+    client = UpstreamClient(target, breaker=breaker)
+    with pytest.raises(Interrupted):
+        client.quote('bitcoin')
+    assert breaker.allow()
@@ -0,0 +1,111 @@
+import pytest
+
+from src.routes import user as user_routes
+from src.routes.user import user_bp
+from src.services.cache import TTLCache
+
+TOKEN = 'test-token'
+AUTH = {'Authorization': f'Bearer {TOKEN}'}
+
+
+@pytest.fixture
+def client(app, monkeypatch):
+    monkeypatch.setattr(user_routes, 'USER_API_TOKEN', TOKEN)
+    app.register_blueprint(user_bp, url_prefix='/api')
+    monkeypatch.setattr(user_routes, 'user_cache', TTLCache(fallback_ttl=0))
+    return app.test_client()
+
+
+def create(client, *names):
+    users = [{'username': name, 'email': f'{name}@example.com'} for name in names]
+    response = client.post('/api/users/bulk', json={'users': users}, headers=AUTH)
+    assert response.status_code == 201
+    return response.get_json()['users']
+
+
+@pytest.mark.parametrize('headers', [{}, {'Authorization': 'Bearer wrong'}, {'Authorization': TOKEN}])
+def test_requests_without_the_token_are_rejected(client, headers):
+    assert client.get('/api/users', headers=headers).status_code == 401
+
+
+def test_bulk_create_returns_the_created_users(client):
+    users = create(client, 'alice', 'bob')
+    assert [user['username'] for user in users] == ['alice', 'bob']
+    assert all(isinstance(user['id'], int) for user in users)
+
+
+def test_bulk_create_rejects_duplicates_in_the_request(client):
+    users = [{'username': 'alice', 'email': 'a@example.com'}, {'username': 'alice', 'email': 'b@example.com'}]
+    response = client.post('/api/users/bulk', json={'users': users}, headers=AUTH)
+    assert response.status_code == 400
+    assert client.get('/api/users', headers=AUTH).get_json()['users'] == []
+
+
+def test_existing_usernames_conflict(client):
+    create(client, 'alice')
+    response = client.post('/api/users/bulk', json={'users': [{'username': 'alice', 'email': 'new@example.com'}]}, headers=AUTH)
+    assert response.status_code == 409
+
+
+def test_listing_pages_by_id(client):
+    create(client, 'a', 'b', 'c')
+    first = client.get('/api/users?limit=2', headers=AUTH).get_json()
+    assert [user['username'] for user in first['users']] == ['a', 'b']
+    second = client.get(f"/api/users?limit=2&after={first['next_after']}", headers=AUTH).get_json()
+    assert [user['username'] for user in second['users']] == ['c']
+    assert second['next_after'] is None
+    assert client.get('/api/users?limit=0', headers=AUTH).status_code == 400
+
+
+def test_bulk_update_invalidates_cached_lookups(client):
+    alice, bob = create(client, 'alice', 'bob')
+    assert client.get('/api/users/by-username/alice', headers=AUTH).get_json()['id'] == alice['id']
+    assert client.get(f"/api/users/{bob['id']}", headers=AUTH).get_json()['username'] == 'bob'
+
+    response = client.put('/api/users/bulk', json={'users': [
+        {'id': alice['id'], 'username': 'alicia'}, {'id': bob['id'], 'email': 'robert@example.com'}
+    ]}, headers=AUTH)
+    assert response.get_json() == {'updated': 2}
+    assert client.get('/api/users/by-username/alice', headers=AUTH).status_code == 404
+    assert client.get('/api/users/by-username/alicia', headers=AUTH).get_json()['id'] == alice['id']
+    assert client.get(f"/api/users/{bob['id']}", headers=AUTH).get_json()['email'] == 'robert@example.com'
+
+
+def test_bulk_update_reports_missing_ids(client):
+    alice, = create(client, 'alice')
+    response = client.put('/api/users/bulk', json={'users': [{'id': alice['id'], 'username': 'x'}, {'id': 999, 'email': 'y@example.com'}]}, headers=AUTH)
+    assert response.status_code == 404
+    assert response.get_json()['ids'] == [999]
+
+
+def test_bulk_delete_removes_users(client):
+    alice, bob = create(client, 'alice', 'bob')
+    client.get(f"/api/users/{alice['id']}", headers=AUTH)
+    response = client.delete('/api/users/bulk', json={'ids': [alice['id'], 12345]}, headers=AUTH)
+    assert response.get_json() == {'deleted': 1}
+    assert client.get(f"/api/users/{alice['id']}", headers=AUTH).status_code == 404
+    assert client.get(f"/api/users/{bob['id']}", headers=AUTH).status_code == 200
+
+
+def test_bulk_rename_clears_cached_misses_for_the_new_username(client):
+    alice, = create(client, 'alice')
+    assert client.get('/api/users/by-username/bob', headers=AUTH).status_code == 404
+    client.put('/api/users/bulk', json={'users': [{'id': alice['id'], 'username': 'bob'}]}, headers=AUTH)
+    assert client.get('/api/users/by-username/bob', headers=AUTH).get_json()['id'] == alice['id']
+
+
+def test_bulk_update_rejects_entries_without_changes(client):
+    alice, = create(client, 'alice')
+    response = client.put('/api/users/bulk', json={'users': [{'id': alice['id']}]}, headers=AUTH)
+    assert response.status_code == 400
+
+
+@pytest.mark.parametrize('method, payload', [
+    ('delete', {'ids': [True]}),
+    ('put', {'users': [{'id': True, 'username': 'x'}]})
+])
+def test_boolean_ids_are_rejected(client, method, payload):
+    create(client, 'alice')
+    response = getattr(client, method)('/api/users/bulk', json=payload, headers=AUTH)
+    assert response.status_code == 400
+    assert client.get('/api/users/by-username/alice', headers=AUTH).status_code == 200